@@ -1,6 +1,8 @@
 import sys
 import os
+import time
 import random
+from functools import lru_cache
 import pandas as pd
 import numpy as np
 
@@ -8,36 +10,109 @@ import numpy as np
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 
 from coins import (
-    get_coins,
-    get_returns,
+    get_panel_coins,
+    get_statistics,
     calculate_portfolio_sharpe,
+    calculate_portfolio_sharpe_batch,
 )
+from fitness_cache import FitnessCache, wallet_signatures
+from population import Population, best_indices
 
 allowed_weights = [0.10, 0.20, 0.30, 0.40, 0.50]
+fitness_cache = FitnessCache()
 
 
-def generate_exact_weights(allowed_weights, num_coins):
+def generate_exact_weights(allowed_weights, num_coins, rng=None):
     """
     Generate a list of exact weights that sum up to 1.0.
 
-    This function randomly selects weights from the `allowed_weights` list
-    and ensures their total equals 1.0.
+    This function draws one composition uniformly from the precomputed table
+    of `enumerate_weight_compositions`, which gives the same distribution as
+    drawing weights from `allowed_weights` until their total equals 1.0.
 
     Args:
         allowed_weights (list): A list of allowed weight values.
         num_coins (int): Number of weights to generate.
+        rng (random.Random, optional): Random generator. Defaults to the
+                                       `random` module.
 
     Returns:
         list: A list of weights summing to 1.0.
+
+    Raises:
+        ValueError: If no combination of `allowed_weights` sums to 1.0.
+    """
+    compositions = weight_compositions_or_raise(allowed_weights, num_coins)
+    rng = rng or random
+    return compositions[rng.randrange(len(compositions))].tolist()
+
+
+def enumerate_weight_compositions(allowed_weights, num_coins):
+    """
+    Enumerate every ordered combination of allowed weights summing to 1.0.
+
+    Weights are compared in hundredths, so the result does not depend on
+    floating point rounding. The table is computed once per
+    (`allowed_weights`, `num_coins`) pair and cached.
+
+    Args:
+        allowed_weights (list): A list of allowed weight values.
+        num_coins (int): Number of weights in each composition.
+
+    Returns:
+        np.ndarray: A read-only C x `num_coins` matrix, one composition per row.
+    """
+    return _weight_compositions(tuple(allowed_weights), num_coins)
+
+
+def weight_compositions_or_raise(allowed_weights, num_coins):
     """
-    while True:
-        weights = [random.choice(allowed_weights) for _ in range(num_coins)]
-        total = round(sum(weights), 2)
-        if total == 1.0:
-            return weights
+    Enumerate the weight compositions, failing when there is none.
 
+    Args:
+        allowed_weights (list): A list of allowed weight values.
+        num_coins (int): Number of weights in each composition.
+
+    Returns:
+        np.ndarray: The compositions of `enumerate_weight_compositions`.
 
-def generate_population(coins_quantity, population_size=10):
+    Raises:
+        ValueError: If no combination of `allowed_weights` sums to 1.0.
+    """
+    compositions = enumerate_weight_compositions(allowed_weights, num_coins)
+    if len(compositions) == 0:
+        raise ValueError(
+            f"No combination of {list(allowed_weights)} for {num_coins} coins "
+            "sums to 1.0."
+        )
+    return compositions
+
+
+@lru_cache(maxsize=None)
+def _weight_compositions(allowed_weights, num_coins):
+    steps = sorted({round(w * 100) for w in allowed_weights})
+    compositions = []
+
+    def extend(prefix, remaining):
+        slots = num_coins - len(prefix)
+        if slots == 0:
+            if remaining == 0:
+                compositions.append(prefix)
+            return
+        for step in steps:
+            left = remaining - step
+            if steps[0] * (slots - 1) <= left <= steps[-1] * (slots - 1):
+                extend(prefix + (step,), left)
+
+    if steps and num_coins > 0:
+        extend((), 100)
+
+    table = np.array(compositions, dtype=np.float64).reshape(-1, num_coins) / 100
+    table.flags.writeable = False
+    return table
+
+
+def generate_population(coins_quantity, population_size=10, statistics=None, rng=None):
     """
     Generate an initial population of wallets.
 
@@ -46,11 +121,16 @@ def generate_population(coins_quantity, population_size=10):
     Args:
         coins_quantity (int): Number of coins in each wallet.
         population_size (int): Total number of wallets to generate.
+        statistics (dict, optional): Statistics index whose coins are drawn.
+                                     Defaults to the process-wide one.
+        rng (random.Random, optional): Random generator. Defaults to the
+                                       `random` module.
 
     Returns:
         list: A list of dictionaries representing the population of wallets.
     """
-    possibles_coins = get_coins()
+    rng = rng or random
+    possibles_coins = statistics["coins"] if statistics else get_panel_coins()
     population = []
     unique_individuals = set()
 
@@ -61,10 +141,10 @@ def generate_population(coins_quantity, population_size=10):
         Ensures coins and weights are properly normalized and unique.
         """
         while True:
-            coins = set(random.sample(possibles_coins, num_coins))
-            weights = generate_exact_weights(allowed_weights, num_coins)
+            coins = rng.sample(possibles_coins, num_coins)
+            weights = generate_exact_weights(allowed_weights, num_coins, rng)
             exists_zero_weight = any(w == 0 for w in weights)
-            if len(coins) == len(weights) and not exists_zero_weight:
+            if len(set(coins)) == len(weights) and not exists_zero_weight:
                 break
 
         sum_weights = sum(weights)
@@ -84,32 +164,207 @@ def generate_population(coins_quantity, population_size=10):
     return population
 
 
-def calculate_fitness(population, risk_free_rate):
+def duplicate_mask(coins):
+    """
+    Mark the coins already held at an earlier position of the same wallet.
+
+    Args:
+        coins (np.ndarray): P x k matrix of coin ids.
+
+    Returns:
+        np.ndarray: P x k boolean matrix, True on every repeated coin after
+                    its first occurrence.
+    """
+    repeated = np.zeros(coins.shape, dtype=bool)
+    for j in range(1, coins.shape[1]):
+        repeated[:, j] = (coins[:, :j] == coins[:, j : j + 1]).any(axis=1)
+    return repeated
+
+
+def project_weights(weights, allowed_weights):
+    """
+    Move each row of weights to the nearest composition of allowed weights.
+
+    Rows are normalized to sum 1.0 and matched against the table of
+    `enumerate_weight_compositions` with one matrix product.
+
+    Args:
+        weights (np.ndarray): P x k matrix of positive weights.
+        allowed_weights (list): A list of allowed weight values.
+
+    Returns:
+        np.ndarray: P x k matrix of weights on the grid, each row summing to 1.0.
+
+    Raises:
+        ValueError: If no combination of `allowed_weights` sums to 1.0.
+    """
+    compositions = weight_compositions_or_raise(allowed_weights, weights.shape[1])
+    weights = np.asarray(weights, dtype=np.float64)
+    weights = weights / weights.sum(axis=1, keepdims=True)
+    # the nearest composition c maximizes w.c - |c|^2 / 2
+    score = weights @ compositions.T
+    score -= (compositions**2).sum(axis=1) / 2
+    return compositions[np.argmax(score, axis=1)]
+
+
+def generate_population_arrays(
+    coins_quantity, population_size=10, statistics=None, rng=None
+):
+    """
+    Generate a random population stored as arrays.
+
+    The array counterpart of `generate_population`: coins are drawn with
+    `rng.integers` and only the repeated ones are drawn again, so a wallet
+    costs O(k) whatever the size of the universe. Identical wallets are not
+    filtered out.
+
+    Args:
+        coins_quantity (int): Number of coins in each wallet.
+        population_size (int): Number of wallets to generate.
+        statistics (dict, optional): Statistics index whose coins are drawn.
+                                     Defaults to the process-wide one.
+        rng (np.random.Generator, optional): Random generator. Defaults to a
+                                             fresh unseeded one.
+
+    Returns:
+        Population: The random wallets, without fitness.
+
+    Raises:
+        ValueError: If the universe has fewer than `coins_quantity` coins or
+                    no combination of `allowed_weights` sums to 1.0.
+    """
+    rng = rng or np.random.default_rng()
+    statistics = statistics or get_statistics()
+    num_coins = len(statistics["coins"])
+    if coins_quantity > num_coins:
+        raise ValueError(
+            f"Cannot draw {coins_quantity} different coins out of {num_coins}."
+        )
+    compositions = weight_compositions_or_raise(allowed_weights, coins_quantity)
+
+    coins = rng.integers(num_coins, size=(population_size, coins_quantity))
+    rows = np.arange(population_size)
+    while rows.size:
+        repeated = duplicate_mask(coins[rows])
+        invalid = repeated.any(axis=1)
+        rows, repeated = rows[invalid], repeated[invalid]
+        block = coins[rows]
+        block[repeated] = rng.integers(num_coins, size=int(repeated.sum()))
+        coins[rows] = block
+
+    weights = compositions[rng.integers(len(compositions), size=population_size)]
+    return Population(coins, weights, names=statistics["coins"])
+
+
+def population_to_arrays(population, statistics=None):
+    """
+    Convert a population of wallets into coin-id and weight matrices.
+
+    Args:
+        population (list): A list of wallets with the same number of coins.
+        statistics (dict, optional): Statistics index to use. Defaults to the
+                                     process-wide one.
+
+    Returns:
+        tuple: A P x k matrix of coin ids and a P x k matrix of weights.
+    """
+    ids = (statistics or get_statistics())["ids"]
+    coin_idx = np.array(
+        [[ids[coin] for coin in wallet["coins"]] for wallet in population],
+        dtype=np.intp,
+    )
+    weights = np.array([wallet["weights"] for wallet in population], dtype=float)
+    return coin_idx, weights
+
+
+def calculate_fitness(
+    population, risk_free_rate, vectorized=True, use_cache=False, statistics=None
+):
     """
     Calculate the fitness (Sharpe Ratio) for each wallet in the population.
 
+    The wallets are, by default, scored in a single call to
+    `calculate_portfolio_sharpe_batch`. A `Population` is scored in place
+    with `Population.evaluate`.
+
+    With `use_cache`, wallets already scored are answered from
+    `fitness_cache`. The lookup costs about as much as scoring a wallet, so
+    the cache only pays off when the hit rate is high, such as when the
+    same population is scored again; GA runs hit it rarely and leave it
+    off.
+
     Args:
-        population (list): A list of wallets, each with coins and weights.
+        population (list or Population): The wallets, each with coins and weights.
         risk_free_rate (float): Annualized risk-free rate as a decimal.
+        vectorized (bool): Score all wallets at once instead of one by one.
+        use_cache (bool): Reuse the fitness of wallets already scored.
+        statistics (dict, optional): Statistics index to score against.
+                                     Defaults to the process-wide one.
 
     Returns:
-        list: The population with updated fitness values for each wallet.
-    """
-    population_with_fitness = []
-    for wallet in population:
-        coins_data = get_returns(wallet["coins"])
-        mean_returns = coins_data.mean()
-        sharpe_ratio = calculate_portfolio_sharpe(wallet, mean_returns, risk_free_rate)
-
-        population_with_fitness.append(
-            {
-                "coins": wallet["coins"],
-                "weights": wallet["weights"],
-                "fitness": sharpe_ratio,
-            }
+        list or Population: The population with updated fitness values for
+                            each wallet.
+    """
+    if isinstance(population, Population):
+        return population.evaluate(risk_free_rate, statistics)
+    if not len(population):
+        return []
+
+    statistics = statistics or get_statistics()
+    coin_ids, weights = population_to_arrays(population, statistics)
+
+    if use_cache:
+        fitness_cache.bind(statistics)
+        # cached wallets are scored in their canonical form, so a fitness value
+        # does not depend on which equivalent wallet was seen first
+        coin_ids, weights, signatures = wallet_signatures(
+            coin_ids, weights, risk_free_rate
         )
-
-    return population_with_fitness
+        sharpe_ratios = fitness_cache.get_many(signatures)
+        pending = {}
+        for i, (signature, fitness) in enumerate(zip(signatures, sharpe_ratios)):
+            if fitness is None:
+                pending.setdefault(signature, []).append(i)
+        to_score = np.array([positions[0] for positions in pending.values()])
+    else:
+        to_score = np.arange(len(population))
+
+    if not len(to_score):
+        scores = []
+    elif vectorized:
+        scores = calculate_portfolio_sharpe_batch(
+            coin_ids[to_score], weights[to_score], risk_free_rate, statistics
+        )
+    else:
+        scores = [
+            calculate_portfolio_sharpe(
+                {
+                    "coins": [statistics["coins"][c] for c in coin_ids[i]],
+                    "weights": list(weights[i]),
+                },
+                statistics["mean"][coin_ids[i]],
+                risk_free_rate,
+                statistics,
+            )
+            for i in to_score
+        ]
+
+    if use_cache:
+        fitness_cache.put_many(zip(pending, scores))
+        for positions, score in zip(pending.values(), scores):
+            for i in positions:
+                sharpe_ratios[i] = score
+    else:
+        sharpe_ratios = scores
+
+    return [
+        {
+            "coins": wallet["coins"],
+            "weights": wallet["weights"],
+            "fitness": sharpe_ratio,
+        }
+        for wallet, sharpe_ratio in zip(population, sharpe_ratios)
+    ]
 
 
 def verify_finishing_condition(population, threshold):
@@ -117,12 +372,14 @@ def verify_finishing_condition(population, threshold):
     Verify if the finishing condition for the genetic algorithm is met.
 
     Args:
-        population (list): The population of wallets.
+        population (list or Population): The population of wallets.
         threshold (float): The fitness threshold to achieve.
 
     Returns:
         bool: True if any wallet meets or exceeds the threshold, otherwise False.
     """
+    if isinstance(population, Population):
+        return bool(np.any(population.fitness > threshold))
     for w in population:
         if w["fitness"] > threshold:
             return True
@@ -133,36 +390,53 @@ def selection_elitism(population):
     """
     Select the two best individuals in the population based on fitness.
 
+    Uses `np.argpartition` on the fitness values instead of sorting the
+    whole population.
+
     Args:
-        population (list): The population of wallets.
+        population (list or Population): The population of wallets.
 
     Returns:
         list: The top two individuals (wallets) with the highest fitness.
     """
-    population = sorted(population, key=lambda x: x["fitness"], reverse=True)
-    return population[:2]
+    if isinstance(population, Population):
+        return [population.wallet(i) for i in population.best(2)]
 
+    fitness = [wallet["fitness"] for wallet in population]
+    return [population[i] for i in best_indices(fitness, 2)]
 
-def selection_tournament(population, tournament_size=3):
+
+def selection_tournament(population, tournament_size=3, rng=None):
     """
     Select two parents using tournament selection.
 
     Args:
-        population (list): The population of wallets.
+        population (list or Population): The population of wallets.
         tournament_size (int): Number of individuals in each tournament.
+        rng (random.Random, optional): Random generator. Defaults to the
+                                       `random` module.
 
     Returns:
         list: Two selected individuals (wallets).
     """
+    rng = rng or random
+    if isinstance(population, Population):
+        selected = []
+        for _ in range(2):  # Select two parents
+            tournament = rng.sample(range(len(population)), tournament_size)
+            winner = max(tournament, key=lambda i: population.fitness[i])
+            selected.append(population.wallet(winner))
+        return selected
+
     selected = []
     for _ in range(2):  # Select two parents
-        tournament = random.sample(population, tournament_size)
+        tournament = rng.sample(population, tournament_size)
         winner = max(tournament, key=lambda x: x["fitness"])
         selected.append(winner)
     return selected
 
 
-def crossover(parent1, parent2):
+def crossover(parent1, parent2, rng=None):
     """
     Perform a two-point crossover to generate an offspring.
 
@@ -172,15 +446,18 @@ def crossover(parent1, parent2):
     Args:
         parent1 (dict): The first parent wallet.
         parent2 (dict): The second parent wallet.
+        rng (random.Random, optional): Random generator. Defaults to the
+                                       `random` module.
 
     Returns:
         dict: A new wallet (offspring) with combined traits from both parents.
     """
+    rng = rng or random
     if len(parent1["coins"]) != len(parent2["coins"]):
         raise ValueError("Both parents must have the same number of coins.")
 
     num_coins = len(parent1["coins"])
-    point1, point2 = sorted(random.sample(range(1, num_coins), 2))
+    point1, point2 = sorted(rng.sample(range(1, num_coins), 2))
 
     # Create new offspring by swapping coins and weights between the crossover points
     child1_coins = (
@@ -204,7 +481,7 @@ def crossover(parent1, parent2):
     child1_coins, child1_weights = list(child1_coins), list(child1_weights)
 
     while len(child1_coins) < num_coins:
-        additional_index = random.randint(0, num_coins - 1)
+        additional_index = rng.randint(0, num_coins - 1)
         additional_coin = parent1["coins"][additional_index]
         additional_weight = parent1["weights"][additional_index]
         if additional_coin not in child1_coins:
@@ -212,7 +489,7 @@ def crossover(parent1, parent2):
             child1_weights.append(additional_weight)
 
     child1_coins = child1_coins[:num_coins]
-    child1_weights = generate_exact_weights(allowed_weights, num_coins)
+    child1_weights = generate_exact_weights(allowed_weights, num_coins, rng)
 
     child1 = {
         "coins": child1_coins,
@@ -223,7 +500,7 @@ def crossover(parent1, parent2):
     return child1
 
 
-def mutate(wallet):
+def mutate(wallet, rng=None):
     """
     Apply mutation by inverting a random interval of coins and weights.
 
@@ -231,13 +508,16 @@ def mutate(wallet):
 
     Args:
         wallet (dict): A wallet with coins and weights.
+        rng (random.Random, optional): Random generator. Defaults to the
+                                       `random` module.
 
     Returns:
         dict: A mutated wallet.
     """
+    rng = rng or random
     total_coins = len(wallet["coins"])
-    min_mutate_rate = random.randint(0, total_coins - 2)
-    max_mutate_rate = random.randint(min_mutate_rate + 1, total_coins - 1)
+    min_mutate_rate = rng.randint(0, total_coins - 2)
+    max_mutate_rate = rng.randint(min_mutate_rate + 1, total_coins - 1)
 
     def apply_mutate(arr, init, end):
         """
@@ -254,9 +534,336 @@ def mutate(wallet):
     )
 
     wallet["weights"] = [
-        w if w > 0 else random.uniform(0.01, 0.1) for w in wallet["weights"]
+        w if w > 0 else rng.uniform(0.01, 0.1) for w in wallet["weights"]
     ]
     total_weight = sum(wallet["weights"])
     wallet["weights"] = [w / total_weight for w in wallet["weights"]]
 
     return wallet
+
+
+def crossover_batch(population, parents1, parents2, rng=None):
+    """
+    Perform a two-point crossover for many pairs of parents at once.
+
+    Row i of the offspring takes the coins and weights of `parents2[i]`
+    between two random cut points and those of `parents1[i]` elsewhere. A
+    coin the child would hold twice is replaced by a coin of the first
+    parent the child is missing, with boolean masks instead of a retry loop,
+    and the weights are projected back onto the `allowed_weights` grid.
+
+    Args:
+        population (Population): The population holding the parents.
+        parents1 (np.ndarray): Positions of the first parent of each child.
+        parents2 (np.ndarray): Positions of the second parent of each child.
+        rng (np.random.Generator, optional): Random generator. Defaults to a
+                                             fresh unseeded one.
+
+    Returns:
+        Population: One child per pair of parents, without fitness.
+
+    Raises:
+        ValueError: If the wallets have fewer than three coins.
+    """
+    rng = rng or np.random.default_rng()
+    num_children, num_coins = len(parents1), population.coins_qtd
+    if num_coins < 3:
+        raise ValueError("Crossover needs wallets with at least three coins.")
+
+    # two different cut points in 1..k-1 for every child
+    cuts = rng.random((num_children, num_coins - 1)).argsort(axis=1)[:, :2] + 1
+    cuts.sort(axis=1)
+    columns = np.arange(num_coins)
+    from_second = (columns >= cuts[:, :1]) & (columns < cuts[:, 1:])
+
+    first_coins = population.coins[parents1]
+    first_weights = population.weights[parents1]
+    coins = np.where(from_second, population.coins[parents2], first_coins)
+    weights = np.where(from_second, population.weights[parents2], first_weights)
+
+    # a child with d repeated coins misses at least d coins of its first
+    # parent; the r-th repeated position gets the r-th missing coin
+    repeated = duplicate_mask(coins)
+    if repeated.any():
+        missing = ~(first_coins[:, :, None] == coins[:, None, :]).any(axis=2)
+        missing_first = np.argsort(~missing, axis=1, kind="stable")
+        rows, positions = np.nonzero(repeated)
+        rank = np.cumsum(repeated, axis=1)[rows, positions] - 1
+        source = missing_first[rows, rank]
+        coins[rows, positions] = first_coins[rows, source]
+        weights[rows, positions] = first_weights[rows, source]
+
+    return Population(
+        coins, project_weights(weights, allowed_weights), names=population.names
+    )
+
+
+def mutate_batch(population, rng=None):
+    """
+    Mutate every wallet of a population by inverting a random interval.
+
+    Unlike `mutate`, which inverts coins and weights together and so keeps
+    the same allocation, only the weights are inverted: weight moves between
+    the coins of the interval and stays on the `allowed_weights` grid.
+
+    Args:
+        population (Population): The wallets to mutate.
+        rng (np.random.Generator, optional): Random generator. Defaults to a
+                                             fresh unseeded one.
+
+    Returns:
+        Population: The mutated wallets, without fitness.
+    """
+    rng = rng or np.random.default_rng()
+    num_wallets, num_coins = population.coins.shape
+    bounds = rng.random((num_wallets, num_coins)).argsort(axis=1)[:, :2]
+    bounds.sort(axis=1)
+    start, end = bounds[:, :1], bounds[:, 1:]
+    columns = np.arange(num_coins)
+    source = np.where(
+        (columns >= start) & (columns <= end), start + end - columns, columns
+    )
+    return Population(
+        population.coins.copy(),
+        np.take_along_axis(population.weights, source, axis=1),
+        names=population.names,
+    )
+
+
+def select_parent_indices(
+    population, has_elitism_and_tournament="elitism_and_tournament", rng=None
+):
+    """
+    Select the positions of the two wallets that drive the next generation.
+
+    The array counterpart of `select_parents`, with tournaments of three.
+
+    Args:
+        population (Population): The scored population.
+        has_elitism_and_tournament (str): Selection mode, one of
+            "elitism_and_tournament", "elitism" or "tournament".
+        rng (np.random.Generator, optional): Random generator. Defaults to a
+                                             fresh unseeded one.
+
+    Returns:
+        np.ndarray: The positions of the two selected wallets.
+    """
+    rng = rng or np.random.default_rng()
+
+    def tournament(tournament_size=3):
+        contestants = rng.choice(len(population), tournament_size, replace=False)
+        return contestants[np.argmax(population.fitness[contestants])]
+
+    if has_elitism_and_tournament == "elitism_and_tournament":
+        return np.array([population.best(1)[0], tournament()])
+    elif has_elitism_and_tournament == "elitism":
+        return population.best(2)
+    else:
+        return np.array([tournament(), tournament()])
+
+
+def select_parents(
+    population, has_elitism_and_tournament="elitism_and_tournament", rng=None
+):
+    """
+    Select the two wallets that drive the next generation.
+
+    Args:
+        population (list): The population of wallets with fitness.
+        has_elitism_and_tournament (str): Selection mode, one of
+            "elitism_and_tournament", "elitism" or "tournament".
+        rng (random.Random, optional): Random generator. Defaults to the
+                                       `random` module.
+
+    Returns:
+        list: The two selected wallets, the best one first.
+    """
+    if has_elitism_and_tournament == "elitism_and_tournament":
+        return (
+            selection_elitism(population)[:1]
+            + selection_tournament(population, rng=rng)[:1]
+        )
+    elif has_elitism_and_tournament == "elitism":
+        return selection_elitism(population)
+    else:
+        return selection_tournament(population, rng=rng)
+
+
+def breed_population(
+    population,
+    selected,
+    population_size,
+    coins_qtd,
+    timings=None,
+    statistics=None,
+    rng=None,
+    immigrant_rate=0.5,
+    mutation_rate=1.0,
+):
+    """
+    Build the next generation from the selected wallets.
+
+    The new population keeps the selected wallets and one mutated child of
+    them, refills `immigrant_rate` of its size with random wallets and
+    completes the rest with children of the current population, each mutated
+    with probability `mutation_rate`.
+
+    Args:
+        population (list): The current population of wallets.
+        selected (list): The wallets chosen by `select_parents`.
+        population_size (int): Size of the new population.
+        coins_qtd (int): Number of coins in each wallet.
+        timings (dict, optional): Receives the wall time in seconds of the
+                                  "crossover_mutation" and "refill" phases.
+        statistics (dict, optional): Statistics index whose coins are drawn
+                                     for the random wallets.
+        rng (random.Random, optional): Random generator. Defaults to the
+                                       `random` module.
+        immigrant_rate (float): Fraction of the population refilled with
+                                random wallets.
+        mutation_rate (float): Probability of mutating each child.
+
+    Returns:
+        list: The new population of wallets, without fitness.
+    """
+    rng = rng or random
+    start = time.perf_counter()
+    new_individual = crossover(
+        rng.choices(selected, k=1)[0], rng.choices(selected, k=1)[0], rng
+    )
+    mutated_individual = mutate(new_individual, rng)
+
+    # start a new population
+    new_population = [mutated_individual]
+    # ensure i don't lose the best wallet
+    new_population.extend(selected)
+
+    # Generate new random individuals to fill part of the population
+    refill_start = time.perf_counter()
+    num_random_individuals = int(population_size * immigrant_rate)
+    new_population.extend(
+        generate_population(
+            coins_quantity=coins_qtd,
+            population_size=num_random_individuals,
+            statistics=statistics,
+            rng=rng,
+        )
+    )
+    refill_end = time.perf_counter()
+
+    while len(new_population) < population_size:
+        parent1, parent2 = rng.choices(population[:population_size], k=2)
+        child = crossover(parent1, parent2, rng)
+        if mutation_rate >= 1 or rng.random() < mutation_rate:
+            child = mutate(child, rng)
+
+        child2 = crossover(parent1, child, rng)
+        if mutation_rate >= 1 or rng.random() < mutation_rate:
+            child2 = mutate(child2, rng)
+
+        child3 = crossover(child, parent2, rng)
+        if mutation_rate >= 1 or rng.random() < mutation_rate:
+            child3 = mutate(child3, rng)
+
+        new_population.extend([child, child2, child3])
+
+    if timings is not None:
+        refill = refill_end - refill_start
+        timings["crossover_mutation"] = time.perf_counter() - start - refill
+        timings["refill"] = refill
+
+    return new_population
+
+
+def breed_population_batch(
+    population,
+    selected,
+    population_size,
+    timings=None,
+    statistics=None,
+    rng=None,
+    immigrant_rate=0.5,
+    mutation_rate=1.0,
+):
+    """
+    Build the next generation from the selected wallets, as arrays.
+
+    The array counterpart of `breed_population`, with the same layout: one
+    mutated child of the selected wallets, the selected wallets,
+    `immigrant_rate` of the size in random wallets, and children of random
+    pairs of the current population. Each pair gives three children as in
+    `breed_population`, but every block of children is produced by one call
+    of `crossover_batch` and `mutate_batch`.
+
+    Args:
+        population (Population): The current scored population.
+        selected (np.ndarray): Positions chosen by `select_parent_indices`.
+        population_size (int): Size of the new population.
+        timings (dict, optional): Receives the wall time in seconds of the
+                                  "crossover_mutation" and "refill" phases.
+        statistics (dict, optional): Statistics index whose coins are drawn
+                                     for the random wallets.
+        rng (np.random.Generator, optional): Random generator. Defaults to a
+                                             fresh unseeded one.
+        immigrant_rate (float): Fraction of the population refilled with
+                                random wallets.
+        mutation_rate (float): Probability of mutating each child.
+
+    Returns:
+        Population: The new population, without fitness.
+    """
+    rng = rng or np.random.default_rng()
+
+    def maybe_mutate(children):
+        mutated = mutate_batch(children, rng)
+        if mutation_rate < 1:
+            keep = rng.random(len(children)) >= mutation_rate
+            mutated.weights[keep] = children.weights[keep]
+        return mutated
+
+    start = time.perf_counter()
+    selected = np.asarray(selected, dtype=np.intp)
+    child = mutate_batch(
+        crossover_batch(
+            population, rng.choice(selected, 1), rng.choice(selected, 1), rng
+        ),
+        rng,
+    )
+    parts = [child, population.take(selected)]
+
+    refill_start = time.perf_counter()
+    parts.append(
+        generate_population_arrays(
+            population.coins_qtd,
+            int(population_size * immigrant_rate),
+            statistics,
+            rng,
+        )
+    )
+    refill_end = time.perf_counter()
+
+    missing = population_size - sum(len(part) for part in parts)
+    if missing > 0:
+        pairs = -(-missing // 3)
+        candidates = min(len(population), population_size)
+        parents1 = rng.integers(candidates, size=pairs)
+        parents2 = rng.integers(candidates, size=pairs)
+        children = maybe_mutate(crossover_batch(population, parents1, parents2, rng))
+        # the second and third children cross each child with its parents
+        family = Population.concat([population, children])
+        children_idx = len(population) + np.arange(pairs)
+        parts += [
+            children,
+            maybe_mutate(crossover_batch(family, parents1, children_idx, rng)),
+            maybe_mutate(crossover_batch(family, children_idx, parents2, rng)),
+        ]
+
+    new_population = Population.concat(parts).take(np.arange(population_size))
+    new_population.fitness[:] = np.nan
+
+    if timings is not None:
+        refill = refill_end - refill_start
+        timings["crossover_mutation"] = time.perf_counter() - start - refill
+        timings["refill"] = refill
+
+    return new_population
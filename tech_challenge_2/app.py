@@ -1,20 +1,12 @@
 import sys
 import os
-import random
-import streamlit as st
 
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 
 
-from ag import (
-    generate_population,
-    calculate_fitness,
-    verify_finishing_condition,
-    selection_elitism,
-    selection_tournament,
-    crossover,
-    mutate,
-)
+from engine import evolve, throttle
+from island import evolve_islands
+from tangency import tangency_search
 
 
 def format_portfolio(assets, weights):
@@ -37,6 +29,118 @@ def format_portfolio(assets, weights):
     return ", ".join(formatted)
 
 
+def print_progress(snapshots):
+    """
+    Print the progress of a run to the terminal.
+
+    Args:
+        snapshots (iterable): The snapshots yielded by `evolve`.
+
+    Returns:
+        Snapshot: The last snapshot of the run.
+    """
+    snapshot = None
+    for snapshot in snapshots:
+        if snapshot.finished:
+            print("-------------------------------------------------")
+            print(f"Best wallet: {dict(snapshot.best_wallet)}")
+            print(f"Stop reason: {snapshot.stop_reason}")
+            break
+
+        best, actual = snapshot.selected
+        print(f"Best wallet fitness: {best.get('fitness').round(2)}")
+        print(f"Best wallet coins: {list(best.get('coins'))}")
+        print(f"Best wallet weights: {list(best.get('weights'))}")
+        print("\n")
+        print(f"Actual wallet fitness: {actual.get('fitness').round(2)}")
+        print(f"Actual wallet coins: {list(actual.get('coins'))}")
+        print(f"Actual wallet weights: {list(actual.get('weights'))}")
+    return snapshot
+
+
+def format_progress(snapshot):
+    """
+    Format the progress of a generation as Streamlit markdown.
+
+    Args:
+        snapshot (Snapshot): A snapshot yielded by `evolve`.
+
+    Returns:
+        str: The markdown describing the generation.
+    """
+    best_wallet = snapshot.selected[0] if snapshot.selected else snapshot.best_wallet
+    log_txt = f"📊 Progresso da Geração: **{snapshot.generation}/{snapshot.max_generations}**\n\n"
+
+    log_txt += f"📈 Melhor Índice de Sharpe Atual: **{best_wallet.get('fitness').round(2)}**\n\n"
+
+    wallet_formatted = format_portfolio(
+        best_wallet.get("coins"), best_wallet.get("weights")
+    )
+
+    log_txt += f"💼 Melhor Carteira e Alocação Atual:\n**{wallet_formatted.upper()}**\n\n"
+    return log_txt
+
+
+def render_progress(snapshots):
+    """
+    Show the progress of a run in the Streamlit page.
+
+    Args:
+        snapshots (iterable): The snapshots yielded by `evolve`.
+
+    Returns:
+        Snapshot: The last snapshot of the run.
+    """
+    import streamlit as st
+
+    st.markdown(
+        """
+        ---
+        """
+    )
+
+    log_txt_box = st.empty()
+
+    snapshot = None
+    for snapshot in snapshots:
+        if snapshot.finished:
+            log_txt_box.empty()
+            render_result(snapshot.best_wallet)
+            break
+
+        log_txt_box.markdown(format_progress(snapshot))
+    return snapshot
+
+
+def render_result(best_wallet):
+    """
+    Show the best wallet of a run in the Streamlit page.
+
+    Args:
+        best_wallet (Mapping): The best wallet found.
+    """
+    import streamlit as st
+
+    with st.container():
+        st.subheader("🔍 Resultado Final")
+        st.markdown(
+            f"📈 **Melhor Índice de Sharpe encontrado:** `{best_wallet.get('fitness').round(2)}`",
+            help="O Índice de Sharpe é uma métrica que avalia a relação entre retorno e risco de uma carteira de investimentos.",
+        )
+
+        result = format_portfolio(best_wallet.get("coins"), best_wallet.get("weights"))
+
+        with st.container():
+            st.write("💡 **Melhor Configuração de Carteira:**")
+            st.markdown(result, unsafe_allow_html=True)
+
+        st.info(
+            "🔔 Dica: Uma carteira bem balanceada considera tanto o retorno esperado quanto o risco associado. "
+            "Certifique-se de revisar os dados antes de investir.",
+            icon="💼",
+        )
+
+
 def run_app(
     good_sharpe_ratio,
     risk_free_rate,
@@ -45,143 +149,120 @@ def run_app(
     max_generations,
     has_elitism_and_tournament="elitism_and_tournament",
     debug=False,
+    observers=None,
+    render_every=None,
+    render_interval=None,
+    seed=None,
+    checkpoint_path=None,
+    resume=False,
+    batched=False,
+    local_search_steps=0,
+    tangency_seeds=0,
+    stall_generations=None,
+    adaptive=False,
+    islands=None,
+    migration_interval=10,
+    migrants=2,
 ):
-    running = True
-    numGeneration = 1
-    best_wallet = None
+    """
+    Run the genetic algorithm and show its progress.
 
-    population = generate_population(
-        coins_quantity=coins_qtd, population_size=population_size
-    )
+    The run itself happens in `engine.evolve`; this function only prints the
+    snapshots to the terminal (`debug`) or draws them in Streamlit.
 
-    if debug == False:
-        st.markdown(
-            """
-            ---
-            """
-        )
+    Args:
+        good_sharpe_ratio (float): Fitness threshold that stops the run.
+        risk_free_rate (float): Annualized risk-free rate as a decimal.
+        population_size (int): Size of the population.
+        coins_qtd (int): Number of coins in each wallet.
+        max_generations (int): Maximum number of generations.
+        has_elitism_and_tournament (str): Selection mode used by
+                                          `select_parents`.
+        debug (bool): Print to the terminal instead of writing to Streamlit.
+        observers (list, optional): Callables receiving the metrics of each
+                                    generation (see `metrics.generation_metrics`),
+                                    such as `metrics.JsonlMetricsWriter`.
+        render_every (int, optional): Redraw the progress only every
+                                      `render_every` generations.
+        render_interval (float, optional): Redraw the progress at most once
+                                           every `render_interval` seconds.
+        seed (int, optional): Seed of the run, for reproducible results.
+        checkpoint_path (str, optional): File where the run is checkpointed.
+        resume (bool): Continue from the checkpoint at `checkpoint_path`.
+        batched (bool): Breed the population with the array operators.
+        local_search_steps (int): Hill-climb the selected wallets for up to
+                                  this many moves each generation.
+        tangency_seeds (int): Start from the best wallets of
+                              `tangency.tangency_search` instead of a fully
+                              random population.
+        stall_generations (int, optional): Stop once the best fitness did not
+                                           improve for this many generations.
+        adaptive (bool): Adapt the immigrant and mutation rates to the
+                         population diversity.
+        islands (int, optional): Run an island model with this many
+                                 populations on a process pool (see
+                                 `island.evolve_islands`), redrawing the
+                                 progress after every migration.
+        migration_interval (int): Generations between island migrations.
+        migrants (int): Number of wallets sent by each island per migration.
 
-        log_txt_box = st.empty()
-        log_txt = ""
+    Returns:
+        Mapping: The best wallet found.
 
-    while running:
-        ## calculates the fitness of each wallet
-        population_with_fitness = calculate_fitness(population, risk_free_rate)
+    Raises:
+        ValueError: If `observers` are given for an island model.
+    """
+    if islands and observers:
+        raise ValueError("Observers are not supported by the island model.")
 
-        ## check if the finishing condition is met
-        can_stop = verify_finishing_condition(
-            population_with_fitness, good_sharpe_ratio
+    initial_population = None
+    if tangency_seeds:
+        initial_population = tangency_search(
+            coins_qtd, risk_free_rate, top_k=tangency_seeds
         )
 
-        ## if the finishing condition is met, print the best wallet and stop the loop
-        if can_stop or numGeneration == max_generations:
-            if debug:
-                print("-------------------------------------------------")
-                print(f"Best wallet: {best_wallet}")
-            else:
-
-                log_txt_box.empty()
-
-                with st.container():
-                    st.subheader("🔍 Resultado Final")
-                    st.markdown(
-                        f"📈 **Melhor Índice de Sharpe encontrado:** `{best_wallet.get('fitness').round(2)}`",
-                        help="O Índice de Sharpe é uma métrica que avalia a relação entre retorno e risco de uma carteira de investimentos.",
-                    )
-
-                    result = format_portfolio(
-                        best_wallet.get("coins"), best_wallet.get("weights")
-                    )
-
-                    with st.container():
-                        st.write("💡 **Melhor Configuração de Carteira:**")
-                        st.markdown(result, unsafe_allow_html=True)
-
-                    st.info(
-                        "🔔 Dica: Uma carteira bem balanceada considera tanto o retorno esperado quanto o risco associado. "
-                        "Certifique-se de revisar os dados antes de investir.",
-                        icon="💼",
-                    )
-
-                running = False
-                break
-
-        ## selection of the best wallets
-        selected = []
-        if has_elitism_and_tournament == "elitism_and_tournament":
-            selected = (
-                selection_elitism(population_with_fitness)[:1]
-                + selection_tournament(population_with_fitness)[:1]
-            )
-        elif has_elitism_and_tournament == "elitism":
-            selected = selection_elitism(population_with_fitness)
-        else:
-            selected = selection_tournament(population_with_fitness)
-
-        best_wallet = selected[0]
-
-        if debug:
-            print(f"Best wallet fitness: {selected[0].get('fitness').round(2)}")
-            print(f"Best wallet coins: {selected[0].get('coins')}")
-            print(f"Best wallet weights: {selected[0].get('weights')}")
-            print("\n")
-            print(f"Actual wallet fitness: {selected[1].get('fitness').round(2)}")
-            print(f"Actual wallet coins: {selected[1].get('coins')}")
-            print(f"Actual wallet weights: {selected[1].get('weights')}")
-        else:
-            log_txt = (
-                f"📊 Progresso da Geração: **{numGeneration}/{max_generations}**\n\n"
-            )
-
-            log_txt += f"📈 Melhor Índice de Sharpe Atual: **{selected[0].get('fitness').round(2)}**\n\n"
-
-            wallet_formatted = format_portfolio(
-                selected[0].get("coins"), selected[0].get("weights")
-            )
-
-            log_txt += f"💼 Melhor Carteira e Alocação Atual:\n**{wallet_formatted.upper()}**\n\n"
-
-            log_txt_box.markdown(log_txt)
-
-        new_individual = crossover(
-            random.choices(selected, k=1)[0], random.choices(selected, k=1)[0]
+    params = {
+        "initial_population": initial_population,
+        "seed": seed,
+        "checkpoint_path": checkpoint_path,
+        "resume": resume,
+        "batched": batched,
+        "local_search_steps": local_search_steps,
+        "stall_generations": stall_generations,
+        "adaptive": adaptive,
+    }
+    if islands:
+        snapshots = evolve_islands(
+            good_sharpe_ratio,
+            risk_free_rate,
+            population_size,
+            coins_qtd,
+            max_generations,
+            has_elitism_and_tournament,
+            islands=islands,
+            migration_interval=migration_interval,
+            migrants=migrants,
+            **params,
         )
-        mutated_individual = mutate(new_individual)
-
-        # start a new population
-        new_population = [mutated_individual]
-        # ensure i don't lose the best wallet
-        new_population.extend(selected)
-
-        # Generate new random individuals to fill 50% of the population
-        num_random_individuals = population_size // 2
-        new_random_individuals = generate_population(
-            coins_quantity=coins_qtd, population_size=num_random_individuals
+    else:
+        snapshots = evolve(
+            good_sharpe_ratio,
+            risk_free_rate,
+            population_size,
+            coins_qtd,
+            max_generations,
+            has_elitism_and_tournament,
+            observers=observers,
+            **params,
         )
+    snapshots = throttle(snapshots, every=render_every, interval=render_interval)
 
-        # Insert new random individuals one by one into new_population
-        for individual in new_random_individuals:
-            new_population.append(individual)
-
-        while len(new_population) < population_size:
-            parent1, parent2 = random.choices(population[:population_size], k=2)
-            child = crossover(parent1, parent2)
-            child = mutate(child)
-
-            child2 = crossover(parent1, child)
-            child2 = mutate(child2)
-
-            child3 = crossover(child, parent2)
-            child3 = mutate(child3)
-
-            new_population.extend([child])
-            new_population.extend([child2])
-            new_population.extend([child3])
+    if debug:
+        snapshot = print_progress(snapshots)
+    else:
+        snapshot = render_progress(snapshots)
 
-        # overrides the population
-        population.clear()
-        population = new_population
-        numGeneration += 1
+    return snapshot.best_wallet
 
 
 def main():
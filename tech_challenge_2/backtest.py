@@ -0,0 +1,326 @@
+import sys
+import os
+import random
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+import pandas as pd
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from coins import (
+    get_returns_panel,
+    build_statistics,
+    update_statistics,
+    downdate_statistics,
+    subset_statistics,
+    share_returns_panel,
+    init_worker as attach_worker,
+)
+from engine import evolve
+
+
+def init_worker(spec):
+    """
+    Prepare a worker process to run walk-forward segments.
+
+    Args:
+        spec (dict): The spec returned by `share_returns_panel`.
+    """
+    attach_worker(spec)
+    random.seed()
+
+
+def rolling_windows(num_days, window, step):
+    """
+    List the training windows of a walk-forward run.
+
+    Each window of `window` days is followed by `step` days of out-of-sample
+    test, and the next window starts `step` days later.
+
+    Args:
+        num_days (int): Number of days in the panel.
+        window (int): Number of days in each training window.
+        step (int): Number of days between windows.
+
+    Returns:
+        list: The (start, end) row positions of each window, end excluded.
+    """
+    return [
+        (start, start + window)
+        for start in range(0, num_days - window - step + 1, step)
+    ]
+
+
+def window_statistics(values, names, windows):
+    """
+    Yield the statistics of consecutive windows, maintained incrementally.
+
+    Rows entering a window are added with `update_statistics` and rows
+    leaving it are removed with `downdate_statistics`; the statistics are
+    only rebuilt when two windows do not overlap.
+
+    Args:
+        values (np.ndarray): T x N matrix of daily returns.
+        names (list): Coin names of the columns.
+        windows (list): The (start, end) row positions of each window.
+
+    Yields:
+        dict: The statistics index of each window, over all coins.
+    """
+    statistics = None
+    previous_start = previous_end = None
+    for start, end in windows:
+        if statistics is None or start >= previous_end:
+            statistics = build_statistics_from_values(values[start:end], names)
+        else:
+            if end > previous_end:
+                statistics = update_statistics(statistics, values[previous_end:end])
+            if start > previous_start:
+                statistics = downdate_statistics(
+                    statistics, values[previous_start:start]
+                )
+        previous_start, previous_end = start, end
+        yield statistics
+
+
+def build_statistics_from_values(values, names):
+    """
+    Build a statistics index from a matrix of daily returns.
+
+    Args:
+        values (np.ndarray): T x N matrix of daily returns.
+        names (list): Coin names of the columns.
+
+    Returns:
+        dict: The statistics index (see `coins.build_statistics`).
+    """
+    return build_statistics(pd.DataFrame(values, columns=names))
+
+
+def portfolio_returns(wallet, values, ids):
+    """
+    Calculate the daily returns of a wallet over some days.
+
+    Only days on which every coin of the wallet traded are kept.
+
+    Args:
+        wallet (Mapping): A wallet with coins and weights.
+        values (np.ndarray): T x N matrix of daily returns.
+        ids (dict): Mapping of coin name to column of `values`.
+
+    Returns:
+        np.ndarray: The daily returns of the wallet.
+    """
+    columns = values[:, [ids[coin] for coin in wallet["coins"]]]
+    columns = columns[~np.isnan(columns).any(axis=1)]
+    return columns @ np.asarray(wallet["weights"], dtype=np.float64)
+
+
+def sharpe_ratio(returns, risk_free_rate):
+    """
+    Calculate the Sharpe Ratio of a series of daily returns.
+
+    Args:
+        returns (np.ndarray): Daily returns.
+        risk_free_rate (float): Annualized risk-free rate as a decimal.
+
+    Returns:
+        float or None: The daily Sharpe Ratio, or None with fewer than two days.
+    """
+    if len(returns) < 2:
+        return None
+    risk_free_rate_daily = (1 + risk_free_rate) ** (1 / 252) - 1
+    return float((returns.mean() - risk_free_rate_daily) / returns.std(ddof=1))
+
+
+def repair_population(population, eligible, rng=None):
+    """
+    Replace the coins of a population that are not eligible in a window.
+
+    Each such coin is swapped for a random eligible coin missing from its
+    wallet, keeping the weights, so a warm start only uses coins present in
+    the statistics of the new window.
+
+    Args:
+        population (list): The wallets carried over from the previous window.
+        eligible (list): Names of the coins of the new window.
+        rng (random.Random, optional): Random generator. Defaults to the
+                                       `random` module.
+
+    Returns:
+        list: The repaired wallets, without fitness.
+    """
+    rng = rng or random
+    eligible_coins = set(eligible)
+    repaired = []
+    for wallet in population:
+        coins = list(wallet["coins"])
+        unused = [coin for coin in eligible if coin not in coins]
+        rng.shuffle(unused)
+        coins = [coin if coin in eligible_coins else unused.pop() for coin in coins]
+        repaired.append({"coins": coins, "weights": list(wallet["weights"])})
+    return repaired
+
+
+def run_segment(windows, step, params):
+    """
+    Optimize consecutive windows one after the other.
+
+    Every window after the first warm-starts from the final population of the
+    previous one when `params["warm_start"]` is set; coins that are no longer
+    eligible are swapped out first (see `repair_population`).
+
+    Args:
+        windows (list): The (start, end) row positions of each window.
+        step (int): Number of out-of-sample days after each window.
+        params (dict): Parameters of the run (see `walk_forward`).
+
+    Returns:
+        list: One result dictionary per optimized window.
+    """
+    panel = get_returns_panel()
+    values = panel.to_numpy(dtype=np.float64)
+    names = list(panel.columns)
+    ids = {name: i for i, name in enumerate(names)}
+
+    results = []
+    population = None
+    for (start, end), statistics in zip(
+        windows, window_statistics(values, names, windows)
+    ):
+        eligible = [
+            name
+            for name, days in zip(names, np.diag(statistics["count"]))
+            if days >= params["min_days"]
+        ]
+        if len(eligible) < params["coins_qtd"]:
+            population = None
+            continue
+
+        snapshot = None
+        for snapshot in evolve(
+            params["good_sharpe_ratio"],
+            params["risk_free_rate"],
+            params["population_size"],
+            params["coins_qtd"],
+            params["generations"],
+            params["has_elitism_and_tournament"],
+            initial_population=(
+                repair_population(population, eligible)
+                if population is not None and params["warm_start"]
+                else None
+            ),
+            statistics=subset_statistics(statistics, eligible),
+        ):
+            pass
+        population = snapshot.population
+
+        best_wallet = {
+            "coins": list(snapshot.best_wallet["coins"]),
+            "weights": list(snapshot.best_wallet["weights"]),
+            "fitness": float(snapshot.best_wallet["fitness"]),
+        }
+        test = portfolio_returns(best_wallet, values[end : end + step], ids)
+        results.append(
+            {
+                "start": str(panel.index[start].date()),
+                "end": str(panel.index[end - 1].date()),
+                "test_end": str(panel.index[min(end + step, len(panel)) - 1].date()),
+                "best_wallet": best_wallet,
+                "in_sample_sharpe": best_wallet["fitness"],
+                "out_of_sample_returns": test.tolist(),
+                "out_of_sample_sharpe": sharpe_ratio(test, params["risk_free_rate"]),
+            }
+        )
+    return results
+
+
+def walk_forward(
+    window=180,
+    step=7,
+    population_size=20,
+    coins_qtd=5,
+    generations=200,
+    risk_free_rate=0.04,
+    has_elitism_and_tournament="elitism_and_tournament",
+    good_sharpe_ratio=float("inf"),
+    min_days=None,
+    warm_start=True,
+    chains=None,
+):
+    """
+    Re-optimize the wallet on a rolling window and measure it out of sample.
+
+    The windows are split into `chains` contiguous segments that run in
+    parallel worker processes sharing the returns panel. Inside a segment
+    the window statistics are updated incrementally and each window
+    warm-starts from the previous one, so only the first window of a segment
+    starts from a random population.
+
+    Args:
+        window (int): Number of days in each training window.
+        step (int): Days between windows, also the out-of-sample period.
+        population_size (int): Size of the population.
+        coins_qtd (int): Number of coins in each wallet.
+        generations (int): Generations of the GA in each window.
+        risk_free_rate (float): Annualized risk-free rate as a decimal.
+        has_elitism_and_tournament (str): Selection mode used by
+                                          `select_parents`.
+        good_sharpe_ratio (float): Fitness threshold that ends a window early.
+        min_days (int, optional): Days a coin needs in a window to be
+                                  eligible. Defaults to half the window.
+        warm_start (bool): Start each window from the previous population.
+        chains (int, optional): Number of parallel segments. Defaults to the
+                                number of CPUs; 1 runs in this process.
+
+    Returns:
+        dict: The "windows" results and the "out_of_sample_sharpe" of all
+              out-of-sample days together.
+    """
+    panel = get_returns_panel()
+    windows = rolling_windows(len(panel), window, step)
+    chains = max(1, min(chains or os.cpu_count() or 1, len(windows)))
+    params = {
+        "population_size": population_size,
+        "coins_qtd": coins_qtd,
+        "generations": generations,
+        "risk_free_rate": risk_free_rate,
+        "has_elitism_and_tournament": has_elitism_and_tournament,
+        "good_sharpe_ratio": good_sharpe_ratio,
+        "min_days": window // 2 if min_days is None else min_days,
+        "warm_start": warm_start,
+    }
+
+    bounds = np.linspace(0, len(windows), chains + 1).astype(int)
+    segments = [windows[a:b] for a, b in zip(bounds[:-1], bounds[1:])]
+
+    if chains == 1:
+        results = run_segment(segments[0], step, params)
+    else:
+        block, spec = share_returns_panel()
+        try:
+            with ProcessPoolExecutor(
+                max_workers=chains, initializer=init_worker, initargs=(spec,)
+            ) as executor:
+                results = [
+                    result
+                    for segment_results in executor.map(
+                        run_segment,
+                        segments,
+                        [step] * chains,
+                        [params] * chains,
+                    )
+                    for result in segment_results
+                ]
+        finally:
+            block.close()
+            block.unlink()
+
+    out_of_sample = np.concatenate(
+        [np.asarray(result["out_of_sample_returns"]) for result in results]
+        or [np.empty(0)]
+    )
+    return {
+        "windows": results,
+        "out_of_sample_sharpe": sharpe_ratio(out_of_sample, risk_free_rate),
+    }
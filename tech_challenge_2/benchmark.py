@@ -0,0 +1,431 @@
+import sys
+import os
+import io
+import json
+import time
+import random
+import platform
+import argparse
+import subprocess
+import statistics as stats
+from contextlib import redirect_stdout
+import numpy as np
+import pandas as pd
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from coins import (
+    get_returns,
+    get_returns_panel,
+    set_returns_panel,
+    invalidate_statistics,
+    get_panel_coins,
+    get_statistics,
+    get_coin_ids,
+    calculate_portfolio_sharpe,
+)
+from ag import (
+    fitness_cache,
+    generate_population,
+    calculate_fitness,
+    crossover,
+    mutate,
+    generate_population_arrays,
+    crossover_batch,
+    mutate_batch,
+)
+
+
+def synthetic_returns_panel(num_coins, num_days, seed=0):
+    """
+    Generate a returns panel of random coins for large-universe benchmarks.
+
+    Returns follow a one-factor model, so the coins are correlated like real
+    crypto assets and the covariance matrix is well conditioned.
+
+    Args:
+        num_coins (int): Number of coins in the panel.
+        num_days (int): Number of daily returns per coin.
+        seed (int): Seed of the random generator.
+
+    Returns:
+        pd.DataFrame: A date-indexed DataFrame of daily returns.
+    """
+    rng = np.random.default_rng(seed)
+    market = rng.normal(0.001, 0.03, size=(num_days, 1))
+    beta = rng.uniform(0.5, 1.5, size=num_coins)
+    noise = rng.normal(0.0, 0.04, size=(num_days, num_coins))
+    drift = rng.normal(0.0005, 0.001, size=num_coins)
+    values = market * beta + noise + drift
+    dates = pd.date_range("2022-11-19", periods=num_days, freq="D", name="Data")
+    names = [f"SYN{i:05d}" for i in range(num_coins)]
+    return pd.DataFrame(values, index=dates, columns=names)
+
+
+def time_call(func, repeats, setup=None):
+    """
+    Time a function call several times.
+
+    Args:
+        func (callable): The function to time, called without arguments.
+        repeats (int): Number of timed calls.
+        setup (callable, optional): Called before each call, outside the timing.
+
+    Returns:
+        dict: The "min", "median" and "mean" duration in seconds and the
+              number of "repeats".
+    """
+    durations = []
+    for _ in range(repeats):
+        if setup is not None:
+            setup()
+        start = time.perf_counter()
+        func()
+        durations.append(time.perf_counter() - start)
+    return {
+        "repeats": repeats,
+        "min": min(durations),
+        "median": stats.median(durations),
+        "mean": stats.fmean(durations),
+    }
+
+
+def seed_all(seed):
+    """
+    Seed the random generators used by the genetic algorithm.
+
+    Args:
+        seed (int): The seed.
+    """
+    random.seed(seed)
+    np.random.seed(seed)
+
+
+def bench_get_returns(coins_qtd, repeats, synthetic):
+    """
+    Time `get_returns` with a warm panel and, for real data, a cold one.
+    """
+    results = []
+    coins = get_panel_coins()[:coins_qtd]
+    if not synthetic:
+        results.append(
+            (
+                "get_returns_cold",
+                {"coins_qtd": coins_qtd},
+                time_call(lambda: get_returns(coins), repeats, invalidate_statistics),
+            )
+        )
+    results.append(
+        (
+            "get_returns",
+            {"coins_qtd": coins_qtd},
+            time_call(lambda: get_returns(coins), repeats),
+        )
+    )
+    return results
+
+
+def bench_sharpe(coins_qtd, repeats, risk_free_rate):
+    """
+    Time `calculate_portfolio_sharpe` on a single wallet.
+    """
+    wallet = generate_population(coins_qtd, 1)[0]
+    mean_returns = get_statistics()["mean"][get_coin_ids(wallet["coins"])]
+    return [
+        (
+            "calculate_portfolio_sharpe",
+            {"coins_qtd": coins_qtd},
+            time_call(
+                lambda: calculate_portfolio_sharpe(
+                    wallet, mean_returns, risk_free_rate
+                ),
+                repeats,
+            ),
+        )
+    ]
+
+
+def bench_population(coins_qtd, population_size, repeats, risk_free_rate):
+    """
+    Time population generation, scoring and the crossover/mutation operators.
+    """
+    params = {"coins_qtd": coins_qtd, "population_size": population_size}
+    population = generate_population(coins_qtd, population_size)
+    parents = [random.sample(population, 2) for _ in range(population_size)]
+
+    def crossover_and_mutate():
+        for parent1, parent2 in parents:
+            mutate(crossover(parent1, parent2))
+
+    rng = np.random.default_rng(0)
+    arrays = generate_population_arrays(coins_qtd, population_size, rng=rng)
+    parents1 = rng.integers(population_size, size=population_size)
+    parents2 = rng.integers(population_size, size=population_size)
+
+    return [
+        (
+            "generate_population",
+            params,
+            time_call(lambda: generate_population(coins_qtd, population_size), repeats),
+        ),
+        (
+            "calculate_fitness",
+            params,
+            time_call(lambda: calculate_fitness(population, risk_free_rate), repeats),
+        ),
+        (
+            "calculate_fitness_cache_cold",
+            params,
+            time_call(
+                lambda: calculate_fitness(population, risk_free_rate, use_cache=True),
+                repeats,
+                fitness_cache.clear,
+            ),
+        ),
+        (
+            "calculate_fitness_cached",
+            params,
+            time_call(
+                lambda: calculate_fitness(population, risk_free_rate, use_cache=True),
+                repeats,
+            ),
+        ),
+        (
+            "crossover_mutate",
+            params,
+            time_call(crossover_and_mutate, repeats),
+        ),
+        (
+            "crossover_mutate_batch",
+            params,
+            time_call(
+                lambda: mutate_batch(
+                    crossover_batch(arrays, parents1, parents2, rng), rng
+                ),
+                repeats,
+            ),
+        ),
+    ]
+
+
+def bench_run_app(
+    coins_qtd, population_size, generations, repeats, risk_free_rate, seed=None
+):
+    """
+    Time full `run_app(debug=True)` runs that never reach the threshold.
+    """
+    from app import run_app
+
+    def run():
+        with redirect_stdout(io.StringIO()):
+            run_app(
+                good_sharpe_ratio=float("inf"),
+                risk_free_rate=risk_free_rate,
+                population_size=population_size,
+                coins_qtd=coins_qtd,
+                max_generations=generations,
+                debug=True,
+                seed=seed,
+            )
+
+    result = time_call(run, repeats, fitness_cache.clear)
+    result["generations_per_second"] = generations / result["median"]
+    return [
+        (
+            "run_app",
+            {
+                "coins_qtd": coins_qtd,
+                "population_size": population_size,
+                "max_generations": generations,
+            },
+            result,
+        )
+    ]
+
+
+def git_commit():
+    """
+    Get the current git commit of the repository, if any.
+
+    Returns:
+        str or None: The commit hash.
+    """
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "HEAD"],
+            capture_output=True,
+            text=True,
+            check=True,
+            cwd=os.path.dirname(os.path.abspath(__file__)),
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run_benchmarks(
+    population_sizes=(20, 200, 2000),
+    coins_quantities=(3, 5, 8),
+    generations=20,
+    repeats=5,
+    risk_free_rate=0.04,
+    seed=42,
+    synthetic_coins=None,
+    synthetic_days=730,
+    only=None,
+):
+    """
+    Time the hot paths of the genetic algorithm.
+
+    Args:
+        population_sizes (tuple): Population sizes to benchmark.
+        coins_quantities (tuple): Numbers of coins per wallet to benchmark.
+        generations (int): Generations of each `run_app` run.
+        repeats (int): Timed calls per benchmark.
+        risk_free_rate (float): Annualized risk-free rate as a decimal.
+        seed (int): Seed applied before every benchmark.
+        synthetic_coins (int, optional): Benchmark a synthetic universe of
+                                         this many coins instead of the CSVs.
+        synthetic_days (int): Number of days of the synthetic universe.
+        only (list, optional): Names of the benchmark groups to run, among
+                               "get_returns", "sharpe", "population" and
+                               "run_app".
+
+    Returns:
+        dict: The "meta" data of the run and the list of "results".
+    """
+    synthetic = synthetic_coins is not None
+    if synthetic:
+        set_returns_panel(
+            synthetic_returns_panel(synthetic_coins, synthetic_days, seed)
+        )
+    else:
+        invalidate_statistics()
+    groups = set(only or ["get_returns", "sharpe", "population", "run_app"])
+
+    results = []
+    for coins_qtd in coins_quantities:
+        seed_all(seed)
+        if "get_returns" in groups:
+            results += bench_get_returns(coins_qtd, repeats, synthetic)
+        seed_all(seed)
+        if "sharpe" in groups:
+            results += bench_sharpe(coins_qtd, repeats, risk_free_rate)
+        for population_size in population_sizes:
+            seed_all(seed)
+            if "population" in groups:
+                results += bench_population(
+                    coins_qtd, population_size, repeats, risk_free_rate
+                )
+            seed_all(seed)
+            if "run_app" in groups:
+                results += bench_run_app(
+                    coins_qtd,
+                    population_size,
+                    generations,
+                    repeats,
+                    risk_free_rate,
+                    seed,
+                )
+
+    panel = get_returns_panel()
+    return {
+        "meta": {
+            "commit": git_commit(),
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "python": platform.python_version(),
+            "numpy": np.__version__,
+            "pandas": pd.__version__,
+            "machine": platform.machine(),
+            "cpus": os.cpu_count(),
+            "seed": seed,
+            "synthetic": synthetic,
+            "universe": {"coins": panel.shape[1], "days": panel.shape[0]},
+        },
+        "results": [
+            {"name": name, "params": params, **timing}
+            for name, params, timing in results
+        ],
+    }
+
+
+def compare_results(current, baseline):
+    """
+    Compare the median timings of two benchmark runs.
+
+    Args:
+        current (dict): The results of `run_benchmarks`.
+        baseline (dict): Results of a previous run, loaded from JSON.
+
+    Returns:
+        list: One line per benchmark present in both runs with the speedup
+              of `current` over `baseline`.
+    """
+
+    def key(result):
+        return result["name"], json.dumps(result["params"], sort_keys=True)
+
+    previous = {key(result): result for result in baseline["results"]}
+    lines = []
+    for result in current["results"]:
+        old = previous.get(key(result))
+        if old is None:
+            continue
+        speedup = old["median"] / result["median"] if result["median"] else 0.0
+        lines.append(
+            f"{result['name']} {result['params']}: "
+            f"{old['median'] * 1000:.3f} ms -> {result['median'] * 1000:.3f} ms "
+            f"({speedup:.2f}x)"
+        )
+    return lines
+
+
+def parse_list(value):
+    return tuple(int(v) for v in value.split(","))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the genetic algorithm.")
+    parser.add_argument("--population-sizes", type=parse_list, default=(20, 200, 2000))
+    parser.add_argument("--coins", type=parse_list, default=(3, 5, 8))
+    parser.add_argument("--generations", type=int, default=20)
+    parser.add_argument("--repeats", type=int, default=5)
+    parser.add_argument("--risk-free-rate", type=float, default=0.04)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--synthetic-coins", type=int)
+    parser.add_argument("--synthetic-days", type=int, default=730)
+    parser.add_argument(
+        "--only",
+        type=lambda value: value.split(","),
+        help="Comma separated groups: get_returns,sharpe,population,run_app",
+    )
+    parser.add_argument("--output", default="benchmark.json")
+    parser.add_argument("--compare", help="JSON file of a previous run.")
+    args = parser.parse_args()
+
+    report = run_benchmarks(
+        population_sizes=args.population_sizes,
+        coins_quantities=args.coins,
+        generations=args.generations,
+        repeats=args.repeats,
+        risk_free_rate=args.risk_free_rate,
+        seed=args.seed,
+        synthetic_coins=args.synthetic_coins,
+        synthetic_days=args.synthetic_days,
+        only=args.only,
+    )
+
+    with open(args.output, "w") as file:
+        json.dump(report, file, indent=2)
+
+    for result in report["results"]:
+        print(
+            f"{result['name']} {result['params']}: "
+            f"median {result['median'] * 1000:.3f} ms"
+        )
+
+    if args.compare:
+        with open(args.compare) as file:
+            baseline = json.load(file)
+        print("\nComparison with", args.compare)
+        for line in compare_results(report, baseline):
+            print(line)
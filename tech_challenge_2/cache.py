@@ -0,0 +1,204 @@
+import os
+import re
+import json
+import shutil
+import hashlib
+import tempfile
+import numpy as np
+
+meta_suffix = ".meta.json"
+
+
+def file_signature(path):
+    """
+    Get the modification time and size of a file.
+
+    Args:
+        path (str): Path of the file.
+
+    Returns:
+        dict: The "mtime_ns" and "size" of the file.
+    """
+    stat = os.stat(path)
+    return {"mtime_ns": stat.st_mtime_ns, "size": stat.st_size}
+
+
+def file_hash(path):
+    """
+    Calculate the SHA-1 digest of a file's content.
+
+    Args:
+        path (str): Path of the file.
+
+    Returns:
+        str: The hexadecimal digest.
+    """
+    digest = hashlib.sha1()
+    with open(path, "rb") as file:
+        for chunk in iter(lambda: file.read(1 << 20), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def entry_name(source_path):
+    """
+    Get the name of the cache entry of a source file.
+
+    Args:
+        source_path (str): Path of the source file.
+
+    Returns:
+        str: The file name without its directory and extension.
+    """
+    return os.path.splitext(os.path.basename(source_path))[0]
+
+
+def read_meta(cache_dir, name):
+    """
+    Read the metadata of a cache entry.
+
+    Args:
+        cache_dir (str): Directory holding the cache entries.
+        name (str): Name of the cache entry.
+
+    Returns:
+        dict or None: The metadata, or None if the entry does not exist.
+    """
+    try:
+        with open(os.path.join(cache_dir, f"{name}{meta_suffix}")) as file:
+            return json.load(file)
+    except (OSError, ValueError):
+        return None
+
+
+def write_meta(cache_dir, name, meta):
+    """
+    Replace the metadata of a cache entry atomically.
+
+    Args:
+        cache_dir (str): Directory holding the cache entries.
+        name (str): Name of the cache entry.
+        meta (dict): The metadata to write.
+    """
+    fd, tmp_path = tempfile.mkstemp(dir=cache_dir, prefix=f".{name}", suffix=".tmp")
+    with os.fdopen(fd, "w") as file:
+        json.dump(meta, file)
+    os.replace(tmp_path, os.path.join(cache_dir, f"{name}{meta_suffix}"))
+
+
+def write_entry(cache_dir, name, arrays, meta):
+    """
+    Write the arrays of a cache entry as `.npy` files.
+
+    The arrays go to a directory named after the content digest and version
+    of the entry, which is filled under a temporary name and renamed into
+    place once complete; the metadata pointing to it is then replaced
+    atomically. Readers therefore see either the previous entry or the new
+    one, never a missing or half-written one, and two processes writing the
+    same entry at once both end with a complete copy.
+
+    Args:
+        cache_dir (str): Directory holding the cache entries.
+        name (str): Name of the cache entry.
+        arrays (dict): Mapping of array name to np.ndarray.
+        meta (dict): Metadata describing the source file, with its "sha1"
+                     and "version".
+
+    Returns:
+        dict: The metadata written, with the "directory" of the arrays.
+    """
+    os.makedirs(cache_dir, exist_ok=True)
+    directory = f"{name}.{meta['sha1'][:16]}.v{meta['version']}"
+    entry_dir = os.path.join(cache_dir, directory)
+
+    tmp_dir = tempfile.mkdtemp(dir=cache_dir, prefix=f".{name}")
+    for array_name, array in arrays.items():
+        np.save(os.path.join(tmp_dir, f"{array_name}.npy"), np.ascontiguousarray(array))
+    try:
+        os.replace(tmp_dir, entry_dir)
+    except OSError:
+        # another writer already put the same content in place
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+
+    meta = {**meta, "directory": directory, "arrays": list(arrays)}
+    write_meta(cache_dir, name, meta)
+
+    # drop the entries the metadata no longer points to
+    stale = re.compile(rf"{re.escape(name)}\.[0-9a-f]{{16}}\.v")
+    for other in os.listdir(cache_dir):
+        if other != directory and stale.match(other):
+            shutil.rmtree(os.path.join(cache_dir, other), ignore_errors=True)
+    return meta
+
+
+def load_entry(cache_dir, meta):
+    """
+    Load the arrays of a cache entry as read-only memory maps.
+
+    Args:
+        cache_dir (str): Directory holding the cache entries.
+        meta (dict): Metadata of the entry (see `write_entry`).
+
+    Returns:
+        dict: Mapping of array name to a memory-mapped np.ndarray.
+
+    Raises:
+        OSError: If an array of the entry is missing.
+    """
+    entry_dir = os.path.join(cache_dir, meta["directory"])
+    return {
+        name: np.load(os.path.join(entry_dir, f"{name}.npy"), mmap_mode="r")
+        for name in meta["arrays"]
+    }
+
+
+def load_cached_arrays(source_path, build_arrays, cache_dir, version=None):
+    """
+    Load the binary form of a source file, rebuilding it only when stale.
+
+    The entry is reused while the source file keeps its modification time and
+    size. When those change, the content hash decides whether the arrays must
+    really be rebuilt with `build_arrays` or only the metadata refreshed.
+    Entries written with another `version`, or whose arrays are missing,
+    are always rebuilt.
+
+    Args:
+        source_path (str): Path of the source file.
+        build_arrays (callable): Function receiving `source_path` and
+                                 returning a dict of np.ndarray.
+        cache_dir (str): Directory holding the cache entries.
+        version (int, optional): Version of the arrays built by
+                                 `build_arrays`; bump it when they change.
+
+    Returns:
+        dict: Mapping of array name to a memory-mapped np.ndarray.
+    """
+    name = entry_name(source_path)
+    signature = file_signature(source_path)
+    meta = read_meta(cache_dir, name)
+    if meta is not None and (meta.get("version") != version or "directory" not in meta):
+        meta = None
+
+    digest = None
+    if meta is not None:
+        fresh = all(meta.get(k) == v for k, v in signature.items())
+        if not fresh:
+            digest = file_hash(source_path)
+            if meta.get("sha1") == digest:
+                meta = {**meta, **signature}
+                write_meta(cache_dir, name, meta)
+                fresh = True
+        if fresh:
+            try:
+                return load_entry(cache_dir, meta)
+            except OSError:
+                pass
+
+    arrays = build_arrays(source_path)
+    meta = write_entry(
+        cache_dir,
+        name,
+        arrays,
+        {**signature, "sha1": digest or file_hash(source_path), "version": version},
+    )
+    return load_entry(cache_dir, meta)
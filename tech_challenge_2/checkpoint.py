@@ -0,0 +1,48 @@
+import os
+import pickle
+
+checkpoint_version = 3
+
+
+def save_checkpoint(path, state):
+    """
+    Write the state of a run to a checkpoint file.
+
+    The file is written next to its destination and then moved into place,
+    so a crash while saving leaves the previous checkpoint intact.
+
+    Args:
+        path (str): Path of the checkpoint file.
+        state (dict): The state of the run (see `engine.evolve`).
+    """
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "wb") as file:
+        pickle.dump(
+            {"version": checkpoint_version, **state},
+            file,
+            protocol=pickle.HIGHEST_PROTOCOL,
+        )
+    os.replace(tmp_path, path)
+
+
+def load_checkpoint(path):
+    """
+    Read the state of a run from a checkpoint file.
+
+    Args:
+        path (str): Path of the checkpoint file.
+
+    Returns:
+        dict or None: The state of the run, or None if the file does not
+                      exist.
+
+    Raises:
+        ValueError: If the file was written by another checkpoint version.
+    """
+    if not os.path.exists(path):
+        return None
+    with open(path, "rb") as file:
+        state = pickle.load(file)
+    if state.get("version") != checkpoint_version:
+        raise ValueError(f"Unsupported checkpoint version in {path}.")
+    return state
@@ -1,58 +1,260 @@
 import os
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from multiprocessing import shared_memory
 import pandas as pd
 import numpy as np
 
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from cache import load_cached_arrays
+from investing import read_investing_csv, append_investing_rows
+
 path_name = "quotations"
-coins = []
+cache_dir = ".cache"
+# version of the arrays written by `build_quotation_arrays`
+cache_version = 2
+# floating-point type of the N x N statistics; None stores them as float32
+# from `large_universe` coins on, which halves their memory
+statistics_dtype = None
+large_universe = 1000
+_universe = None
+_returns_panel = None
+_statistics = None
+# shared memory block behind the returns panel of a worker process
+_shared_block = None
+
+
+def get_universe():
+    """
+    Get the registry of coins found in the `path_name` directory.
+
+    The directory is listed once per process; the position of each coin in
+    the sorted registry is its integer id in the returns panel and in the
+    statistics index, so ids do not change until `invalidate_statistics`.
+
+    Returns:
+        tuple: Coin names ordered by id.
+    """
+    global _universe
+    if _universe is None:
+        _universe = tuple(
+            sorted(
+                file.split(".")[0]
+                for file in os.listdir(path_name)
+                if file.endswith(".csv")
+            )
+        )
+    return _universe
 
 
 def get_coins():
     """
     Get a list of coin names from the CSV files in the specified directory.
 
-    This function iterates through all files in the `path_name` directory,
-    identifies files with a `.csv` extension, and extracts the coin name from the
-    file name (excluding the extension).
+    Returns:
+        list: A list of coin names derived from the CSV file names, ordered by
+              id (see `get_universe`).
+    """
+    return list(get_universe())
+
+
+def build_quotation_arrays(csv_path):
+    """
+    Convert a quotation CSV into the arrays stored in the binary cache.
+
+    Args:
+        csv_path (str): Path of the CSV file.
+
+    Returns:
+        dict: The "dates" (datetime64[D]), "open", "high", "low", "close",
+              "volume", "change" and "returns" arrays, sorted by date.
+    """
+    df = read_investing_csv(csv_path)
+    arrays = {"dates": df["date"].to_numpy().astype("datetime64[D]")}
+    for name in ("open", "high", "low", "close", "volume", "change"):
+        arrays[name] = df[name].to_numpy(dtype=np.float64)
+    arrays["returns"] = df["close"].pct_change().to_numpy(dtype=np.float64)
+    return arrays
+
+
+def read_quotation(coin):
+    """
+    Read the daily history of a coin.
+
+    The CSV is only parsed when its binary cache entry in `cache_dir` is
+    missing or stale; otherwise the arrays are memory-mapped without copying.
+
+    Args:
+        coin (str): The coin name.
+
+    Returns:
+        dict: The arrays of the coin (see `build_quotation_arrays`).
+    """
+    return load_cached_arrays(
+        f"{path_name}/{coin}.csv",
+        build_quotation_arrays,
+        os.path.join(path_name, cache_dir),
+        cache_version,
+    )
+
+
+def read_quotations(coins, max_workers=None):
+    """
+    Read the daily histories of many coins concurrently.
+
+    The files are parsed (or their cache entries mapped) by a thread pool;
+    the CSV reader of pandas releases the GIL while parsing.
+
+    Args:
+        coins (list): The coin names.
+        max_workers (int, optional): Number of threads. Defaults to the
+                                     `ThreadPoolExecutor` default.
+
+    Returns:
+        list: The arrays of each coin, in the order of `coins`.
+    """
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        return list(executor.map(read_quotation, coins))
+
+
+def load_returns_panel():
+    """
+    Build the returns panel for every coin in the universe.
+
+    The memory-mapped dates of all coins are merged first and the panel is
+    allocated once; each coin is then written into its column, so no
+    intermediate frame per coin is built. Coins with
+    shorter histories get NaN on the days they were not traded.
+
+    Returns:
+        pd.DataFrame: A DataFrame indexed by date with one column of daily
+                      returns per coin, in the order of `get_universe`.
+    """
+    names = get_universe()
+    quotations = read_quotations(names)
+    dates = np.unique(
+        np.concatenate(
+            [quotation["dates"] for quotation in quotations]
+            or [np.empty(0, dtype="datetime64[D]")]
+        )
+    )
+
+    values = np.full((len(dates), len(names)), np.nan)
+    for i, quotation in enumerate(quotations):
+        values[np.searchsorted(dates, quotation["dates"]), i] = quotation["returns"]
+
+    return pd.DataFrame(
+        values,
+        index=pd.DatetimeIndex(dates.astype("datetime64[ns]"), name="Data"),
+        columns=list(names),
+        copy=False,
+    )
+
+
+def get_returns_panel():
+    """
+    Get the process-wide returns panel, building it on first use.
+
+    Returns:
+        pd.DataFrame: The shared date-indexed returns panel of all coins.
+    """
+    global _returns_panel
+    if _returns_panel is None:
+        _returns_panel = load_returns_panel()
+    return _returns_panel
+
+
+def set_returns_panel(panel):
+    """
+    Replace the process-wide returns panel and drop the statistics built on it.
+
+    Args:
+        panel (pd.DataFrame): A date-indexed DataFrame of daily returns.
+    """
+    global _returns_panel
+    invalidate_statistics()
+    _returns_panel = panel
+
+
+def share_returns_panel():
+    """
+    Copy the returns panel into a shared memory block for worker processes.
+
+    The caller owns the returned block and must `close` and `unlink` it once
+    the workers are done.
+
+    Returns:
+        tuple: The `SharedMemory` block and a picklable spec to pass to
+               `attach_returns_panel`.
+    """
+    panel = get_returns_panel()
+    values = np.ascontiguousarray(panel.to_numpy(dtype=np.float64))
+    block = shared_memory.SharedMemory(create=True, size=max(values.nbytes, 1))
+    np.ndarray(values.shape, dtype=np.float64, buffer=block.buf)[:] = values
+    spec = {
+        "name": block.name,
+        "shape": values.shape,
+        "dates": panel.index.to_numpy(),
+        "coins": list(panel.columns),
+    }
+    return block, spec
+
+
+def attach_returns_panel(spec):
+    """
+    Use a returns panel shared by `share_returns_panel` without copying it.
+
+    Args:
+        spec (dict): The spec returned by `share_returns_panel`.
 
     Returns:
-        list: A list of coin names derived from the CSV file names.
+        SharedMemory: The attached block, which must be kept alive while the
+                      panel is in use.
     """
-    for file in os.listdir(path_name):
-        if file.endswith(".csv"):
-            coins.append(file.split(".")[0])
-    return coins
+    block = shared_memory.SharedMemory(name=spec["name"])
+    values = np.ndarray(spec["shape"], dtype=np.float64, buffer=block.buf)
+    panel = pd.DataFrame(
+        values,
+        index=pd.DatetimeIndex(spec["dates"], name="Data"),
+        columns=spec["coins"],
+        copy=False,
+    )
+    set_returns_panel(panel)
+    return block
 
 
-def clean_and_calculate_returns(df):
+def init_worker(spec):
     """
-    Clean a DataFrame and calculate daily returns.
+    Prepare a worker process to use the returns panel of its parent.
 
-    This function:
-    - Converts the "Data" column to a datetime object.
-    - Cleans and converts the "Último" column from a string to a float.
-    - Sorts the DataFrame by the "Data" column.
-    - Calculates the daily percentage change in the "Último" column and stores it in a new column "Retorno".
+    Pass it as the `initializer` of a process pool; the attached block is
+    kept alive for the lifetime of the worker.
 
     Args:
-        df (pd.DataFrame): A DataFrame containing columns "Data" and "Último".
+        spec (dict): The spec returned by `share_returns_panel`.
+    """
+    global _shared_block
+    _shared_block = attach_returns_panel(spec)
+
+
+def get_panel_coins():
+    """
+    Get the coins of the returns panel without building the statistics index.
 
     Returns:
-        pd.DataFrame: A cleaned and processed DataFrame with an additional "Retorno" column.
+        list: Coin names ordered by id, as in the statistics index.
     """
-    df["Data"] = pd.to_datetime(df["Data"], format="%d.%m.%Y")
-    df["Último"] = df["Último"].str.replace(".", "").str.replace(",", ".").astype(float)
-    df = df.sort_values(by="Data").reset_index(drop=True)
-    df["Retorno"] = df["Último"].pct_change()
-    return df
+    return list(get_returns_panel().columns)
 
 
 def get_returns(coins):
     """
     Get a DataFrame of returns for a list of coins.
 
-    This function reads CSV files for the specified coins, processes the data
-    using `clean_and_calculate_returns`, and combines the "Retorno" columns
-    from all coins into a single DataFrame.
+    This function slices the columns of the shared returns panel, so no CSV
+    is read after the panel has been built. Only the dates on which every
+    requested coin has a return are kept.
 
     Args:
         coins (list): A list of coin names whose data will be processed.
@@ -61,27 +263,462 @@ def get_returns(coins):
         pd.DataFrame: A DataFrame containing daily returns for each coin, with
                       coins as columns and dates as rows.
     """
-    dataFrames = {
-        name: pd.read_csv(f"{path_name}/{coin}.csv") for name, coin in zip(coins, coins)
+    return get_returns_panel()[list(coins)].dropna()
+
+
+def build_statistics(returns_df, dtype=None, block_size=512):
+    """
+    Compute the mean-return vector and the full covariance matrix of a panel.
+
+    Coins are mapped to integer ids following the column order of the panel.
+    Means use every available day of each coin and covariances use the days
+    on which both coins of each pair have a return. The pairwise moments are
+    kept, so `update_statistics` can add new days without the history.
+
+    The moments are computed with matrix products over blocks of
+    `block_size` coins, so the memory used besides the N x N results is
+    bounded by the panel and one block. With thousands of coins, a
+    `np.float32` dtype halves the size of the stored matrices.
+
+    Args:
+        returns_df (pd.DataFrame): A date-indexed DataFrame of daily returns.
+        dtype (np.dtype, optional): Floating-point type of the stored
+                                    matrices. Defaults to `np.float32` from
+                                    `large_universe` coins on and to
+                                    `np.float64` below.
+        block_size (int): Number of coins whose rows are computed together.
+
+    Returns:
+        dict: A dictionary containing:
+              - "coins" (list): Coin names ordered by id.
+              - "ids" (dict): Mapping of coin name to integer id.
+              - "mean" (np.ndarray): Mean daily return of each coin.
+              - "cov" (np.ndarray): N x N covariance matrix of daily returns.
+              - "count" (np.ndarray): N x N number of days both coins traded,
+                as `np.int32`.
+              - "pair_mean" (np.ndarray): N x N mean return of coin i over the
+                days both coins i and j traded.
+              - "comoment" (np.ndarray): N x N sum of the products of the
+                deviations from `pair_mean`.
+              - "version" (int): Number of in-place changes of the index, so
+                the values computed from it can be invalidated.
+    """
+    values = returns_df.to_numpy(dtype=np.float64)
+    mask = ~np.isnan(values)
+    weights = mask.astype(np.float64)
+    # covariances do not change with a shift; centering each coin keeps the
+    # sums of products small and avoids cancellation
+    days = weights.sum(axis=0)
+    shift = np.where(mask, values, 0.0).sum(axis=0) / np.maximum(days, 1)
+    values = np.where(mask, values - shift, 0.0)
+
+    num_coins = values.shape[1]
+    if dtype is None:
+        dtype = np.float32 if num_coins >= large_universe else np.float64
+    count = np.empty((num_coins, num_coins), dtype=np.int32)
+    pair_mean = np.empty((num_coins, num_coins), dtype=dtype)
+    comoment = np.empty((num_coins, num_coins), dtype=dtype)
+    for start in range(0, num_coins, block_size):
+        rows = slice(start, start + block_size)
+        block_count = weights[:, rows].T @ weights
+        with np.errstate(invalid="ignore", divide="ignore"):
+            # mean of coin i and of coin j over the days both traded
+            mean_i = np.where(
+                block_count > 0, (values[:, rows].T @ weights) / block_count, 0.0
+            )
+            mean_j = np.where(
+                block_count > 0, (weights[:, rows].T @ values) / block_count, 0.0
+            )
+        count[rows] = block_count
+        pair_mean[rows] = mean_i + shift[rows, None]
+        comoment[rows] = values[:, rows].T @ values - block_count * mean_i * mean_j
+
+    return statistics_from_moments(
+        list(returns_df.columns), count, pair_mean, comoment, block_size
+    )
+
+
+def statistics_from_moments(names, count, pair_mean, comoment, block_size=512):
+    """
+    Build the statistics index from the pairwise moments of the returns.
+
+    The covariance matrix is filled by blocks of `block_size` coins, in the
+    dtype of `comoment`.
+
+    Args:
+        names (list): Coin names ordered by id.
+        count (np.ndarray): N x N number of days both coins traded.
+        pair_mean (np.ndarray): N x N pairwise mean returns.
+        comoment (np.ndarray): N x N pairwise co-moments.
+        block_size (int): Number of coins whose rows are computed together.
+
+    Returns:
+        dict: The statistics index (see `build_statistics`).
+    """
+    statistics = {
+        "coins": names,
+        "ids": {name: i for i, name in enumerate(names)},
+        "mean": None,
+        "cov": np.empty(comoment.shape, dtype=comoment.dtype),
+        "count": count,
+        "pair_mean": pair_mean,
+        "comoment": comoment,
+        "version": 0,
     }
+    for start in range(0, len(names), block_size):
+        rows = slice(start, start + block_size)
+        statistics["cov"][rows] = covariance(count[rows], comoment[rows])
+    refresh_mean(statistics)
+    return statistics
 
-    returns_data = {
-        name: clean_and_calculate_returns(df) for name, df in dataFrames.items()
+
+def covariance(count, comoment):
+    """
+    Compute covariances from pairwise moments, NaN with fewer than two days.
+
+    Args:
+        count (np.ndarray): Number of days of each pair.
+        comoment (np.ndarray): Co-moment of each pair.
+
+    Returns:
+        np.ndarray: The covariances, in the dtype of `comoment`.
+    """
+    with np.errstate(invalid="ignore", divide="ignore"):
+        cov = comoment / (count - 1).astype(comoment.dtype)
+    cov[count <= 1] = np.nan
+    return cov
+
+
+def refresh_mean(statistics):
+    """
+    Recompute the mean-return vector from the pairwise moments.
+
+    Args:
+        statistics (dict): The statistics index, updated in place.
+    """
+    statistics["version"] += 1
+    statistics["mean"] = np.where(
+        np.diag(statistics["count"]) > 0,
+        np.diag(statistics["pair_mean"]),
+        np.nan,
+    )
+
+
+def copy_statistics(statistics):
+    """
+    Copy a statistics index, so it can be updated while the original is read.
+
+    Args:
+        statistics (dict): The statistics index.
+
+    Returns:
+        dict: An index with its own matrices.
+    """
+    return {
+        **statistics,
+        **{
+            name: statistics[name].copy()
+            for name in ("mean", "cov", "count", "pair_mean", "comoment")
+        },
     }
 
-    returns_df = pd.DataFrame(
-        {name: df["Retorno"] for name, df in returns_data.items()}
-    ).dropna()
 
-    return returns_df
+def update_statistics(statistics, rows, known=None, block_size=512):
+    """
+    Add new days of returns to a statistics index with Welford updates.
+
+    The matrices are updated in place by blocks of `block_size` coins, so
+    each row costs O(N^2) time, whatever the length of the history, and
+    O(`block_size` x N) memory besides the index. Its "version" changes, so
+    caches bound to the index are cleared. Update a copy (see
+    `copy_statistics`) when other threads may be reading the index.
+
+    Args:
+        statistics (dict): The statistics index, updated in place.
+        rows (np.ndarray): R x N matrix of new daily returns in the column
+                           order of the index, NaN where a coin did not trade.
+        known (np.ndarray, optional): R x N boolean mask of the returns of
+                                      `rows` already in the index; only the
+                                      pairs with a new return are added.
+        block_size (int): Number of coins whose rows are updated together.
+
+    Returns:
+        dict: The statistics index, including the new days.
+    """
+    rows = np.atleast_2d(np.asarray(rows, dtype=np.float64))
+    if known is None:
+        known = np.zeros(rows.shape, dtype=bool)
+    for row, row_known in zip(rows, np.atleast_2d(known)):
+        apply_row(statistics, row, row_known, 1, block_size)
+    refresh_mean(statistics)
+    return statistics
+
+
+def downdate_statistics(statistics, rows, block_size=512):
+    """
+    Remove days of returns from a statistics index, reversing `update_statistics`.
+
+    Used to slide a window over the panel: the days leaving the window are
+    removed in place at O(N^2) per row, whatever the length of the window.
+
+    Args:
+        statistics (dict): The statistics index, updated in place.
+        rows (np.ndarray): R x N matrix of daily returns previously added,
+                           NaN where a coin did not trade.
+        block_size (int): Number of coins whose rows are updated together.
+
+    Returns:
+        dict: The statistics index, without those days.
+    """
+    rows = np.atleast_2d(np.asarray(rows, dtype=np.float64))
+    for row in rows:
+        apply_row(statistics, row, np.zeros(len(row), dtype=bool), -1, block_size)
+    refresh_mean(statistics)
+    return statistics
+
+
+def apply_row(statistics, row, known, sign, block_size):
+    """
+    Add (`sign` 1) or remove (`sign` -1) one day of returns in place.
+
+    With n the number of days of a pair including the row and d the
+    deviations of the row from the pairwise means including it, adding a
+    day increases the co-moment by (n - 1) / n * d_i * d_j computed with the
+    means before the row, and removing it decreases the co-moment by
+    n / (n - 1) * d_i * d_j. Both only read the means before the change, so
+    the co-moments of every block are updated before the means. Only the
+    pairs of coins present in the row are read or written.
+
+    Args:
+        statistics (dict): The statistics index, updated in place.
+        row (np.ndarray): Daily returns in the column order of the index,
+                          NaN where a coin did not trade.
+        known (np.ndarray): Mask of the returns of `row` whose pairs must be
+                            left unchanged.
+        sign (int): 1 to add the row, -1 to remove it.
+        block_size (int): Number of coins whose rows are updated together.
+    """
+    statistics["version"] += 1
+    count = statistics["count"]
+    pair_mean = statistics["pair_mean"]
+    comoment = statistics["comoment"]
+    ids = np.flatnonzero(~np.isnan(row))
+    x = row[ids].astype(comoment.dtype)
+    known = known[ids]
+    skip_known = known.any()
+    # plain slices avoid copying the blocks when every coin is present
+    every_coin = len(ids) == len(row)
+    columns = slice(None)
+    blocks = [
+        slice(start, start + block_size) for start in range(0, len(ids), block_size)
+    ]
+
+    def locate(rows, cols):
+        if every_coin:
+            return rows, cols
+        return np.ix_(ids[rows], ids[cols])
+
+    def new_pairs(rows):
+        return ~(known[rows, None] & known) if skip_known else True
+
+    for rows in blocks:
+        block, transposed = locate(rows, columns), locate(columns, rows)
+        new = new_pairs(rows)
+        days = count[block] + (new if sign > 0 else 0)
+        n = days.astype(comoment.dtype)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            change = x[rows, None] - pair_mean[block]
+            change *= x - pair_mean[transposed].T
+            change *= (n - 1) / n if sign > 0 else -n / (n - 1)
+        change[~(new & (days > 1))] = 0
+        comoment[block] += change
+
+    for rows in blocks:
+        block = locate(rows, columns)
+        new = new_pairs(rows)
+        days = count[block] + sign * new
+        means = pair_mean[block]
+        with np.errstate(invalid="ignore", divide="ignore"):
+            step = (x[rows, None] - means) / days.astype(means.dtype)
+        if sign > 0:
+            means = np.where(new, means + step, means)
+        else:
+            # the mean without the row; a pair left without days gets 0
+            means = np.where(new, np.where(days > 0, means - step, 0), means)
+            comoment[block] = np.where(new & (days == 0), 0, comoment[block])
+        count[block] = days
+        pair_mean[block] = means
+        statistics["cov"][block] = covariance(days, comoment[block])
+
+
+def get_statistics():
+    """
+    Get the process-wide statistics index, building it on first use.
+
+    Returns:
+        dict: The statistics of the whole coin universe (see `build_statistics`).
+    """
+    global _statistics
+    if _statistics is None:
+        _statistics = build_statistics(get_returns_panel(), statistics_dtype)
+    return _statistics
+
+
+def invalidate_statistics(reload_returns=True):
+    """
+    Drop the cached statistics index so it is rebuilt on next use.
+
+    Call this whenever the data in `path_name` changes.
+
+    Args:
+        reload_returns (bool): Also drop the returns panel so the CSV files
+                               are read again.
+    """
+    global _statistics, _returns_panel, _universe
+    _statistics = None
+    if reload_returns:
+        _universe = None
+        _returns_panel = None
+
+
+def subset_statistics(statistics, coins):
+    """
+    Restrict a statistics index to some of its coins.
+
+    Args:
+        statistics (dict): The statistics index.
+        coins (list): Names of the coins to keep; they get new ids in order.
+
+    Returns:
+        dict: The statistics index of the selected coins.
+    """
+    idx = get_coin_ids(coins, statistics)
+    block = np.ix_(idx, idx)
+    return statistics_from_moments(
+        list(coins),
+        statistics["count"][block],
+        statistics["pair_mean"][block],
+        statistics["comoment"][block],
+    )
+
+
+def append_quotes(quotes):
+    """
+    Append new daily close prices to the quotation files, the returns panel
+    and the statistics index.
+
+    The quotes of each coin must continue its CSV file day by day: the
+    first new return is computed from the last stored close, so a gap would
+    be taken as a single daily return. Every coin is checked before any file
+    is written. The new rows are written to the CSV files, whose cache
+    entries are then rebuilt on the next read, and the statistics are
+    updated with `update_statistics`, so the history of returns is not read
+    again. The update is applied to a copy of the index that then replaces
+    it, so runs reading the previous index in other threads never see it
+    half updated, and the fitness cache is cleared on its next use.
+
+    Args:
+        quotes (dict): Mapping of coin name to a pd.Series of close prices
+                       indexed by date. The dates of each coin must be the
+                       consecutive days after the last date of its CSV file.
+
+    Returns:
+        pd.DataFrame: The rows of the panel that received new returns, NaN
+                      for the coins without a new quote on that day.
+
+    Raises:
+        ValueError: If a coin is unknown or its dates do not follow its CSV
+                    file day by day.
+    """
+    global _returns_panel, _statistics
+    panel = get_returns_panel()
+    statistics = get_statistics()
+
+    new_quotes = {}
+    for coin, closes in quotes.items():
+        if coin not in statistics["ids"]:
+            raise ValueError(f"Unknown coin: {coin}.")
+        closes = pd.Series(closes, dtype=np.float64).sort_index()
+        closes.index = pd.DatetimeIndex(closes.index).normalize()
+        if closes.empty:
+            continue
+
+        quotation = read_quotation(coin)
+        last_date = pd.Timestamp(quotation["dates"][-1])
+        expected = pd.date_range(
+            last_date + pd.Timedelta(days=1), periods=len(closes), freq="D"
+        )
+        if not closes.index.equals(expected):
+            raise ValueError(
+                f"New quotes of {coin} must follow {last_date.date()} day by day."
+            )
+        previous = float(quotation["close"][-1])
+        new_quotes[coin] = (closes, closes / closes.shift(1, fill_value=previous) - 1)
+
+    if not new_quotes:
+        return pd.DataFrame(
+            columns=panel.columns, index=pd.DatetimeIndex([], name="Data")
+        )
+
+    for coin, (closes, returns) in new_quotes.items():
+        append_investing_rows(
+            f"{path_name}/{coin}.csv",
+            pd.DataFrame(
+                {
+                    "date": closes.index,
+                    "open": np.nan,
+                    "high": np.nan,
+                    "low": np.nan,
+                    "close": closes.to_numpy(),
+                    "volume": np.nan,
+                    "change": returns.to_numpy(),
+                }
+            ),
+        )
+
+    new_returns = pd.DataFrame(
+        {coin: returns for coin, (_, returns) in new_quotes.items()},
+        columns=panel.columns,
+        dtype=np.float64,
+    )
+    dates = new_returns.index.sort_values()
+    panel = panel.reindex(
+        pd.DatetimeIndex(panel.index.union(dates).to_numpy(), name="Data")
+    )
+    # returns already in the panel on those days were counted before
+    known = panel.loc[dates].notna().to_numpy()
+    panel.loc[dates] = panel.loc[dates].fillna(new_returns.loc[dates])
+
+    rows = panel.loc[dates]
+    _returns_panel = panel
+    _statistics = update_statistics(
+        copy_statistics(statistics), rows.to_numpy(dtype=np.float64), known
+    )
+    return rows
+
+
+def get_coin_ids(coins, statistics=None):
+    """
+    Map coin names to their integer ids in the statistics index.
+
+    Args:
+        coins (list): A list of coin names.
+        statistics (dict, optional): Statistics index to use. Defaults to the
+                                     process-wide one.
+
+    Returns:
+        np.ndarray: The integer id of each coin.
+    """
+    ids = (statistics or get_statistics())["ids"]
+    return np.array([ids[coin] for coin in coins], dtype=np.intp)
 
 
 def calculate_covariance_matrix(coins):
     """
     Calculate the covariance matrix of daily returns for a list of coins.
 
-    This function computes the covariance matrix for the daily returns
-    of the specified coins using their return DataFrame.
+    This function slices the precomputed covariance matrix of the statistics
+    index, so nothing is recomputed from the raw returns.
 
     Args:
         coins (list): A list of coin names whose covariance matrix is to be calculated.
@@ -89,17 +726,19 @@ def calculate_covariance_matrix(coins):
     Returns:
         pd.DataFrame: A covariance matrix of daily returns.
     """
-    returns_df = get_returns(coins)
-    return returns_df.cov()
+    idx = get_coin_ids(coins)
+    cov = get_statistics()["cov"]
+    return pd.DataFrame(cov[np.ix_(idx, idx)], index=list(coins), columns=list(coins))
 
 
-def calculate_portfolio_sharpe(wallet, mean_returns, risk_free_rate):
+def calculate_portfolio_sharpe(wallet, mean_returns, risk_free_rate, statistics=None):
     """
     Calculate the Sharpe Ratio for a portfolio.
 
     This function computes the Sharpe Ratio of a portfolio given its weights,
     mean returns, and a risk-free rate. It calculates portfolio return,
-    portfolio volatility, and adjusts the risk-free rate to a daily equivalent.
+    portfolio volatility from the precomputed covariance matrix, and adjusts
+    the risk-free rate to a daily equivalent.
 
     Args:
         wallet (dict): A dictionary containing:
@@ -107,13 +746,17 @@ def calculate_portfolio_sharpe(wallet, mean_returns, risk_free_rate):
                        - "coins" (list): Coin names in the portfolio.
         mean_returns (list or np.ndarray): Mean returns of the portfolio assets.
         risk_free_rate (float): Annualized risk-free rate as a decimal.
+        statistics (dict, optional): Statistics index to use. Defaults to the
+                                     process-wide one.
 
     Returns:
         float: The Sharpe Ratio of the portfolio.
     """
+    statistics = statistics or get_statistics()
     weights = np.array(wallet["weights"])
     portfolio_return = np.dot(weights, mean_returns)
-    cov_matrix = calculate_covariance_matrix(wallet["coins"])
+    idx = get_coin_ids(wallet["coins"], statistics)
+    cov_matrix = statistics["cov"][np.ix_(idx, idx)]
     portfolio_volatility = np.sqrt(np.dot(weights.T, np.dot(cov_matrix, weights)))
     # daily risk free rate
     risk_free_rate_daily = (1 + risk_free_rate) ** (1 / 252) - 1
@@ -121,3 +764,39 @@ def calculate_portfolio_sharpe(wallet, mean_returns, risk_free_rate):
     sharpe_ratio = (portfolio_return - risk_free_rate_daily) / portfolio_volatility
 
     return sharpe_ratio
+
+
+def calculate_portfolio_sharpe_batch(
+    coin_idx, weights, risk_free_rate, statistics=None
+):
+    """
+    Calculate the Sharpe Ratio of many portfolios at once.
+
+    The covariance block of every portfolio is gathered from the statistics
+    index and all returns and volatilities are computed with `np.einsum`, so a
+    whole population is scored without a Python loop.
+
+    Args:
+        coin_idx (np.ndarray): P x k matrix of coin ids, one row per portfolio.
+        weights (np.ndarray): P x k matrix of the matching weights.
+        risk_free_rate (float): Annualized risk-free rate as a decimal.
+        statistics (dict, optional): Statistics index to use. Defaults to the
+                                     process-wide one.
+
+    Returns:
+        np.ndarray: The Sharpe Ratio of each of the P portfolios.
+    """
+    statistics = statistics or get_statistics()
+    idx = np.asarray(coin_idx, dtype=np.intp)
+    weights = np.asarray(weights, dtype=np.float64)
+
+    portfolio_return = np.einsum("pk,pk->p", weights, statistics["mean"][idx])
+    cov_blocks = statistics["cov"][idx[:, :, None], idx[:, None, :]]
+    portfolio_variance = np.einsum(
+        "pi,pi->p", weights, np.einsum("pij,pj->pi", cov_blocks, weights)
+    )
+    portfolio_volatility = np.sqrt(portfolio_variance)
+    # daily risk free rate
+    risk_free_rate_daily = (1 + risk_free_rate) ** (1 / 252) - 1
+
+    return (portfolio_return - risk_free_rate_daily) / portfolio_volatility
@@ -0,0 +1,91 @@
+import numpy as np
+
+# diversity (see `metrics.population_diversity`) below which the operator
+# rates start to rise, and at which the population counts as collapsed
+target_diversity = 0.9
+collapsed_diversity = 0.5
+# (lowest, highest) fraction of random immigrants and mutation probability;
+# fewer than the 50% immigrants of the fixed rates loses the grid optimum on
+# some seeds, so the immigrant fraction does not go below it
+immigrant_rates = (0.5, 0.5)
+mutation_rates = (0.3, 1.0)
+
+
+def adaptive_rates(diversity):
+    """
+    Choose the immigrant and mutation rates from the population diversity.
+
+    A diverse population is bred with the lowest rates; as the diversity
+    falls from `target_diversity` to `collapsed_diversity`, both rates rise
+    linearly to their highest value to bring new material into the
+    population.
+
+    Args:
+        diversity (float): Fraction of unique wallets in the population.
+
+    Returns:
+        tuple: The fraction of random immigrants and the mutation
+               probability for the next generation.
+    """
+    pressure = np.clip(
+        (target_diversity - diversity) / (target_diversity - collapsed_diversity),
+        0.0,
+        1.0,
+    )
+    immigrant_rate = immigrant_rates[0] + pressure * (
+        immigrant_rates[1] - immigrant_rates[0]
+    )
+    mutation_rate = mutation_rates[0] + pressure * (
+        mutation_rates[1] - mutation_rates[0]
+    )
+    return float(immigrant_rate), float(mutation_rate)
+
+
+class StagnationMonitor:
+    """
+    Detect when a run stopped making progress.
+
+    A run stops once its best fitness did not improve by more than
+    `min_improvement` for `window` generations. It is reported as
+    "converged" when the population collapsed below `collapsed_diversity`
+    by then, and as "stalled" otherwise.
+
+    On the bundled quotations (4 coins, population 50, 10 seeds), a window
+    of 800 generations with `adaptive_rates` found the grid optimum as
+    often as full 2000-generation runs with the fixed rates, in about half
+    the generations; windows of 600 or less lost it on some seeds.
+
+    Args:
+        window (int): Generations without improvement before stopping.
+        min_improvement (float): Smallest fitness gain that counts as an
+                                 improvement.
+    """
+
+    def __init__(self, window, min_improvement=1e-6):
+        self.window = window
+        self.min_improvement = min_improvement
+        self.best_fitness = -np.inf
+        self.stalled_generations = 0
+
+    def update(self, best_fitness, diversity=None):
+        """
+        Record a generation and check whether the run should stop.
+
+        Args:
+            best_fitness (float): Best fitness of the generation.
+            diversity (float, optional): Diversity of the generation.
+
+        Returns:
+            str or None: "stalled" or "converged" when the run should stop.
+        """
+        if best_fitness > self.best_fitness + self.min_improvement:
+            self.best_fitness = best_fitness
+            self.stalled_generations = 0
+        else:
+            self.stalled_generations += 1
+
+        if self.stalled_generations < self.window:
+            return None
+        if diversity is not None and diversity <= collapsed_diversity:
+            return "converged"
+        return "stalled"
@@ -0,0 +1,380 @@
+import sys
+import os
+import time
+import random
+from types import MappingProxyType
+from typing import NamedTuple, Optional
+import numpy as np
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from ag import (
+    fitness_cache,
+    generate_population,
+    calculate_fitness,
+    verify_finishing_condition,
+    select_parents,
+    select_parent_indices,
+    selection_elitism,
+    breed_population,
+    generate_population_arrays,
+    breed_population_batch,
+)
+from population import Population
+from local_search import local_search
+from metrics import generation_metrics, population_diversity
+from convergence import adaptive_rates, StagnationMonitor
+from checkpoint import save_checkpoint, load_checkpoint
+
+
+class Snapshot(NamedTuple):
+    """
+    Immutable state of the genetic algorithm after one generation.
+
+    Attributes:
+        generation (int): The generation number, starting at 1.
+        max_generations (int): The generation limit of the run.
+        best_wallet (Mapping): The fittest wallet of the generation.
+        selected (tuple): The wallets chosen by `select_parents`; empty on
+                          the final snapshot.
+        population (tuple): The scored population; only filled on the final
+                            snapshot.
+        finished (bool): Whether this is the last snapshot of the run.
+        reached_threshold (bool): Whether a wallet beat `good_sharpe_ratio`.
+        metrics (dict, optional): The generation metrics, when observed.
+        stop_reason (str, optional): Why the run stopped, on the final
+                                     snapshot: "threshold",
+                                     "max_generations", "stalled" or
+                                     "converged".
+    """
+
+    generation: int
+    max_generations: int
+    best_wallet: MappingProxyType
+    selected: tuple
+    population: tuple
+    finished: bool
+    reached_threshold: bool
+    metrics: Optional[MappingProxyType] = None
+    stop_reason: Optional[str] = None
+
+
+def freeze_wallet(wallet):
+    """
+    Build a read-only copy of a wallet.
+
+    Args:
+        wallet (dict): A wallet with coins, weights and fitness.
+
+    Returns:
+        MappingProxyType: The wallet with tuples of coins and weights.
+    """
+    return MappingProxyType(
+        {
+            "coins": tuple(wallet["coins"]),
+            "weights": tuple(wallet["weights"]),
+            "fitness": wallet["fitness"],
+        }
+    )
+
+
+def evolve(
+    good_sharpe_ratio,
+    risk_free_rate,
+    population_size,
+    coins_qtd,
+    max_generations,
+    has_elitism_and_tournament="elitism_and_tournament",
+    observers=None,
+    initial_population=None,
+    statistics=None,
+    seed=None,
+    checkpoint_path=None,
+    checkpoint_every=100,
+    resume=False,
+    batched=False,
+    local_search_steps=0,
+    stall_generations=None,
+    adaptive=False,
+):
+    """
+    Run the genetic algorithm, yielding one snapshot per generation.
+
+    The engine has no user interface: the CLI, the Streamlit view and batch
+    jobs consume the same stream and decide what to do with each snapshot.
+
+    Every random draw goes through the `random.Random` and the
+    `np.random.Generator` owned by the run, so a seeded run is reproducible.
+    With `checkpoint_path`, the population, generation and generator state
+    are saved every `checkpoint_every` generations, and a run started with
+    `resume` continues from the last checkpoint with the same results as an
+    uninterrupted run.
+
+    Args:
+        good_sharpe_ratio (float): Fitness threshold that stops the run.
+        risk_free_rate (float): Annualized risk-free rate as a decimal.
+        population_size (int): Size of the population.
+        coins_qtd (int): Number of coins in each wallet.
+        max_generations (int): Maximum number of generations.
+        has_elitism_and_tournament (str): Selection mode used by
+                                          `select_parents`.
+        observers (list, optional): Callables receiving the metrics of each
+                                    generation (see `metrics.generation_metrics`).
+        initial_population (list, optional): Wallets to start from instead of
+                                             a random population.
+        statistics (dict, optional): Statistics index to optimize against.
+                                     Defaults to the process-wide one.
+        seed (int, optional): Seed of the run. Defaults to a random seed.
+        checkpoint_path (str, optional): File where checkpoints are saved.
+        checkpoint_every (int): Generations between checkpoints.
+        resume (bool): Continue from the checkpoint at `checkpoint_path`, if
+                       there is one.
+        batched (bool): Keep the population in a `Population` and breed it
+                        with the array operators (`breed_population_batch`),
+                        which pays off for large populations.
+        local_search_steps (int): Hill-climb the selected wallets for up to
+                                  this many moves before breeding (see
+                                  `local_search.hill_climb`); 0 disables it.
+        stall_generations (int, optional): Stop early once the best fitness
+                                           did not improve for this many
+                                           generations (see
+                                           `convergence.StagnationMonitor`).
+        adaptive (bool): Set the immigrant and mutation rates of each
+                         generation from the population diversity (see
+                         `convergence.adaptive_rates`) instead of the fixed
+                         50% immigrants and 100% mutation.
+
+    Yields:
+        Snapshot: The state after each generation; the last one has
+                  `finished` set.
+
+    Raises:
+        ValueError: If the checkpoint was saved by a run with other
+                    parameters.
+    """
+    observers = observers or []
+    rng = random.Random(seed)
+    np_rng = np.random.default_rng(seed)
+    params = {
+        "good_sharpe_ratio": good_sharpe_ratio,
+        "risk_free_rate": risk_free_rate,
+        "population_size": population_size,
+        "coins_qtd": coins_qtd,
+        "has_elitism_and_tournament": has_elitism_and_tournament,
+        "seed": seed,
+        "batched": batched,
+        "local_search_steps": local_search_steps,
+        "stall_generations": stall_generations,
+        "adaptive": adaptive,
+    }
+
+    state = load_checkpoint(checkpoint_path) if checkpoint_path and resume else None
+    if state is not None:
+        if state["params"] != params:
+            raise ValueError(
+                f"Checkpoint {checkpoint_path} belongs to a run with other parameters."
+            )
+        population = state["population"]
+        generation = state["generation"]
+        rng.setstate(state["rng_state"])
+        np_rng.bit_generator.state = state["np_rng_state"]
+        monitor = state["monitor"]
+    else:
+        population = [
+            {
+                "coins": list(wallet["coins"]),
+                "weights": list(wallet["weights"]),
+                "fitness": None,
+            }
+            for wallet in initial_population or []
+        ][:population_size]
+        if batched:
+            parts = (
+                [Population.from_wallets(population, statistics)] if population else []
+            )
+            parts.append(
+                generate_population_arrays(
+                    coins_qtd, population_size - len(population), statistics, np_rng
+                )
+            )
+            population = Population.concat(parts)
+        elif len(population) < population_size:
+            population += generate_population(
+                coins_quantity=coins_qtd,
+                population_size=population_size - len(population),
+                statistics=statistics,
+                rng=rng,
+            )
+        generation = 1
+        monitor = StagnationMonitor(stall_generations) if stall_generations else None
+
+    while True:
+        if checkpoint_path and generation % checkpoint_every == 0:
+            save_checkpoint(
+                checkpoint_path,
+                {
+                    "params": params,
+                    "generation": generation,
+                    "population": population,
+                    "rng_state": rng.getstate(),
+                    "np_rng_state": np_rng.bit_generator.state,
+                    "monitor": monitor,
+                },
+            )
+
+        phases = {}
+        hits, misses = fitness_cache.hits, fitness_cache.misses
+
+        ## calculates the fitness of each wallet
+        start = time.perf_counter()
+        population_with_fitness = calculate_fitness(
+            population, risk_free_rate, statistics=statistics
+        )
+        phases["fitness"] = time.perf_counter() - start
+
+        ## check if the finishing condition is met
+        reached = verify_finishing_condition(population_with_fitness, good_sharpe_ratio)
+        diversity = None
+        if adaptive or monitor is not None:
+            diversity = population_diversity(population_with_fitness)
+
+        stop_reason = "threshold" if reached else None
+        if monitor is not None:
+            ## stop early when the run stagnates
+            stalled = monitor.update(
+                selection_elitism(population_with_fitness)[0]["fitness"], diversity
+            )
+            stop_reason = stop_reason or stalled
+        if stop_reason is None and generation >= max_generations:
+            stop_reason = "max_generations"
+        finished = stop_reason is not None
+
+        immigrant_rate, mutation_rate = 0.5, 1.0
+        if adaptive:
+            immigrant_rate, mutation_rate = adaptive_rates(diversity)
+
+        selected = []
+        if not finished:
+            ## selection of the best wallets
+            start = time.perf_counter()
+            if batched:
+                parents = select_parent_indices(
+                    population_with_fitness, has_elitism_and_tournament, np_rng
+                )
+                selected = [population_with_fitness.wallet(i) for i in parents]
+            else:
+                selected = select_parents(
+                    population_with_fitness, has_elitism_and_tournament, rng=rng
+                )
+            phases["selection"] = time.perf_counter() - start
+
+            if local_search_steps:
+                ## memetic stage: refine the selected wallets before breeding
+                start = time.perf_counter()
+                selected = [
+                    local_search(wallet, risk_free_rate, statistics, local_search_steps)
+                    for wallet in selected
+                ]
+                if batched:
+                    improved = Population.from_wallets(selected, statistics)
+                    population_with_fitness.coins[parents] = improved.coins
+                    population_with_fitness.weights[parents] = improved.weights
+                    population_with_fitness.fitness[parents] = improved.fitness
+                phases["local_search"] = time.perf_counter() - start
+
+            if batched:
+                population = breed_population_batch(
+                    population_with_fitness,
+                    parents,
+                    population_size,
+                    timings=phases,
+                    statistics=statistics,
+                    rng=np_rng,
+                    immigrant_rate=immigrant_rate,
+                    mutation_rate=mutation_rate,
+                )
+            else:
+                population = breed_population(
+                    population,
+                    selected,
+                    population_size,
+                    coins_qtd,
+                    timings=phases,
+                    statistics=statistics,
+                    rng=rng,
+                    immigrant_rate=immigrant_rate,
+                    mutation_rate=mutation_rate,
+                )
+
+        metrics = None
+        if observers:
+            metrics = generation_metrics(
+                generation,
+                phases,
+                population_with_fitness,
+                fitness_cache.hits - hits,
+                fitness_cache.misses - misses,
+            )
+            if adaptive:
+                metrics["immigrant_rate"] = immigrant_rate
+                metrics["mutation_rate"] = mutation_rate
+            for observer in observers:
+                observer(metrics)
+            metrics = MappingProxyType(metrics)
+
+        yield Snapshot(
+            generation=generation,
+            max_generations=max_generations,
+            best_wallet=freeze_wallet(selection_elitism(population_with_fitness)[0]),
+            selected=tuple(freeze_wallet(wallet) for wallet in selected),
+            population=(
+                tuple(
+                    freeze_wallet(wallet)
+                    for wallet in (
+                        population_with_fitness.to_wallets()
+                        if batched
+                        else population_with_fitness
+                    )
+                )
+                if finished
+                else ()
+            ),
+            finished=finished,
+            reached_threshold=reached,
+            metrics=metrics,
+            stop_reason=stop_reason,
+        )
+
+        if finished:
+            return
+        generation += 1
+
+
+def throttle(snapshots, every=None, interval=None):
+    """
+    Thin out a snapshot stream to limit how often a consumer redraws.
+
+    A snapshot passes when its generation is a multiple of `every`, or when
+    `interval` seconds went by since the last one passed. Without either
+    limit every snapshot passes, and the final snapshot always does.
+
+    Args:
+        snapshots (iterable): The snapshots yielded by `evolve`.
+        every (int, optional): Pass one snapshot every `every` generations.
+        interval (float, optional): Pass a snapshot once this many seconds
+                                    went by since the previous one.
+
+    Yields:
+        Snapshot: The snapshots that passed.
+    """
+    last = time.monotonic()
+    for snapshot in snapshots:
+        now = time.monotonic()
+        due = every is None and interval is None
+        if every is not None:
+            due = due or snapshot.generation % every == 0
+        if interval is not None:
+            due = due or now - last >= interval
+        if due or snapshot.finished:
+            last = now
+            yield snapshot
@@ -0,0 +1,158 @@
+import threading
+import numpy as np
+from collections import OrderedDict
+
+
+def wallet_signatures(coin_ids, weights, risk_free_rate, decimals=2):
+    """
+    Build the canonical form and signature of many wallets at once.
+
+    Two wallets holding the same coins with the same weights share a
+    signature regardless of the order of their coins. The coins of every row
+    are sorted and the weights rounded to the grid with array operations,
+    and each row is packed into the bytes of its integer ids and weight
+    units, so no Python tuple is built per coin.
+
+    Args:
+        coin_ids (np.ndarray): P x k matrix of coin ids.
+        weights (np.ndarray): P x k matrix of weights.
+        risk_free_rate (float): Annualized risk-free rate used for scoring.
+        decimals (int): Decimals kept when rounding weights to the grid.
+
+    Returns:
+        tuple: The sorted P x k coin ids, the matching rounded weights and a
+               list with the hashable signature of every wallet.
+    """
+    order = np.argsort(coin_ids, axis=1)
+    coin_ids = np.take_along_axis(coin_ids, order, axis=1)
+    units = np.rint(np.take_along_axis(weights, order, axis=1) * 10**decimals)
+    rows = np.ascontiguousarray(np.concatenate([coin_ids, units], axis=1), np.int32)
+    keys = rows.view(np.dtype((np.void, rows.itemsize * rows.shape[1]))).ravel()
+    return (
+        coin_ids,
+        units / 10**decimals,
+        [(risk_free_rate, key) for key in keys.tolist()],
+    )
+
+
+class FitnessCache:
+    """
+    Bounded LRU cache of fitness values keyed by wallet signature.
+
+    Args:
+        maxsize (int): Maximum number of fitness values kept in memory.
+    """
+
+    def __init__(self, maxsize=100_000):
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self.statistics = None
+        self.version = None
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._data)
+
+    @property
+    def hit_rate(self):
+        """
+        float: Fraction of lookups answered from the cache.
+        """
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+    def bind(self, statistics):
+        """
+        Attach the cache to a statistics index, clearing it if it changed.
+
+        The index counts as changed when it is another object or when it was
+        updated in place since the last call (see its "version").
+
+        Args:
+            statistics (dict): The statistics index the fitness values are
+                               computed from.
+        """
+        with self._lock:
+            version = statistics.get("version")
+            if statistics is not self.statistics or version != self.version:
+                self._data.clear()
+                self.statistics = statistics
+                self.version = version
+
+    def get(self, signature):
+        """
+        Look up the fitness of a wallet signature.
+
+        Args:
+            signature (tuple): The wallet signature.
+
+        Returns:
+            float or None: The cached fitness, or None on a miss.
+        """
+        with self._lock:
+            fitness = self._data.get(signature)
+            if fitness is None:
+                self.misses += 1
+                return None
+            self._data.move_to_end(signature)
+            self.hits += 1
+            return fitness
+
+    def get_many(self, signatures):
+        """
+        Look up the fitness of many wallet signatures under a single lock.
+
+        Args:
+            signatures (list): The wallet signatures.
+
+        Returns:
+            list: The cached fitness of each signature, None on a miss.
+        """
+        with self._lock:
+            values = [self._data.get(signature) for signature in signatures]
+            for signature, fitness in zip(signatures, values):
+                if fitness is not None:
+                    self._data.move_to_end(signature)
+            misses = values.count(None)
+            self.misses += misses
+            self.hits += len(values) - misses
+            return values
+
+    def put_many(self, items):
+        """
+        Store the fitness of many wallet signatures under a single lock.
+
+        Args:
+            items (iterable): Pairs of wallet signature and fitness.
+        """
+        with self._lock:
+            for signature, fitness in items:
+                self._data[signature] = fitness
+                self._data.move_to_end(signature)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def put(self, signature, fitness):
+        """
+        Store the fitness of a wallet signature, evicting the oldest entries.
+
+        Args:
+            signature (tuple): The wallet signature.
+            fitness (float): The fitness value.
+        """
+        with self._lock:
+            self._data[signature] = fitness
+            self._data.move_to_end(signature)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def clear(self):
+        """
+        Remove every entry and reset the counters.
+        """
+        with self._lock:
+            self._data.clear()
+            self.hits = 0
+            self.misses = 0
@@ -0,0 +1,104 @@
+import sys
+import os
+import itertools
+import numpy as np
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from coins import get_statistics
+from ag import allowed_weights, weight_compositions_or_raise
+
+
+def iterate_subsets(num_assets, coins_qtd, chunk_size):
+    """
+    Yield every subset of `coins_qtd` coin ids in chunks.
+
+    Args:
+        num_assets (int): Number of coins in the universe.
+        coins_qtd (int): Number of coins in each subset.
+        chunk_size (int): Maximum number of subsets per chunk.
+
+    Yields:
+        np.ndarray: A chunk of subsets, one row of coin ids per subset.
+    """
+    subsets = itertools.combinations(range(num_assets), coins_qtd)
+    while True:
+        chunk = list(itertools.islice(subsets, chunk_size))
+        if not chunk:
+            return
+        yield np.array(chunk, dtype=np.intp)
+
+
+def score_subsets(subsets, compositions, risk_free_rate, statistics):
+    """
+    Calculate the Sharpe Ratio of every subset under every weight composition.
+
+    Args:
+        subsets (np.ndarray): S x k matrix of coin ids.
+        compositions (np.ndarray): C x k matrix of weights.
+        risk_free_rate (float): Annualized risk-free rate as a decimal.
+        statistics (dict): The statistics index (see `coins.build_statistics`).
+
+    Returns:
+        np.ndarray: S x C matrix of Sharpe Ratios.
+    """
+    portfolio_return = statistics["mean"][subsets] @ compositions.T
+    cov_blocks = statistics["cov"][subsets[:, :, None], subsets[:, None, :]]
+    portfolio_variance = np.einsum(
+        "sck,ck->sc", np.einsum("skl,cl->sck", cov_blocks, compositions), compositions
+    )
+    # daily risk free rate
+    risk_free_rate_daily = (1 + risk_free_rate) ** (1 / 252) - 1
+
+    return (portfolio_return - risk_free_rate_daily) / np.sqrt(portfolio_variance)
+
+
+def grid_search(coins_qtd, risk_free_rate, top_k=1, chunk_size=4096):
+    """
+    Find the best wallets on the `allowed_weights` grid by exhaustive search.
+
+    Every subset of `coins_qtd` coins is scored against every weight
+    composition summing to 1.0. Subsets are processed in chunks of
+    `chunk_size`, so memory stays bounded however large the search is.
+
+    Args:
+        coins_qtd (int): Number of coins in each wallet.
+        risk_free_rate (float): Annualized risk-free rate as a decimal.
+        top_k (int): Number of wallets to return.
+        chunk_size (int): Number of subsets scored at once.
+
+    Returns:
+        list: The `top_k` best wallets, sorted by decreasing fitness.
+    """
+    statistics = get_statistics()
+    compositions = weight_compositions_or_raise(allowed_weights, coins_qtd)
+
+    best_fitness = np.empty(0)
+    best_subsets = np.empty((0, coins_qtd), dtype=np.intp)
+    best_weights = np.empty((0, coins_qtd))
+
+    for subsets in iterate_subsets(len(statistics["coins"]), coins_qtd, chunk_size):
+        sharpe = score_subsets(subsets, compositions, risk_free_rate, statistics)
+        flat = sharpe.ravel()
+        keep = min(top_k, flat.size)
+        top = np.argpartition(flat, -keep)[-keep:]
+        rows, cols = np.unravel_index(top, sharpe.shape)
+
+        best_fitness = np.concatenate([best_fitness, flat[top]])
+        best_subsets = np.concatenate([best_subsets, subsets[rows]])
+        best_weights = np.concatenate([best_weights, compositions[cols]])
+
+        order = np.argsort(best_fitness)[::-1][:top_k]
+        best_fitness = best_fitness[order]
+        best_subsets = best_subsets[order]
+        best_weights = best_weights[order]
+
+    names = statistics["coins"]
+    return [
+        {
+            "coins": [names[i] for i in subset],
+            "weights": [round(float(w), 2) for w in weights],
+            "fitness": fitness,
+        }
+        for subset, weights, fitness in zip(best_subsets, best_weights, best_fitness)
+    ]
@@ -0,0 +1,142 @@
+import io
+import os
+import numpy as np
+import pandas as pd
+
+# column names of the investing.com export (Brazilian locale) and their
+# names in the parsed frame
+columns = {
+    "Data": "date",
+    "Abertura": "open",
+    "Máxima": "high",
+    "Mínima": "low",
+    "Último": "close",
+    "Vol.": "volume",
+    "Var%": "change",
+}
+volume_exponents = {"K": 3, "M": 6, "B": 9, "T": 12}
+
+
+def parse_dates(values):
+    """
+    Convert dd.mm.yyyy strings to dates.
+
+    The digits are read from the fixed-width strings with array arithmetic,
+    which is much faster than `strptime` on every value.
+
+    Args:
+        values (pd.Series): Dates such as "18.11.2024".
+
+    Returns:
+        np.ndarray: The datetime64[D] dates.
+    """
+    digits = values.to_numpy(dtype="U10").view(np.uint32).reshape(-1, 10)
+    digits = digits.astype(np.int64) - ord("0")
+    day = digits[:, 0] * 10 + digits[:, 1]
+    month = digits[:, 3] * 10 + digits[:, 4]
+    year = digits[:, 6:10] @ np.array([1000, 100, 10, 1])
+    months = ((year - 1970) * 12 + month - 1).astype("datetime64[M]")
+    return months.astype("datetime64[D]") + (day - 1)
+
+
+def read_investing_csv(path):
+    """
+    Read a daily history exported from investing.com in the Brazilian format.
+
+    The file has a BOM-prefixed header, quoted fields, dates as dd.mm.yyyy,
+    "." as thousands separator and "," as decimal mark, volumes such as
+    "148,40K" and changes such as "1,04%". The volume suffixes are rewritten
+    as exponents and the percent signs dropped in the raw text, so every
+    number is parsed by the C reader of pandas in a single pass.
+
+    Args:
+        path (str): Path of the CSV file.
+
+    Returns:
+        pd.DataFrame: The date, open, high, low, close, volume and change
+                      columns, sorted by date. Changes are decimals.
+    """
+    with open(path, encoding="utf-8-sig") as file:
+        header = file.readline()
+        body = file.read()
+    for suffix, exponent in volume_exponents.items():
+        body = body.replace(f'{suffix}"', f'E{exponent}"')
+    body = body.replace('%"', '"')
+
+    df = pd.read_csv(
+        io.StringIO(header + body),
+        thousands=".",
+        decimal=",",
+        dtype={"Data": str},
+        na_values=["-"],
+    )
+    df = df.rename(columns=columns)[list(columns.values())]
+    df["date"] = parse_dates(df["date"])
+    df["change"] = df["change"] / 100
+    return df.sort_values(by="date").reset_index(drop=True)
+
+
+def format_number(value):
+    """
+    Format a number as in the export, "-" when missing.
+
+    The shortest representation of the float is kept, so parsing the text
+    gives back the same value.
+
+    Args:
+        value (float): The number.
+
+    Returns:
+        str: The number with "." as thousands separator and "," as decimal
+             mark, such as "90.768,9".
+    """
+    if np.isnan(value):
+        return "-"
+    integer, _, fraction = np.format_float_positional(abs(value), trim="-").partition(
+        "."
+    )
+    text = f"{int(integer):,}".replace(",", ".")
+    if fraction:
+        text += f",{fraction}"
+    return f"-{text}" if value < 0 else text
+
+
+def append_investing_rows(path, rows):
+    """
+    Add daily rows to a history exported from investing.com.
+
+    The export lists the newest day first, so the rows are written right
+    after the header. The file is rewritten next to its destination and then
+    moved into place, so a crash leaves the previous file intact.
+
+    Args:
+        path (str): Path of the CSV file.
+        rows (pd.DataFrame): The date, open, high, low, close, volume and
+                             change columns, as returned by
+                             `read_investing_csv`; NaN is written as "-".
+    """
+    with open(path, encoding="utf-8-sig") as file:
+        header = file.readline()
+        body = file.read()
+    names = [columns[name.strip('"')] for name in header.strip().split(",")]
+
+    lines = []
+    for _, row in rows.sort_values(by="date", ascending=False).iterrows():
+        fields = []
+        for name in names:
+            if name == "date":
+                fields.append(pd.Timestamp(row["date"]).strftime("%d.%m.%Y"))
+            elif name == "change":
+                fields.append(
+                    "-"
+                    if np.isnan(row["change"])
+                    else f"{row['change'] * 100:.2f}%".replace(".", ",")
+                )
+            else:
+                fields.append(format_number(row[name]))
+        lines.append(",".join(f'"{field}"' for field in fields))
+
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8-sig") as file:
+        file.write(header + "\n".join(lines) + (f"\n{body}" if body else ""))
+    os.replace(tmp_path, path)
@@ -0,0 +1,272 @@
+import sys
+import os
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from coins import share_returns_panel, init_worker
+from engine import Snapshot, evolve, freeze_wallet
+from checkpoint import save_checkpoint, load_checkpoint
+
+
+def island_seed(entropy, island, epoch):
+    """
+    Derive the seed of one island for one epoch.
+
+    Every (island, epoch) pair gets its own child of the run's
+    `np.random.SeedSequence`, so a seeded run is reproducible whatever
+    worker process evolves each island.
+
+    Args:
+        entropy (int): Entropy of the run's seed sequence.
+        island (int): Position of the island.
+        epoch (int): Number of the epoch, starting at 0.
+
+    Returns:
+        int: The seed passed to `engine.evolve`.
+    """
+    sequence = np.random.SeedSequence(entropy, spawn_key=(island, epoch))
+    return int(sequence.generate_state(1, np.uint64)[0])
+
+
+def evolve_island(population, generations, seed, params):
+    """
+    Evolve one island for an epoch with `engine.evolve`.
+
+    Args:
+        population (list or None): The island wallets; None starts from a
+                                   random population.
+        generations (int): Number of generations to breed.
+        seed (int): Seed of the epoch (see `island_seed`).
+        params (dict): Keyword arguments of `engine.evolve` shared by every
+                       island.
+
+    Returns:
+        tuple: The scored island population, the number of generations bred
+               and whether the fitness threshold was reached.
+    """
+    snapshot = None
+    for snapshot in evolve(
+        **params,
+        max_generations=generations + 1,
+        initial_population=population,
+        seed=seed,
+    ):
+        pass
+    population = [
+        {
+            "coins": list(wallet["coins"]),
+            "weights": list(wallet["weights"]),
+            "fitness": wallet["fitness"],
+        }
+        for wallet in snapshot.population
+    ]
+    return population, snapshot.generation - 1, snapshot.reached_threshold
+
+
+def migrate(islands, migrants):
+    """
+    Move the best wallets of each island to the next one in a ring.
+
+    The `migrants` best wallets of island i replace the `migrants` worst
+    wallets of island i + 1.
+
+    Args:
+        islands (list): The scored populations of every island.
+        migrants (int): Number of wallets sent by each island.
+
+    Returns:
+        list: The island populations after migration.
+    """
+    ranked = [
+        sorted(island, key=lambda x: x["fitness"], reverse=True) for island in islands
+    ]
+    emigrants = [island[:migrants] for island in ranked]
+    return [
+        island[: len(island) - migrants] + emigrants[i - 1]
+        for i, island in enumerate(ranked)
+    ]
+
+
+def evolve_islands(
+    good_sharpe_ratio,
+    risk_free_rate,
+    population_size,
+    coins_qtd,
+    max_generations,
+    has_elitism_and_tournament="elitism_and_tournament",
+    islands=None,
+    migration_interval=10,
+    migrants=2,
+    initial_population=None,
+    seed=None,
+    checkpoint_path=None,
+    resume=False,
+    batched=False,
+    local_search_steps=0,
+    stall_generations=None,
+    adaptive=False,
+):
+    """
+    Run the genetic algorithm as an island model, yielding one snapshot per
+    epoch.
+
+    Every island runs `engine.evolve` on its own population in a worker
+    process for `migration_interval` generations; then the best wallets
+    migrate between islands and the next epoch starts. Workers read the
+    returns panel from shared memory instead of receiving a pickled copy.
+
+    Each island and epoch is seeded from the run's `np.random.SeedSequence`
+    (see `island_seed`), so a seeded run is reproducible. With
+    `checkpoint_path`, the island populations are saved after every
+    migration, and a run started with `resume` continues from there with
+    the same results as an uninterrupted run.
+
+    Args:
+        good_sharpe_ratio (float): Fitness threshold that stops the run.
+        risk_free_rate (float): Annualized risk-free rate as a decimal.
+        population_size (int): Size of each island population.
+        coins_qtd (int): Number of coins in each wallet.
+        max_generations (int): Maximum number of generations per island.
+        has_elitism_and_tournament (str): Selection mode used by
+                                          `select_parents`.
+        islands (int, optional): Number of islands. Defaults to the number of
+                                 CPUs.
+        migration_interval (int): Generations between migrations.
+        migrants (int): Number of wallets sent by each island per migration.
+        initial_population (list, optional): Wallets every island starts
+                                             from instead of a random
+                                             population.
+        seed (int, optional): Seed of the run. Defaults to a random seed.
+        checkpoint_path (str, optional): File where checkpoints are saved.
+        resume (bool): Continue from the checkpoint at `checkpoint_path`, if
+                       there is one.
+        batched (bool): Breed the islands with the array operators.
+        local_search_steps (int): Hill-climb the selected wallets of every
+                                  island for up to this many moves.
+        stall_generations (int, optional): Stop once the best fitness across
+                                           the islands did not improve for
+                                           this many generations.
+        adaptive (bool): Adapt the immigrant and mutation rates of every
+                         island to its diversity.
+
+    Yields:
+        Snapshot: The state after each epoch; the last one has `finished`
+                  set and holds the wallets of every island.
+
+    Raises:
+        ValueError: If the checkpoint was saved by a run with other
+                    parameters.
+    """
+    islands = islands or os.cpu_count() or 1
+    island_params = {
+        "good_sharpe_ratio": good_sharpe_ratio,
+        "risk_free_rate": risk_free_rate,
+        "population_size": population_size,
+        "coins_qtd": coins_qtd,
+        "has_elitism_and_tournament": has_elitism_and_tournament,
+        "batched": batched,
+        "local_search_steps": local_search_steps,
+        "adaptive": adaptive,
+    }
+    params = {
+        **island_params,
+        "islands": islands,
+        "migration_interval": migration_interval,
+        "migrants": migrants,
+        "seed": seed,
+        "stall_generations": stall_generations,
+    }
+
+    state = load_checkpoint(checkpoint_path) if checkpoint_path and resume else None
+    if state is not None:
+        if state["params"] != params:
+            raise ValueError(
+                f"Checkpoint {checkpoint_path} belongs to a run with other parameters."
+            )
+    else:
+        state = {
+            "params": params,
+            "entropy": np.random.SeedSequence(seed).entropy,
+            "epoch": 0,
+            "generation": 0,
+            "populations": [initial_population] * islands,
+            "best_fitness": -np.inf,
+            "improved_at": 0,
+        }
+
+    block, spec = share_returns_panel()
+    try:
+        with ProcessPoolExecutor(
+            max_workers=islands, initializer=init_worker, initargs=(spec,)
+        ) as executor:
+            while True:
+                if checkpoint_path:
+                    save_checkpoint(checkpoint_path, state)
+
+                generations = min(
+                    migration_interval, max(max_generations - state["generation"], 0)
+                )
+                results = list(
+                    executor.map(
+                        evolve_island,
+                        state["populations"],
+                        [generations] * islands,
+                        [
+                            island_seed(state["entropy"], i, state["epoch"])
+                            for i in range(islands)
+                        ],
+                        [island_params] * islands,
+                    )
+                )
+                populations = [population for population, _, _ in results]
+                reached = [bred for _, bred, hit in results if hit]
+                generation = state["generation"] + (
+                    min(reached) if reached else generations
+                )
+
+                ranked = sorted(
+                    (wallet for population in populations for wallet in population),
+                    key=lambda x: x["fitness"],
+                    reverse=True,
+                )
+                if ranked[0]["fitness"] > state["best_fitness"] + 1e-6:
+                    state["best_fitness"] = ranked[0]["fitness"]
+                    state["improved_at"] = generation
+
+                stop_reason = "threshold" if reached else None
+                if (
+                    stop_reason is None
+                    and stall_generations
+                    and generation - state["improved_at"] >= stall_generations
+                ):
+                    stop_reason = "stalled"
+                if stop_reason is None and generation >= max_generations:
+                    stop_reason = "max_generations"
+                finished = stop_reason is not None
+
+                yield Snapshot(
+                    generation=generation,
+                    max_generations=max_generations,
+                    best_wallet=freeze_wallet(ranked[0]),
+                    selected=(
+                        () if finished else tuple(map(freeze_wallet, ranked[:2]))
+                    ),
+                    population=(tuple(map(freeze_wallet, ranked)) if finished else ()),
+                    finished=finished,
+                    reached_threshold=bool(reached),
+                    stop_reason=stop_reason,
+                )
+                if finished:
+                    return
+
+                state = {
+                    **state,
+                    "epoch": state["epoch"] + 1,
+                    "generation": generation,
+                    "populations": migrate(populations, migrants),
+                }
+    finally:
+        block.close()
+        block.unlink()
@@ -0,0 +1,188 @@
+import sys
+import os
+import numpy as np
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from coins import get_statistics, get_coin_ids
+from ag import allowed_weights
+
+
+def sharpe_from_moments(portfolio_return, portfolio_variance, risk_free_rate_daily):
+    """
+    Calculate Sharpe Ratios from portfolio returns and variances.
+
+    Moves that lead to a non-positive or undefined variance get -inf, so
+    they are never chosen.
+
+    Args:
+        portfolio_return (np.ndarray): Mean daily returns.
+        portfolio_variance (np.ndarray): Daily variances.
+        risk_free_rate_daily (float): Daily risk-free rate.
+
+    Returns:
+        np.ndarray: The Sharpe Ratios.
+    """
+    with np.errstate(invalid="ignore", divide="ignore"):
+        sharpe = (portfolio_return - risk_free_rate_daily) / np.sqrt(portfolio_variance)
+    return np.where(portfolio_variance > 0, np.nan_to_num(sharpe, nan=-np.inf), -np.inf)
+
+
+def hill_climb(
+    coin_ids,
+    weights,
+    risk_free_rate,
+    statistics=None,
+    max_steps=50,
+    swaps=True,
+):
+    """
+    Improve a wallet by best-improvement hill climbing on the weight grid.
+
+    The neighbors of a wallet are every shift of one weight step from one of
+    its coins to another, keeping both weights in `allowed_weights`, and
+    every swap of one of its coins for a coin outside the wallet, keeping
+    the weight. Each neighbor is scored from the current portfolio return,
+    variance and covariance-weight product with O(1) or O(k) updates instead
+    of a full evaluation, so a step costs O(k^2 + N k).
+
+    Args:
+        coin_ids (list): Integer ids of the wallet coins.
+        weights (list): Weights matching `coin_ids`, on the grid.
+        risk_free_rate (float): Annualized risk-free rate as a decimal.
+        statistics (dict, optional): Statistics index to use. Defaults to the
+                                     process-wide one.
+        max_steps (int): Maximum number of moves.
+        swaps (bool): Also try swapping coins, not only shifting weight.
+
+    Returns:
+        tuple: The coin ids, the weights and the Sharpe Ratio of the best
+               wallet found.
+    """
+    statistics = statistics or get_statistics()
+    mean = np.asarray(statistics["mean"], dtype=np.float64)
+    cov = statistics["cov"]
+    risk_free_rate_daily = (1 + risk_free_rate) ** (1 / 252) - 1
+
+    # weights are handled in hundredths so the grid is exact
+    steps = sorted({round(w * 100) for w in allowed_weights})
+    on_grid = np.zeros(101, dtype=bool)
+    on_grid[steps] = True
+    step = int(np.diff(steps).min()) if len(steps) > 1 else 0
+    delta = step / 100
+
+    ids = np.array(coin_ids, dtype=np.intp)
+    units = np.rint(np.asarray(weights, dtype=np.float64) * 100).astype(int)
+    outside = np.ones(len(mean), dtype=bool)
+    outside[ids] = False
+
+    w = units / 100
+    cov_w = cov[np.ix_(ids, ids)] @ w
+    portfolio_return = w @ mean[ids]
+    portfolio_variance = w @ cov_w
+    best = float(
+        sharpe_from_moments(portfolio_return, portfolio_variance, risk_free_rate_daily)
+    )
+
+    for _ in range(max_steps):
+        moves = []
+
+        if step:
+            # shift one step from coin a (rows) to coin b (columns)
+            cov_block = cov[np.ix_(ids, ids)]
+            diag = np.diag(cov_block)
+            shift_return = portfolio_return + delta * (
+                mean[ids][None, :] - mean[ids][:, None]
+            )
+            shift_variance = (
+                portfolio_variance
+                + 2 * delta * (cov_w[None, :] - cov_w[:, None])
+                + delta**2 * (diag[:, None] + diag[None, :] - 2 * cov_block)
+            )
+            valid = (
+                on_grid[np.clip(units - step, 0, 100)][:, None]
+                & on_grid[np.clip(units + step, 0, 100)][None, :]
+            )
+            np.fill_diagonal(valid, False)
+            shift_sharpe = np.where(
+                valid,
+                sharpe_from_moments(shift_return, shift_variance, risk_free_rate_daily),
+                -np.inf,
+            )
+            a, b = np.unravel_index(np.argmax(shift_sharpe), shift_sharpe.shape)
+            moves.append((shift_sharpe[a, b], "shift", a, b))
+
+        if swaps and outside.any():
+            # replace coin a (rows) by coin c (columns), keeping its weight
+            cov_columns = cov[:, ids].T
+            cross = w @ cov_columns
+            removed = portfolio_variance - 2 * w * cov_w + w**2 * np.diag(cov)[ids]
+            swap_variance = (
+                removed[:, None]
+                + 2 * w[:, None] * (cross[None, :] - w[:, None] * cov_columns)
+                + (w**2)[:, None] * np.diag(cov)[None, :]
+            )
+            swap_return = portfolio_return + w[:, None] * (
+                mean[None, :] - mean[ids][:, None]
+            )
+            swap_sharpe = np.where(
+                outside[None, :],
+                sharpe_from_moments(swap_return, swap_variance, risk_free_rate_daily),
+                -np.inf,
+            )
+            a, c = np.unravel_index(np.argmax(swap_sharpe), swap_sharpe.shape)
+            moves.append((swap_sharpe[a, c], "swap", a, c))
+
+        if not moves:
+            break
+        sharpe, kind, a, b = max(moves, key=lambda move: move[0])
+        if not sharpe > best:
+            break
+
+        if kind == "shift":
+            units[a] -= step
+            units[b] += step
+            w = units / 100
+            cov_w = cov_w + delta * (cov[ids, ids[b]] - cov[ids, ids[a]])
+        else:
+            outside[ids[a]] = True
+            outside[b] = False
+            ids[a] = b
+            cov_w = cov[np.ix_(ids, ids)] @ w
+        portfolio_return = w @ mean[ids]
+        portfolio_variance = w @ cov_w
+        best = float(sharpe)
+
+    return ids, units / 100, best
+
+
+def local_search(wallet, risk_free_rate, statistics=None, max_steps=50, swaps=True):
+    """
+    Hill-climb a wallet with `hill_climb`.
+
+    Args:
+        wallet (Mapping): A wallet with coins and weights.
+        risk_free_rate (float): Annualized risk-free rate as a decimal.
+        statistics (dict, optional): Statistics index to use. Defaults to the
+                                     process-wide one.
+        max_steps (int): Maximum number of moves.
+        swaps (bool): Also try swapping coins, not only shifting weight.
+
+    Returns:
+        dict: The improved wallet with its fitness.
+    """
+    statistics = statistics or get_statistics()
+    ids, weights, sharpe = hill_climb(
+        get_coin_ids(wallet["coins"], statistics),
+        wallet["weights"],
+        risk_free_rate,
+        statistics,
+        max_steps,
+        swaps,
+    )
+    return {
+        "coins": [statistics["coins"][i] for i in ids],
+        "weights": [round(float(w), 2) for w in weights],
+        # a NumPy scalar, like the fitness of `ag.calculate_fitness`
+        "fitness": np.float64(sharpe),
+    }
@@ -0,0 +1,144 @@
+import os
+import sys
+import json
+import time
+import numpy as np
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from population import Population
+
+
+def population_diversity(population):
+    """
+    Measure the diversity of a population of wallets.
+
+    Args:
+        population (list or Population): The population of wallets.
+
+    Returns:
+        float: Fraction of wallets that are unique, ignoring the coin order.
+    """
+    if not len(population):
+        return 0.0
+    if isinstance(population, Population):
+        order = np.argsort(population.coins, axis=1)
+        rows = np.concatenate(
+            [
+                np.take_along_axis(population.coins, order, axis=1),
+                np.rint(np.take_along_axis(population.weights, order, axis=1) * 100),
+            ],
+            axis=1,
+        )
+        return len(np.unique(rows, axis=0)) / len(population)
+    signatures = {
+        tuple(sorted(zip(wallet["coins"], (round(w, 2) for w in wallet["weights"]))))
+        for wallet in population
+    }
+    return len(signatures) / len(population)
+
+
+def generation_metrics(
+    generation, phases, population_with_fitness, cache_hits, cache_misses
+):
+    """
+    Build the metrics record of one generation.
+
+    Args:
+        generation (int): The generation number.
+        phases (dict): Wall time in seconds of each phase of the generation.
+        population_with_fitness (list or Population): The scored population.
+        cache_hits (int): Fitness cache hits during the generation.
+        cache_misses (int): Fitness cache misses during the generation.
+
+    Returns:
+        dict: The metrics of the generation.
+    """
+    if isinstance(population_with_fitness, Population):
+        fitness = population_with_fitness.fitness
+    else:
+        fitness = np.array([wallet["fitness"] for wallet in population_with_fitness])
+    lookups = cache_hits + cache_misses
+    return {
+        "generation": generation,
+        "timestamp": time.time(),
+        "phases": phases,
+        "total_time": sum(phases.values()),
+        "cache_hits": cache_hits,
+        "cache_misses": cache_misses,
+        "cache_hit_rate": cache_hits / lookups if lookups else 0.0,
+        "diversity": population_diversity(population_with_fitness),
+        "best_fitness": float(fitness.max()) if fitness.size else None,
+        "mean_fitness": float(fitness.mean()) if fitness.size else None,
+    }
+
+
+class MetricsRecorder:
+    """
+    Observer that keeps the metrics of every generation in memory.
+    """
+
+    def __init__(self):
+        self.records = []
+
+    def __call__(self, metrics):
+        self.records.append(metrics)
+
+
+class JsonlMetricsWriter:
+    """
+    Observer that appends the metrics of every generation to a JSONL file.
+
+    Args:
+        path (str): Path of the JSONL file.
+    """
+
+    def __init__(self, path):
+        self.path = path
+
+    def __call__(self, metrics):
+        with open(self.path, "a") as file:
+            file.write(json.dumps(metrics) + "\n")
+
+
+class PrometheusMetricsWriter:
+    """
+    Observer that writes the latest generation in the Prometheus text format.
+
+    The file is replaced atomically, so it can be scraped by the node
+    exporter textfile collector while the run is going.
+
+    Args:
+        path (str): Path of the `.prom` file.
+        prefix (str): Prefix of the metric names.
+    """
+
+    def __init__(self, path, prefix="tech_challenge_2_ga"):
+        self.path = path
+        self.prefix = prefix
+
+    def __call__(self, metrics):
+        lines = []
+        declared = set()
+
+        def gauge(name, value, labels=""):
+            if value is None:
+                return
+            if name not in declared:
+                declared.add(name)
+                lines.append(f"# TYPE {self.prefix}_{name} gauge")
+            lines.append(f"{self.prefix}_{name}{labels} {value}")
+
+        gauge("generation", metrics["generation"])
+        gauge("generation_seconds", metrics["total_time"])
+        for phase, seconds in metrics["phases"].items():
+            gauge("phase_seconds", seconds, f'{{phase="{phase}"}}')
+        gauge("cache_hit_rate", metrics["cache_hit_rate"])
+        gauge("diversity", metrics["diversity"])
+        gauge("best_fitness", metrics["best_fitness"])
+        gauge("mean_fitness", metrics["mean_fitness"])
+
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, "w") as file:
+            file.write("\n".join(lines) + "\n")
+        os.replace(tmp_path, self.path)
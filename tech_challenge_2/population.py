@@ -0,0 +1,182 @@
+import sys
+import os
+import numpy as np
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from coins import (
+    get_panel_coins,
+    get_statistics,
+    get_coin_ids,
+    calculate_portfolio_sharpe_batch,
+)
+
+
+def best_indices(fitness, n):
+    """
+    Get the positions of the `n` highest fitness values, best first.
+
+    Uses `np.argpartition`, so only the selected values are sorted.
+
+    Args:
+        fitness (np.ndarray): Fitness values; NaN counts as the worst.
+        n (int): Number of positions to return.
+
+    Returns:
+        np.ndarray: The positions of the `n` best values.
+    """
+    fitness = np.nan_to_num(np.asarray(fitness, dtype=np.float64), nan=-np.inf)
+    n = min(n, fitness.size)
+    if n == 0:
+        return np.empty(0, dtype=np.intp)
+    top = np.argpartition(fitness, -n)[-n:]
+    return top[np.argsort(fitness[top], kind="stable")[::-1]]
+
+
+class Population:
+    """
+    Population of wallets stored as NumPy arrays.
+
+    Row i describes one wallet: `coins[i]` holds its coin ids in the
+    statistics index, `weights[i]` the matching weights and `fitness[i]` its
+    Sharpe Ratio, or NaN while it has not been scored.
+
+    Args:
+        coins (np.ndarray): P x k matrix of coin ids.
+        weights (np.ndarray): P x k matrix of weights.
+        fitness (np.ndarray, optional): Fitness of each wallet.
+        names (list, optional): Coin names ordered by id. Defaults to the
+                                coins of the process-wide returns panel.
+    """
+
+    def __init__(self, coins, weights, fitness=None, names=None):
+        self.coins = np.asarray(coins, dtype=np.int16)
+        self.weights = np.asarray(weights, dtype=np.float32)
+        if self.coins.shape != self.weights.shape or self.coins.ndim != 2:
+            raise ValueError("Coins and weights must be matrices of the same shape.")
+        if fitness is None:
+            fitness = np.full(len(self.coins), np.nan)
+        self.fitness = np.asarray(fitness, dtype=np.float64)
+        self.names = names if names is not None else get_panel_coins()
+
+    def __len__(self):
+        return len(self.coins)
+
+    @property
+    def coins_qtd(self):
+        """
+        int: Number of coins in each wallet.
+        """
+        return self.coins.shape[1]
+
+    @classmethod
+    def from_wallets(cls, wallets, statistics=None):
+        """
+        Build a population from a list of wallet dictionaries.
+
+        Args:
+            wallets (list): Wallets with "coins", "weights" and "fitness".
+            statistics (dict, optional): Statistics index used to map coin
+                                         names to ids.
+
+        Returns:
+            Population: The array-backed population.
+        """
+        statistics = statistics or get_statistics()
+        coins = [get_coin_ids(wallet["coins"], statistics) for wallet in wallets]
+        weights = [wallet["weights"] for wallet in wallets]
+        fitness = [
+            np.nan if wallet.get("fitness") is None else wallet["fitness"]
+            for wallet in wallets
+        ]
+        return cls(coins, weights, fitness, statistics["coins"])
+
+    @classmethod
+    def concat(cls, populations):
+        """
+        Join several populations with the same number of coins.
+
+        Args:
+            populations (list): The populations to join.
+
+        Returns:
+            Population: A population holding every row, in order.
+        """
+        return cls(
+            np.concatenate([p.coins for p in populations]),
+            np.concatenate([p.weights for p in populations]),
+            np.concatenate([p.fitness for p in populations]),
+            populations[0].names,
+        )
+
+    def wallet(self, i):
+        """
+        Convert one row into the wallet dictionary used by the view.
+
+        Args:
+            i (int): Position of the wallet.
+
+        Returns:
+            dict: The wallet with "coins", "weights" and "fitness".
+        """
+        fitness = self.fitness[i]
+        return {
+            "coins": [self.names[c] for c in self.coins[i]],
+            "weights": [round(float(w), 2) for w in self.weights[i]],
+            "fitness": None if np.isnan(fitness) else fitness,
+        }
+
+    def to_wallets(self):
+        """
+        Convert every row into a wallet dictionary.
+
+        Returns:
+            list: The wallets, in row order.
+        """
+        return [self.wallet(i) for i in range(len(self))]
+
+    def take(self, indices):
+        """
+        Select rows of the population.
+
+        Args:
+            indices (np.ndarray): Positions of the rows to keep.
+
+        Returns:
+            Population: A new population with the selected rows.
+        """
+        return Population(
+            self.coins[indices],
+            self.weights[indices],
+            self.fitness[indices],
+            self.names,
+        )
+
+    def evaluate(self, risk_free_rate, statistics=None):
+        """
+        Score every wallet with `calculate_portfolio_sharpe_batch`.
+
+        Args:
+            risk_free_rate (float): Annualized risk-free rate as a decimal.
+            statistics (dict, optional): Statistics index to use.
+
+        Returns:
+            Population: The same population, with its fitness updated.
+        """
+        if len(self):
+            self.fitness = calculate_portfolio_sharpe_batch(
+                self.coins, self.weights, risk_free_rate, statistics
+            )
+        return self
+
+    def best(self, n=1):
+        """
+        Get the positions of the `n` fittest wallets, best first.
+
+        Args:
+            n (int): Number of positions to return.
+
+        Returns:
+            np.ndarray: The positions of the `n` fittest wallets.
+        """
+        return best_indices(self.fitness, n)
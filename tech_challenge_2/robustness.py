@@ -0,0 +1,268 @@
+import sys
+import os
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from coins import get_returns_panel
+
+_wallet_moments = None
+
+
+def init_worker(moments):
+    """
+    Prepare a worker process to score bootstrap chunks.
+
+    Args:
+        moments (dict): The arrays returned by `wallet_moments`.
+    """
+    global _wallet_moments
+    _wallet_moments = moments
+
+
+def wallet_moments(wallets, panel=None):
+    """
+    Prepare the daily terms of the moments the GA fitness is built from.
+
+    The fitness of a wallet (see `coins.calculate_portfolio_sharpe`) uses
+    the mean of each coin over the days it traded and the covariance of
+    each pair of coins over the days both traded. Those are sums over days,
+    so the terms of every sum are kept as a T x column matrix and a
+    resample only needs their products with its day counts.
+
+    Args:
+        wallets (list): Wallets with coins and weights.
+        panel (pd.DataFrame, optional): Returns panel to use. Defaults to the
+                                        process-wide one.
+
+    Returns:
+        dict: For the U coins held by the wallets and the Q pairs of coins
+              held together:
+              - "shift" (np.ndarray): Mean return of each coin, subtracted
+                from its returns to avoid cancellation.
+              - "present" (np.ndarray): T x U mask of the days each coin traded.
+              - "values" (np.ndarray): T x U shifted returns, 0 where missing.
+              - "pair_present" (np.ndarray): T x Q mask of the days both coins
+                of each pair traded.
+              - "pair_first", "pair_second" (np.ndarray): T x Q shifted
+                returns of each coin of the pair on those days.
+              - "pair_product" (np.ndarray): T x Q products of both.
+              - "weights" (np.ndarray): U x P weight of each coin in each
+                wallet.
+              - "pair_weights" (np.ndarray): Q x P factor of the covariance
+                of each pair in the variance of each wallet.
+    """
+    panel = get_returns_panel() if panel is None else panel
+    coins = sorted({coin for wallet in wallets for coin in wallet["coins"]})
+    ids = {name: i for i, name in enumerate(coins)}
+    values = panel[coins].to_numpy(dtype=np.float64)
+    present = ~np.isnan(values)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        shift = np.where(present, values, 0.0).sum(axis=0) / present.sum(axis=0)
+    values = np.where(present, values - shift, 0.0)
+
+    weights = np.zeros((len(coins), len(wallets)))
+    pairs = {}
+    factors = []
+    for p, wallet in enumerate(wallets):
+        held = [
+            (ids[coin], weight)
+            for coin, weight in zip(wallet["coins"], wallet["weights"])
+        ]
+        for i, weight_i in held:
+            weights[i, p] = weight_i
+            for j, weight_j in held:
+                if i <= j:
+                    q = pairs.setdefault((i, j), len(pairs))
+                    # w_i w_j appears twice in w' S w off the diagonal
+                    factors.append((q, p, weight_i * weight_j * (1 + (i != j))))
+    pair_weights = np.zeros((len(pairs), len(wallets)))
+    for q, p, factor in factors:
+        pair_weights[q, p] += factor
+
+    first = np.array([i for i, _ in pairs], dtype=np.intp)
+    second = np.array([j for _, j in pairs], dtype=np.intp)
+    pair_present = present[:, first] & present[:, second]
+    return {
+        "shift": shift,
+        "present": present.astype(np.float64),
+        "values": values,
+        "pair_present": pair_present.astype(np.float64),
+        "pair_first": values[:, first] * pair_present,
+        "pair_second": values[:, second] * pair_present,
+        "pair_product": values[:, first] * values[:, second] * pair_present,
+        "weights": weights,
+        "pair_weights": pair_weights,
+    }
+
+
+def bootstrap_counts(num_days, num_resamples, block_size, rng):
+    """
+    Draw moving-block bootstrap resamples as day counts.
+
+    Each resample concatenates blocks of `block_size` consecutive days with
+    random starts until it has `num_days` days. It is stored as the number
+    of times each day was drawn, so statistics over a resample become
+    matrix products.
+
+    Args:
+        num_days (int): Number of days in the sample.
+        num_resamples (int): Number of resamples.
+        block_size (int): Number of consecutive days in each block.
+        rng (np.random.Generator): Random generator.
+
+    Returns:
+        np.ndarray: B x T matrix of day counts, each row summing to T.
+    """
+    block_size = max(1, min(block_size, num_days))
+    num_blocks = -(-num_days // block_size)
+    starts = rng.integers(num_days - block_size + 1, size=(num_resamples, num_blocks))
+    days = (starts[:, :, None] + np.arange(block_size)).reshape(num_resamples, -1)
+    days = days[:, :num_days] + num_days * np.arange(num_resamples)[:, None]
+    counts = np.bincount(days.ravel(), minlength=num_resamples * num_days)
+    return counts.reshape(num_resamples, num_days).astype(np.float64)
+
+
+def bootstrap_sharpe(counts, moments, risk_free_rate):
+    """
+    Calculate the Sharpe Ratio of every wallet on every resample.
+
+    The coin means and pairwise covariances are computed over the resampled
+    days as in `coins.build_statistics`, so a resample drawing every day
+    once gives the fitness of the GA.
+
+    Args:
+        counts (np.ndarray): B x T matrix of day counts.
+        moments (dict): The arrays returned by `wallet_moments`.
+        risk_free_rate (float): Annualized risk-free rate as a decimal.
+
+    Returns:
+        np.ndarray: B x P matrix of daily Sharpe Ratios, NaN where a resample
+                    has no day of a coin or fewer than two days of a pair.
+    """
+    days = counts @ moments["present"]
+    pair_days = counts @ moments["pair_present"]
+    with np.errstate(invalid="ignore", divide="ignore"):
+        mean = (counts @ moments["values"]) / days + moments["shift"]
+        cov = (
+            counts @ moments["pair_product"]
+            - (counts @ moments["pair_first"])
+            * (counts @ moments["pair_second"])
+            / pair_days
+        ) / (pair_days - 1)
+
+    # a wallet is undefined if one of its coins or pairs is
+    missing = (days == 0) @ (moments["weights"] != 0) + (pair_days <= 1) @ (
+        moments["pair_weights"] != 0
+    )
+    portfolio_return = np.where(days > 0, mean, 0.0) @ moments["weights"]
+    portfolio_variance = np.where(pair_days > 1, cov, 0.0) @ moments["pair_weights"]
+    with np.errstate(invalid="ignore", divide="ignore"):
+        # daily risk free rate
+        risk_free_rate_daily = (1 + risk_free_rate) ** (1 / 252) - 1
+        sharpe = (portfolio_return - risk_free_rate_daily) / np.sqrt(portfolio_variance)
+    return np.where(missing == 0, sharpe, np.nan)
+
+
+def score_chunk(seed, num_resamples, block_size, risk_free_rate):
+    """
+    Score one chunk of resamples in a worker process.
+
+    Args:
+        seed (np.random.SeedSequence): Seed of the chunk.
+        num_resamples (int): Number of resamples in the chunk.
+        block_size (int): Number of consecutive days in each block.
+        risk_free_rate (float): Annualized risk-free rate as a decimal.
+
+    Returns:
+        np.ndarray: B x P matrix of Sharpe Ratios.
+    """
+    moments = _wallet_moments
+    counts = bootstrap_counts(
+        len(moments["present"]),
+        num_resamples,
+        block_size,
+        np.random.default_rng(seed),
+    )
+    return bootstrap_sharpe(counts, moments, risk_free_rate)
+
+
+def evaluate_robustness(
+    wallets,
+    risk_free_rate=0.04,
+    threshold=0.0,
+    num_resamples=2000,
+    block_size=20,
+    confidence=0.95,
+    chunk_size=250,
+    workers=1,
+    seed=None,
+):
+    """
+    Estimate the distribution of the Sharpe Ratio of wallets by bootstrap.
+
+    The days of the returns panel are resampled with a moving-block
+    bootstrap, which keeps the short-term dependence of the returns, and
+    every resample is scored with the estimator of the GA fitness: coin
+    means over each coin's days and covariances over the days both coins
+    traded (see `bootstrap_sharpe`). All wallets are scored on a chunk of
+    `chunk_size` resamples with a few matrix products, so memory is bounded
+    by the chunk; chunks run on
+    `workers` processes. Every chunk has its own seed derived from `seed`,
+    so the result does not depend on the number of workers.
+
+    Args:
+        wallets (list): Wallets with coins and weights, such as the final
+                        population of a run.
+        risk_free_rate (float): Annualized risk-free rate as a decimal.
+        threshold (float): Daily Sharpe Ratio the wallets should beat.
+        num_resamples (int): Number of bootstrap resamples.
+        block_size (int): Number of consecutive days in each block.
+        confidence (float): Coverage of the confidence intervals.
+        chunk_size (int): Number of resamples scored at once.
+        workers (int): Number of worker processes; 1 runs in this process.
+        seed (int, optional): Seed of the resamples.
+
+    Returns:
+        list: One dictionary per wallet with its "coins", "weights", sample
+              "sharpe" (the GA fitness), bootstrap "mean_sharpe", "ci_low"
+              and "ci_high" bounds and "prob_above" the threshold.
+    """
+    moments = wallet_moments(wallets)
+    num_days = len(moments["present"])
+    sizes = [
+        min(chunk_size, num_resamples - start)
+        for start in range(0, num_resamples, chunk_size)
+    ]
+    seeds = np.random.SeedSequence(seed).spawn(len(sizes))
+    args = (seeds, sizes, [block_size] * len(sizes), [risk_free_rate] * len(sizes))
+
+    if workers == 1:
+        init_worker(moments)
+        chunks = list(map(score_chunk, *args))
+    else:
+        with ProcessPoolExecutor(
+            max_workers=workers, initializer=init_worker, initargs=(moments,)
+        ) as executor:
+            chunks = list(executor.map(score_chunk, *args))
+    sharpe = np.concatenate(chunks) if chunks else np.empty((0, len(wallets)))
+
+    sample = bootstrap_sharpe(np.ones((1, num_days)), moments, risk_free_rate)[0]
+    alpha = (1 - confidence) / 2
+    with np.errstate(invalid="ignore"):
+        low, high = np.nanquantile(sharpe, [alpha, 1 - alpha], axis=0)
+        above = (sharpe > threshold).sum(axis=0) / (~np.isnan(sharpe)).sum(axis=0)
+
+    return [
+        {
+            "coins": list(wallet["coins"]),
+            "weights": list(wallet["weights"]),
+            "sharpe": float(sample[p]),
+            "mean_sharpe": float(np.nanmean(sharpe[:, p])),
+            "ci_low": float(low[p]),
+            "ci_high": float(high[p]),
+            "prob_above": float(above[p]),
+        }
+        for p, wallet in enumerate(wallets)
+    ]
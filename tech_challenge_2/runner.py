@@ -0,0 +1,88 @@
+import sys
+import os
+import threading
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from engine import evolve
+
+
+class BackgroundRun:
+    """
+    Run the genetic algorithm in a worker thread and expose its progress.
+
+    The snapshots of `engine.evolve` are consumed in a daemon thread, so the
+    caller can poll `snapshot` and `status` without blocking. Pausing keeps
+    the engine generator, so `resume` continues the same run.
+
+    Args:
+        **params: Arguments of `engine.evolve`.
+    """
+
+    def __init__(self, **params):
+        self.params = params
+        self.status = "created"
+        self.snapshot = None
+        self.error = None
+        self._snapshots = evolve(**params)
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+
+    @property
+    def done(self):
+        """
+        bool: Whether the run will not produce more snapshots.
+        """
+        return self.status in ("finished", "cancelled", "failed")
+
+    def start(self):
+        """
+        Start or resume consuming snapshots in the worker thread.
+        """
+        with self._lock:
+            if self.done or self.status == "running":
+                return
+            self._stop.clear()
+            self.status = "running"
+            self._thread = threading.Thread(target=self._work, daemon=True)
+            self._thread.start()
+
+    def _work(self):
+        try:
+            for snapshot in self._snapshots:
+                self.snapshot = snapshot
+                if snapshot.finished:
+                    self.status = "finished"
+                    return
+                if self._stop.is_set():
+                    return
+        except Exception as error:
+            self.error = error
+            self.status = "failed"
+
+    def pause(self):
+        """
+        Stop after the current generation, keeping the run to resume later.
+        """
+        with self._lock:
+            if self.status == "running":
+                self._stop.set()
+                self.status = "paused"
+
+    def resume(self):
+        """
+        Continue a paused run from the generation where it stopped.
+        """
+        if self._thread is not None:
+            self._thread.join()
+        self.start()
+
+    def cancel(self):
+        """
+        Stop the run for good.
+        """
+        with self._lock:
+            if not self.done:
+                self._stop.set()
+                self.status = "cancelled"
@@ -0,0 +1,537 @@
+import sys
+import os
+import json
+import uuid
+import asyncio
+import argparse
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from ag import allowed_weights, weight_compositions_or_raise
+from coins import get_statistics
+from engine import evolve, throttle
+from island import evolve_islands
+from tangency import tangency_search
+
+job_required = (
+    "good_sharpe_ratio",
+    "risk_free_rate",
+    "population_size",
+    "coins_qtd",
+    "max_generations",
+)
+job_defaults = {
+    "has_elitism_and_tournament": "elitism_and_tournament",
+    "seed": None,
+    "batched": False,
+    "local_search_steps": 0,
+    "tangency_seeds": 0,
+    "stall_generations": None,
+    "adaptive": False,
+    "islands": 0,
+    "migration_interval": 10,
+    "migrants": 2,
+}
+# (lowest, highest) accepted value; tournaments draw 3 wallets
+job_limits = {
+    "population_size": (3, 10_000),
+    "max_generations": (1, 100_000),
+}
+# largest accepted request body, in bytes
+max_body_size = 64 * 1024
+selection_modes = ("elitism_and_tournament", "elitism", "tournament")
+reasons = {
+    200: "OK",
+    202: "Accepted",
+    400: "Bad Request",
+    404: "Not Found",
+    405: "Method Not Allowed",
+}
+
+
+def parse_params(payload, num_coins=None):
+    """
+    Validate the parameters of a job request.
+
+    Args:
+        payload (dict): The decoded JSON body, with the parameters of
+                        `app.run_app`.
+        num_coins (int, optional): Number of coins in the universe, which
+                                   bounds `coins_qtd`.
+
+    Returns:
+        dict: The parameters with their defaults filled in.
+
+    Raises:
+        ValueError: If a parameter is missing, unknown or invalid.
+    """
+    if not isinstance(payload, dict):
+        raise ValueError("The request body must be a JSON object.")
+    unknown = set(payload) - set(job_required) - set(job_defaults)
+    if unknown:
+        raise ValueError(f"Unknown parameters: {sorted(unknown)}.")
+    missing = [name for name in job_required if name not in payload]
+    if missing:
+        raise ValueError(f"Missing parameters: {missing}.")
+
+    params = {**job_defaults, **payload}
+    for name in ("good_sharpe_ratio", "risk_free_rate"):
+        if isinstance(params[name], bool) or not isinstance(params[name], (int, float)):
+            raise ValueError(f"{name} must be a number.")
+        params[name] = float(params[name])
+    for name in (
+        "population_size",
+        "coins_qtd",
+        "max_generations",
+        "local_search_steps",
+        "tangency_seeds",
+        "islands",
+        "migration_interval",
+        "migrants",
+    ):
+        if isinstance(params[name], bool) or not isinstance(params[name], int):
+            raise ValueError(f"{name} must be an integer.")
+        if params[name] < 0 or (
+            name in (*job_required, "migration_interval") and params[name] == 0
+        ):
+            raise ValueError(f"{name} must be positive.")
+    for name, (low, high) in job_limits.items():
+        if not low <= params[name] <= high:
+            raise ValueError(f"{name} must be between {low} and {high}.")
+    max_islands = os.cpu_count() or 1
+    if params["islands"] > max_islands:
+        raise ValueError(f"islands must be at most {max_islands}, the number of CPUs.")
+    if params["migrants"] >= params["population_size"]:
+        raise ValueError("migrants must be less than population_size.")
+    if num_coins is not None and params["coins_qtd"] > num_coins:
+        raise ValueError(f"coins_qtd must be at most {num_coins}, the number of coins.")
+    weight_compositions_or_raise(allowed_weights, params["coins_qtd"])
+    if params["has_elitism_and_tournament"] not in selection_modes:
+        raise ValueError(
+            f"has_elitism_and_tournament must be one of {selection_modes}."
+        )
+    if params["seed"] is not None and (
+        isinstance(params["seed"], bool) or not isinstance(params["seed"], int)
+    ):
+        raise ValueError("seed must be an integer or null.")
+    if params["stall_generations"] is not None and (
+        isinstance(params["stall_generations"], bool)
+        or not isinstance(params["stall_generations"], int)
+        or params["stall_generations"] <= 0
+    ):
+        raise ValueError("stall_generations must be a positive integer or null.")
+    for name in ("batched", "adaptive"):
+        if not isinstance(params[name], bool):
+            raise ValueError(f"{name} must be a boolean.")
+    return params
+
+
+def wallet_payload(wallet):
+    """
+    Convert a wallet into a JSON-serializable dictionary.
+
+    Args:
+        wallet (Mapping): A wallet with coins, weights and fitness.
+
+    Returns:
+        dict: The wallet with plain lists and floats.
+    """
+    return {
+        "coins": list(wallet["coins"]),
+        "weights": [float(w) for w in wallet["weights"]],
+        "fitness": float(wallet["fitness"]),
+    }
+
+
+def run_job(params, publish, progress_interval):
+    """
+    Run the genetic algorithm for a job, publishing its progress.
+
+    Runs in a worker thread, so every job shares the process-wide returns
+    panel and statistics index.
+
+    Args:
+        params (dict): The parameters returned by `parse_params`.
+        publish (callable): Receives the progress dictionary of the run.
+        progress_interval (float): Minimum seconds between two progress
+                                   updates.
+
+    Returns:
+        dict: The best wallet found.
+    """
+    params = dict(params)
+    tangency_seeds = params.pop("tangency_seeds")
+    if tangency_seeds:
+        params["initial_population"] = tangency_search(
+            params["coins_qtd"], params["risk_free_rate"], top_k=tangency_seeds
+        )
+    if params["islands"]:
+        snapshots = evolve_islands(**params)
+    else:
+        for name in ("islands", "migration_interval", "migrants"):
+            del params[name]
+        snapshots = evolve(**params)
+
+    snapshot = None
+    for snapshot in throttle(snapshots, interval=progress_interval):
+        publish(
+            {
+                "generation": snapshot.generation,
+                "max_generations": snapshot.max_generations,
+                "best_wallet": wallet_payload(snapshot.best_wallet),
+                "reached_threshold": snapshot.reached_threshold,
+                "stop_reason": snapshot.stop_reason,
+            }
+        )
+    return wallet_payload(snapshot.best_wallet)
+
+
+class Job:
+    """
+    State of one optimization request, owned by the event loop.
+
+    Args:
+        job_id (str): Identifier of the job.
+        key (str): Canonical JSON of the parameters, used to deduplicate.
+        params (dict): The parameters returned by `parse_params`.
+    """
+
+    def __init__(self, job_id, key, params):
+        self.id = job_id
+        self.key = key
+        self.params = params
+        self.status = "queued"
+        self.progress = None
+        self.result = None
+        self.error = None
+        self.version = 0
+        self._changed = asyncio.Event()
+
+    @property
+    def done(self):
+        """
+        bool: Whether the job will not change anymore.
+        """
+        return self.status in ("finished", "failed")
+
+    def update(self, **fields):
+        """
+        Change some fields of the job and wake up its watchers.
+
+        Args:
+            **fields: The fields to set.
+        """
+        for name, value in fields.items():
+            setattr(self, name, value)
+        self.version += 1
+        self._changed.set()
+        self._changed = asyncio.Event()
+
+    async def wait(self, version, timeout=None):
+        """
+        Wait until the job changes after `version`, or the timeout expires.
+
+        Args:
+            version (int): The last version seen by the caller.
+            timeout (float, optional): Maximum seconds to wait.
+        """
+        if self.version != version:
+            return
+        try:
+            await asyncio.wait_for(self._changed.wait(), timeout)
+        except asyncio.TimeoutError:
+            pass
+
+    def to_dict(self):
+        """
+        Describe the job for the HTTP API.
+
+        Returns:
+            dict: The id, status, parameters, progress, result and error.
+        """
+        return {
+            "id": self.id,
+            "status": self.status,
+            "params": self.params,
+            "progress": self.progress,
+            "result": self.result,
+            "error": self.error,
+        }
+
+
+class JobService:
+    """
+    Local HTTP/JSON service running optimization jobs on a worker pool.
+
+    Jobs are queued and run by `workers` threads of this process, which
+    share the returns panel and statistics loaded once at start-up. A
+    request identical to a job still queued or running returns that job
+    instead of starting another one. Only the `max_finished` finished or
+    failed jobs used most recently are kept; older ones are forgotten.
+
+    Args:
+        workers (int): Number of jobs run at the same time.
+        progress_interval (float): Minimum seconds between two progress
+                                   updates of a job.
+        max_finished (int): Number of finished jobs kept.
+    """
+
+    def __init__(self, workers=2, progress_interval=0.25, max_finished=100):
+        self.workers = workers
+        self.progress_interval = progress_interval
+        self.max_finished = max_finished
+        self.jobs = {}
+        self.active = {}
+        self.finished = OrderedDict()
+        self.num_coins = None
+        self._queue = None
+        self._executor = ThreadPoolExecutor(max_workers=workers)
+        self._tasks = []
+
+    async def start(self):
+        """
+        Load the data and start the workers.
+        """
+        loop = asyncio.get_running_loop()
+        statistics = await loop.run_in_executor(self._executor, get_statistics)
+        self.num_coins = len(statistics["coins"])
+        self._queue = asyncio.Queue()
+        self._tasks = [asyncio.create_task(self._work()) for _ in range(self.workers)]
+
+    def submit(self, params):
+        """
+        Queue a job, or return the identical job already queued or running.
+
+        Args:
+            params (dict): The parameters returned by `parse_params`.
+
+        Returns:
+            tuple: The job and whether it was deduplicated.
+        """
+        key = json.dumps(params, sort_keys=True)
+        job = self.active.get(key)
+        if job is not None:
+            return job, True
+        job = Job(uuid.uuid4().hex, key, params)
+        self.jobs[job.id] = job
+        self.active[key] = job
+        self._queue.put_nowait(job)
+        return job, False
+
+    async def _work(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            job = await self._queue.get()
+            job.update(status="running")
+
+            def publish(progress, job=job):
+                loop.call_soon_threadsafe(lambda: job.update(progress=progress))
+
+            try:
+                result = await loop.run_in_executor(
+                    self._executor,
+                    run_job,
+                    job.params,
+                    publish,
+                    self.progress_interval,
+                )
+                job.update(status="finished", result=result)
+            except Exception as error:
+                job.update(status="failed", error=str(error))
+            finally:
+                self.active.pop(job.key, None)
+                self.finished[job.id] = job
+                self._evict()
+                self._queue.task_done()
+
+    def _evict(self):
+        while len(self.finished) > self.max_finished:
+            job_id, _ = self.finished.popitem(last=False)
+            del self.jobs[job_id]
+
+    def get(self, job_id):
+        """
+        Find a job, marking it as recently used if it is finished.
+
+        Args:
+            job_id (str): Identifier of the job.
+
+        Returns:
+            Job or None: The job, or None if it is unknown or was evicted.
+        """
+        if job_id in self.finished:
+            self.finished.move_to_end(job_id)
+        return self.jobs.get(job_id)
+
+    async def handle(self, reader, writer):
+        """
+        Serve one HTTP connection.
+
+        Routes:
+            POST /jobs: queue a job with the JSON parameters of `run_app`.
+            GET /jobs: list every job.
+            GET /jobs/<id>: status, progress and result of a job.
+            GET /jobs/<id>/events: server-sent events with the progress of a
+                                   job until it is done.
+        """
+        try:
+            try:
+                method, path, body = await read_request(reader)
+            except ValueError as error:
+                await send_json(writer, 400, {"error": str(error)})
+                return
+            parts = [part for part in path.split("?")[0].split("/") if part]
+
+            if parts == ["jobs"] and method == "POST":
+                try:
+                    params = parse_params(json.loads(body or b"null"), self.num_coins)
+                except ValueError as error:
+                    await send_json(writer, 400, {"error": str(error)})
+                    return
+                job, deduplicated = self.submit(params)
+                await send_json(
+                    writer, 202, {**job.to_dict(), "deduplicated": deduplicated}
+                )
+            elif parts == ["jobs"] and method == "GET":
+                await send_json(
+                    writer, 200, [job.to_dict() for job in self.jobs.values()]
+                )
+            elif len(parts) in (2, 3) and parts[0] == "jobs":
+                job = self.get(parts[1])
+                if job is None or (len(parts) == 3 and parts[2] != "events"):
+                    await send_json(writer, 404, {"error": "Not found."})
+                elif method != "GET":
+                    await send_json(writer, 405, {"error": "Method not allowed."})
+                elif len(parts) == 2:
+                    await send_json(writer, 200, job.to_dict())
+                else:
+                    await stream_events(writer, job)
+            else:
+                await send_json(writer, 404, {"error": "Not found."})
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+
+async def read_request(reader):
+    """
+    Read an HTTP/1.1 request.
+
+    Args:
+        reader (asyncio.StreamReader): The connection reader.
+
+    Returns:
+        tuple: The method, the path and the body bytes.
+
+    Raises:
+        ValueError: If the Content-Length is not a non-negative integer, is
+                    larger than `max_body_size` or is missing from a POST
+                    request.
+    """
+    request_line = (await reader.readline()).decode("latin-1").split()
+    headers = {}
+    while True:
+        line = (await reader.readline()).decode("latin-1").strip()
+        if not line:
+            break
+        name, _, value = line.partition(":")
+        headers[name.strip().lower()] = value.strip()
+    method, path = (request_line + ["", ""])[:2]
+    method = method.upper()
+    length = headers.get("content-length")
+    if length is None and method == "POST":
+        raise ValueError("A POST request needs a Content-Length.")
+    if length is not None and not length.isdigit():
+        raise ValueError(f"Invalid Content-Length: {length!r}.")
+    length = int(length or 0)
+    if length > max_body_size:
+        raise ValueError(f"The request body must be at most {max_body_size} bytes.")
+    body = await reader.readexactly(length) if length else b""
+    return method, path, body
+
+
+async def send_json(writer, status, payload):
+    """
+    Write a JSON response and end it.
+
+    Args:
+        writer (asyncio.StreamWriter): The connection writer.
+        status (int): The HTTP status code.
+        payload: The JSON-serializable body.
+    """
+    body = json.dumps(payload).encode()
+    writer.write(
+        f"HTTP/1.1 {status} {reasons[status]}\r\n"
+        "Content-Type: application/json\r\n"
+        f"Content-Length: {len(body)}\r\n"
+        "Connection: close\r\n\r\n".encode() + body
+    )
+    await writer.drain()
+
+
+async def stream_events(writer, job, keep_alive=15):
+    """
+    Stream the changes of a job as server-sent events until it is done.
+
+    Every change is sent as a "job" event with the job dictionary; a comment
+    is sent every `keep_alive` seconds without changes.
+
+    Args:
+        writer (asyncio.StreamWriter): The connection writer.
+        job (Job): The job to follow.
+        keep_alive (float): Seconds between keep-alive comments.
+    """
+    writer.write(
+        b"HTTP/1.1 200 OK\r\n"
+        b"Content-Type: text/event-stream\r\n"
+        b"Cache-Control: no-cache\r\n"
+        b"Connection: close\r\n\r\n"
+    )
+    version = None
+    while True:
+        if job.version != version:
+            version = job.version
+            data = json.dumps(job.to_dict())
+            writer.write(f"event: job\ndata: {data}\n\n".encode())
+            if job.done:
+                await writer.drain()
+                return
+        else:
+            writer.write(b": keep-alive\n\n")
+        await writer.drain()
+        await job.wait(version, keep_alive)
+
+
+async def serve(host="127.0.0.1", port=8765, workers=2, max_finished=100):
+    """
+    Run the job service until cancelled.
+
+    Args:
+        host (str): Address to listen on; localhost by default.
+        port (int): Port to listen on.
+        workers (int): Number of jobs run at the same time.
+        max_finished (int): Number of finished jobs kept.
+    """
+    service = JobService(workers, max_finished=max_finished)
+    await service.start()
+    server = await asyncio.start_server(service.handle, host, port)
+    print(f"Serving on http://{host}:{port} with {workers} workers")
+    async with server:
+        await server.serve_forever()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run the local optimization service.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--workers", type=int, default=2)
+    parser.add_argument("--max-finished", type=int, default=100)
+    args = parser.parse_args()
+
+    try:
+        asyncio.run(serve(args.host, args.port, args.workers, args.max_finished))
+    except KeyboardInterrupt:
+        pass
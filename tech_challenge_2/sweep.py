@@ -0,0 +1,199 @@
+import sys
+import os
+import csv
+import json
+import time
+import argparse
+import itertools
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from coins import share_returns_panel, init_worker
+from engine import evolve
+
+default_params = {
+    "good_sharpe_ratio": 1.0,
+    "risk_free_rate": 0.04,
+    "population_size": 20,
+    "coins_qtd": 5,
+    "max_generations": 200,
+    "has_elitism_and_tournament": "elitism_and_tournament",
+}
+
+result_fields = [
+    "key",
+    "seed",
+    *default_params,
+    "best_sharpe",
+    "generations",
+    "generations_to_threshold",
+    "wall_time",
+    "best_wallet",
+]
+
+
+def cell_key(params, seed):
+    """
+    Build the key identifying a sweep cell in the result store.
+
+    Args:
+        params (dict): Parameters of the run.
+        seed (int): Seed of the run.
+
+    Returns:
+        str: A JSON string of the parameters and seed.
+    """
+    return json.dumps({**params, "seed": seed}, sort_keys=True)
+
+
+def expand_grid(grid, seeds):
+    """
+    List every cell of a parameter grid.
+
+    Args:
+        grid (dict): Mapping of parameter name to the list of its values.
+                     Parameters left out keep their `default_params` value.
+        seeds (list): Seeds to run for every combination.
+
+    Returns:
+        list: The (params, seed) pairs of every cell.
+    """
+    unknown = set(grid) - set(default_params)
+    if unknown:
+        raise ValueError(f"Unknown parameters: {sorted(unknown)}.")
+
+    names = list(grid)
+    cells = []
+    for values in itertools.product(*(grid[name] for name in names)):
+        params = {**default_params, **dict(zip(names, values))}
+        cells.extend((params, seed) for seed in seeds)
+    return cells
+
+
+def run_cell(params, seed):
+    """
+    Run the genetic algorithm for one cell of the sweep.
+
+    Args:
+        params (dict): Parameters of `engine.evolve`.
+        seed (int): Seed of the run.
+
+    Returns:
+        dict: The result row of the cell.
+    """
+    start = time.perf_counter()
+    snapshot = None
+    for snapshot in evolve(**params, seed=seed):
+        pass
+    wall_time = time.perf_counter() - start
+
+    best_wallet = snapshot.best_wallet
+    return {
+        "key": cell_key(params, seed),
+        "seed": seed,
+        **params,
+        "best_sharpe": float(best_wallet["fitness"]),
+        "generations": snapshot.generation,
+        "generations_to_threshold": (
+            snapshot.generation if snapshot.reached_threshold else ""
+        ),
+        "wall_time": wall_time,
+        "best_wallet": json.dumps(
+            {
+                "coins": list(best_wallet["coins"]),
+                "weights": list(best_wallet["weights"]),
+            }
+        ),
+    }
+
+
+def read_finished(path):
+    """
+    Read the keys of the cells already stored in a result file.
+
+    Args:
+        path (str): Path of the CSV result store.
+
+    Returns:
+        set: The keys of the finished cells.
+    """
+    if not os.path.exists(path):
+        return set()
+    with open(path, newline="") as file:
+        return {row["key"] for row in csv.DictReader(file)}
+
+
+def run_sweep(grid, seeds, output="sweep.csv", workers=None, debug=False):
+    """
+    Run a parameter sweep on a process pool, resuming from previous results.
+
+    Cells are fanned out to worker processes that share one preloaded
+    returns panel. Every finished cell is appended to the CSV store right
+    away, so an interrupted sweep only re-runs the cells missing from it.
+
+    Args:
+        grid (dict): Mapping of parameter name to the list of its values.
+        seeds (int or list): Number of seeds (0 to seeds - 1) or the seeds.
+        output (str): Path of the append-only CSV result store.
+        workers (int, optional): Number of worker processes. Defaults to the
+                                 number of CPUs.
+        debug (bool): Print each result as it arrives.
+
+    Returns:
+        int: Number of cells run by this call.
+    """
+    seeds = list(range(seeds)) if isinstance(seeds, int) else list(seeds)
+    finished = read_finished(output)
+    cells = [
+        (params, seed)
+        for params, seed in expand_grid(grid, seeds)
+        if cell_key(params, seed) not in finished
+    ]
+    if not cells:
+        return 0
+
+    new_file = not os.path.exists(output)
+    block, spec = share_returns_panel()
+    try:
+        with open(output, "a", newline="") as file, ProcessPoolExecutor(
+            max_workers=workers, initializer=init_worker, initargs=(spec,)
+        ) as executor:
+            writer = csv.DictWriter(file, fieldnames=result_fields)
+            if new_file:
+                writer.writeheader()
+
+            futures = [
+                executor.submit(run_cell, params, seed) for params, seed in cells
+            ]
+            for future in as_completed(futures):
+                result = future.result()
+                writer.writerow(result)
+                file.flush()
+                if debug:
+                    print(
+                        f"{result['key']}: best sharpe {result['best_sharpe']:.4f} "
+                        f"in {result['wall_time']:.2f}s"
+                    )
+    finally:
+        block.close()
+        block.unlink()
+
+    return len(cells)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run a parameter sweep of the GA.")
+    parser.add_argument(
+        "--grid",
+        type=json.loads,
+        required=True,
+        help='JSON grid, e.g. \'{"population_size": [20, 50], "coins_qtd": [3, 5]}\'',
+    )
+    parser.add_argument("--seeds", type=int, default=3)
+    parser.add_argument("--output", default="sweep.csv")
+    parser.add_argument("--workers", type=int)
+    args = parser.parse_args()
+
+    ran = run_sweep(args.grid, args.seeds, args.output, args.workers, debug=True)
+    print(f"{ran} cells run, results in {args.output}")
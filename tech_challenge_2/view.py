@@ -9,11 +9,33 @@ st.set_page_config(
     page_title="Gerador Otimizado de Carteira Cripto", page_icon="🪙", layout="centered"
 )
 
-from app import run_app
-from coins import get_coins
+from app import format_progress, render_result
+from coins import get_panel_coins
+from runner import BackgroundRun
+
+stop_reasons = {
+    "threshold": "A execução parou ao atingir o índice de Sharpe alvo.",
+    "max_generations": "A execução parou ao atingir o número máximo de gerações.",
+    "stalled": "A execução parou porque a melhor carteira deixou de melhorar.",
+    "converged": "A execução parou porque a população convergiu.",
+}
+
+
+@st.cache_resource
+def load_coins():
+    """
+    Load the returns panel once per Streamlit server.
+
+    The statistics index is only built when the first run needs it.
+
+    Returns:
+        list: The coin names of the universe.
+    """
+    return get_panel_coins()
+
 
 if "coins" not in st.session_state:
-    st.session_state["coins"] = get_coins()
+    st.session_state["coins"] = load_coins()
 
 with st.container():
     st.title("Tech Challenge 2")
@@ -103,13 +125,70 @@ with st.container():
         value=1.0,
         help="Selecione o índice de Sharpe desejado para a carteira.",
     )
+    stop_on_stall = stop_conditions.checkbox(
+        "Parar quando o algoritmo estagnar",
+        value=False,
+        help="Encerra a execução quando a melhor carteira não melhora por várias gerações seguidas.",
+    )
+    stall_generations = stop_conditions.number_input(
+        "Gerações sem Melhora",
+        min_value=50,
+        max_value=5000,
+        value=800,
+        disabled=not stop_on_stall,
+        help="Quantas gerações sem melhora no índice de Sharpe encerram a execução.",
+    )
+    adaptive = stop_conditions.checkbox(
+        "Taxas adaptativas",
+        value=False,
+        help="Ajusta a taxa de mutação e a quantidade de carteiras aleatórias de acordo com a diversidade da população.",
+    )
 
-    if st.button("Gerar Melhor Carteira"):
-        run_app(
+    run = st.session_state.get("run")
+    running = run is not None and run.status == "running"
+
+    if st.button("Gerar Melhor Carteira", disabled=running):
+        if run is not None:
+            run.cancel()
+        run = BackgroundRun(
             good_sharpe_ratio=sharpe_index,
             risk_free_rate=risk_free_rate,
             population_size=population_size,
             coins_qtd=coins_qtd,
             max_generations=max_generations,
             has_elitism_and_tournament=has_elitism_and_tournament,
+            stall_generations=stall_generations if stop_on_stall else None,
+            adaptive=adaptive,
         )
+        st.session_state["run"] = run
+        run.start()
+
+if run is not None:
+    st.markdown("---")
+
+    actions = st.columns(3)
+    if actions[0].button("Pausar", disabled=run.status != "running"):
+        run.pause()
+    if actions[1].button("Retomar", disabled=run.status != "paused"):
+        run.resume()
+    if actions[2].button("Cancelar", disabled=run.done):
+        run.cancel()
+
+    snapshot = run.snapshot
+    if run.status == "failed":
+        st.error(f"A execução falhou: {run.error}")
+    elif run.status == "finished" and snapshot is not None:
+        render_result(snapshot.best_wallet)
+        st.caption(stop_reasons.get(snapshot.stop_reason, ""))
+    elif snapshot is not None:
+        if run.status == "paused":
+            st.warning("Execução pausada.")
+        elif run.status == "cancelled":
+            st.warning("Execução cancelada.")
+        st.markdown(format_progress(snapshot))
+    else:
+        st.write("⏳ Iniciando o algoritmo...")
+
+    if run.status == "running":
+        time.sleep(0.5)
+        st.rerun()
@@ -0,0 +1,10 @@
+import os
+import sys
+
+# the modules of tech_challenge_2 import each other as top-level modules
+sys.path.insert(
+    0,
+    os.path.join(
+        os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "tech_challenge_2"
+    ),
+)
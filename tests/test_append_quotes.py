@@ -0,0 +1,127 @@
+import random
+import shutil
+import numpy as np
+import pandas as pd
+import pytest
+
+import coins
+from ag import calculate_fitness, generate_population
+from fitness_cache import FitnessCache
+from coins import (
+    append_quotes,
+    build_statistics,
+    get_returns_panel,
+    get_statistics,
+    invalidate_statistics,
+    load_returns_panel,
+    read_quotation,
+    update_statistics,
+)
+
+
+@pytest.fixture
+def quotations(tmp_path, monkeypatch):
+    for coin in ("Aave", "BNB", "Bitcoin"):
+        shutil.copy(f"{coins.path_name}/{coin}.csv", tmp_path / f"{coin}.csv")
+    # BNB lags the other coins by two days
+    path = tmp_path / "BNB.csv"
+    with open(path, encoding="utf-8-sig") as file:
+        lines = file.read().split("\n")
+    with open(path, "w", encoding="utf-8-sig") as file:
+        file.write("\n".join(lines[:1] + lines[3:]))
+
+    monkeypatch.setattr(coins, "path_name", str(tmp_path))
+    invalidate_statistics()
+    yield tmp_path
+    invalidate_statistics()
+
+
+def assert_same_statistics(actual, expected):
+    assert actual["coins"] == expected["coins"]
+    np.testing.assert_array_equal(actual["count"], expected["count"])
+    for name in ("mean", "cov", "pair_mean", "comoment"):
+        np.testing.assert_allclose(
+            actual[name], expected[name], rtol=1e-9, atol=1e-15, equal_nan=True
+        )
+
+
+def closes(start, values):
+    return pd.Series(values, index=pd.date_range(start, periods=len(values)))
+
+
+def test_appended_quotes_survive_a_reload(quotations):
+    get_statistics()
+    last_date = get_returns_panel().index.max()
+    bnb_date = pd.Timestamp(read_quotation("BNB")["dates"][-1])
+    assert bnb_date == last_date - pd.Timedelta(days=2)
+
+    rows = append_quotes(
+        {
+            "Bitcoin": closes(last_date + pd.Timedelta(days=1), [91000.5, 90500.25]),
+            "BNB": closes(bnb_date + pd.Timedelta(days=1), [617.1, 618.0, 620.3]),
+        }
+    )
+    assert len(rows) == 4
+    appended_panel = get_returns_panel()
+    appended = get_statistics()
+
+    invalidate_statistics()
+    reloaded_panel = get_returns_panel()
+    pd.testing.assert_frame_equal(reloaded_panel, appended_panel)
+    assert_same_statistics(appended, get_statistics())
+    assert_same_statistics(appended, build_statistics(load_returns_panel()))
+
+
+def test_gaps_are_rejected_before_writing(quotations):
+    last_date = get_returns_panel().index.max()
+    before = (quotations / "Bitcoin.csv").read_bytes()
+
+    with pytest.raises(ValueError, match="day by day"):
+        append_quotes(
+            {
+                "Bitcoin": closes(last_date + pd.Timedelta(days=1), [91000.0]),
+                "Aave": closes(last_date + pd.Timedelta(days=3), [170.0]),
+            }
+        )
+    assert (quotations / "Bitcoin.csv").read_bytes() == before
+
+
+def test_cached_fitness_is_recomputed_after_an_append(quotations):
+    before = get_statistics()
+    population = generate_population(3, 20, before, random.Random(0))
+    cached = calculate_fitness(population, 0.04, use_cache=True)
+
+    last_date = get_returns_panel().index.max()
+    append_quotes(
+        {
+            coin: closes(last_date + pd.Timedelta(days=1), [close * 0.7] * 5)
+            for coin, close in (("Aave", 160.0), ("Bitcoin", 90000.0))
+        }
+    )
+    # the previous index is replaced, not changed under its readers
+    assert get_statistics() is not before
+
+    recached = calculate_fitness(population, 0.04, use_cache=True)
+    fresh = calculate_fitness(population, 0.04)
+    recached, fresh, cached = (
+        np.array([w["fitness"] for w in wallets])
+        for wallets in (recached, fresh, cached)
+    )
+    # the cache scores canonical (sorted) wallets, which can differ by an ulp
+    np.testing.assert_allclose(recached, fresh, rtol=1e-12)
+    assert not np.isclose(recached, cached, rtol=1e-6).any()
+
+
+def test_updating_the_index_in_place_clears_the_bound_cache():
+    cache = FitnessCache()
+    statistics = build_statistics(
+        pd.DataFrame(np.random.default_rng(0).normal(size=(30, 3)))
+    )
+    cache.bind(statistics)
+    cache.put((0.04, b"wallet"), 1.0)
+    cache.bind(statistics)
+    assert len(cache) == 1
+
+    update_statistics(statistics, np.ones((1, 3)))
+    cache.bind(statistics)
+    assert len(cache) == 0
@@ -0,0 +1,75 @@
+import random
+import numpy as np
+import pandas as pd
+import pytest
+
+from backtest import (
+    build_statistics_from_values,
+    repair_population,
+    rolling_windows,
+    walk_forward,
+    window_statistics,
+)
+from coins import invalidate_statistics, set_returns_panel
+
+
+@pytest.fixture
+def vanishing_coin_panel():
+    rng = np.random.default_rng(0)
+    names = [f"C{i}" for i in range(6)]
+    values = rng.normal(0.001, 0.02, size=(400, len(names)))
+    # C0 stops trading after day 200
+    values[200:, 0] = np.nan
+    set_returns_panel(
+        pd.DataFrame(
+            values,
+            index=pd.date_range("2020-01-01", periods=400, name="Data"),
+            columns=names,
+        )
+    )
+    yield names
+    invalidate_statistics()
+
+
+def test_repair_population_swaps_ineligible_coins():
+    population = [
+        {"coins": ["A", "B", "C"], "weights": [0.5, 0.3, 0.2], "fitness": 1.0}
+    ]
+    repaired = repair_population(population, ["B", "C", "D"], random.Random(0))
+    assert repaired == [{"coins": ["D", "B", "C"], "weights": [0.5, 0.3, 0.2]}]
+
+
+def test_warm_start_survives_a_coin_leaving_the_panel(vanishing_coin_panel):
+    result = walk_forward(
+        window=100,
+        step=50,
+        population_size=10,
+        coins_qtd=5,
+        generations=5,
+        chains=1,
+    )
+
+    windows = result["windows"]
+    assert len(windows) == 6
+    late = [w for w in windows if w["start"] >= "2020-07-19"]
+    assert late
+    for w in late:
+        assert "C0" not in w["best_wallet"]["coins"]
+
+
+def test_sliding_window_statistics_match_a_rebuild():
+    rng = np.random.default_rng(1)
+    values = rng.normal(0.001, 0.02, size=(120, 8))
+    values[rng.random(values.shape) < 0.15] = np.nan
+    names = [f"C{i}" for i in range(8)]
+    windows = rolling_windows(len(values), 40, 7) + [(100, 120)]
+
+    for (start, end), statistics in zip(
+        windows, window_statistics(values, names, windows)
+    ):
+        rebuilt = build_statistics_from_values(values[start:end], names)
+        np.testing.assert_array_equal(statistics["count"], rebuilt["count"])
+        for name in ("mean", "cov", "pair_mean", "comoment"):
+            np.testing.assert_allclose(
+                statistics[name], rebuilt[name], rtol=0, atol=1e-15, equal_nan=True
+            )
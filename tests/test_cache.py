@@ -0,0 +1,83 @@
+import os
+import numpy as np
+
+from cache import load_cached_arrays, write_entry, read_meta
+
+
+def build_counter():
+    calls = []
+
+    def build_arrays(path):
+        calls.append(path)
+        with open(path) as file:
+            values = [float(line) for line in file]
+        return {"values": np.array(values)}
+
+    return build_arrays, calls
+
+
+def write_source(path, values):
+    with open(path, "w") as file:
+        file.write("\n".join(str(v) for v in values))
+
+
+def test_entry_is_reused_until_the_source_changes(tmp_path):
+    source = tmp_path / "coin.csv"
+    cache_dir = str(tmp_path / ".cache")
+    build_arrays, calls = build_counter()
+
+    write_source(source, [1, 2, 3])
+    first = load_cached_arrays(str(source), build_arrays, cache_dir, version=1)
+    second = load_cached_arrays(str(source), build_arrays, cache_dir, version=1)
+    assert len(calls) == 1
+    np.testing.assert_array_equal(first["values"], second["values"])
+
+    write_source(source, [4, 5])
+    changed = load_cached_arrays(str(source), build_arrays, cache_dir, version=1)
+    assert len(calls) == 2
+    np.testing.assert_array_equal(changed["values"], [4, 5])
+
+    # only the entry the metadata points to is kept
+    directories = [name for name in os.listdir(cache_dir) if not name.endswith(".json")]
+    assert directories == [read_meta(cache_dir, "coin")["directory"]]
+
+
+def test_other_version_is_rebuilt(tmp_path):
+    source = tmp_path / "coin.csv"
+    cache_dir = str(tmp_path / ".cache")
+    build_arrays, calls = build_counter()
+
+    write_source(source, [1, 2, 3])
+    load_cached_arrays(str(source), build_arrays, cache_dir, version=1)
+    load_cached_arrays(str(source), build_arrays, cache_dir, version=2)
+    assert len(calls) == 2
+
+
+def test_missing_arrays_are_a_miss(tmp_path):
+    source = tmp_path / "coin.csv"
+    cache_dir = str(tmp_path / ".cache")
+    build_arrays, calls = build_counter()
+
+    write_source(source, [1, 2, 3])
+    load_cached_arrays(str(source), build_arrays, cache_dir, version=1)
+    directory = read_meta(cache_dir, "coin")["directory"]
+    os.remove(os.path.join(cache_dir, directory, "values.npy"))
+    os.rmdir(os.path.join(cache_dir, directory))
+
+    arrays = load_cached_arrays(str(source), build_arrays, cache_dir, version=1)
+    assert len(calls) == 2
+    np.testing.assert_array_equal(arrays["values"], [1, 2, 3])
+
+
+def test_concurrent_writers_keep_a_complete_entry(tmp_path):
+    cache_dir = str(tmp_path / ".cache")
+    arrays = {"values": np.arange(3.0)}
+    meta = {"mtime_ns": 0, "size": 0, "sha1": "ab" * 20, "version": 1}
+
+    # the second writer finds the directory already renamed into place
+    first = write_entry(cache_dir, "coin", arrays, meta)
+    second = write_entry(cache_dir, "coin", arrays, meta)
+    assert first == second
+    loaded = np.load(os.path.join(cache_dir, first["directory"], "values.npy"))
+    np.testing.assert_array_equal(loaded, arrays["values"])
+    assert not [name for name in os.listdir(cache_dir) if name.startswith(".")]
@@ -0,0 +1,34 @@
+import pytest
+
+from engine import evolve
+
+
+def trace(snapshots):
+    return [
+        (
+            s.generation,
+            tuple(s.best_wallet["coins"]),
+            tuple(s.best_wallet["weights"]),
+            s.best_wallet["fitness"],
+        )
+        for s in snapshots
+    ]
+
+
+@pytest.mark.parametrize("batched", [False, True])
+def test_resumed_run_matches_an_uninterrupted_one(tmp_path, batched):
+    args = (1.0, 0.04, 20, 4, 60)
+    kwargs = {"seed": 3, "batched": batched}
+    full = trace(evolve(*args, **kwargs))
+
+    path = str(tmp_path / "run.pkl")
+    for snapshot in evolve(*args, checkpoint_path=path, checkpoint_every=10, **kwargs):
+        if snapshot.generation == 25:
+            break
+    resumed = trace(
+        evolve(*args, checkpoint_path=path, checkpoint_every=10, resume=True, **kwargs)
+    )
+
+    # the run restarts from the checkpoint of generation 20
+    assert resumed[0][0] == 20
+    assert resumed == full[-len(resumed) :]
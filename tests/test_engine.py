@@ -0,0 +1,44 @@
+from types import SimpleNamespace
+
+import engine
+from engine import throttle
+
+
+def snapshots(count):
+    return [
+        SimpleNamespace(generation=generation, finished=generation == count)
+        for generation in range(1, count + 1)
+    ]
+
+
+def generations(stream):
+    return [snapshot.generation for snapshot in stream]
+
+
+def test_throttle_without_limits_passes_everything():
+    assert generations(throttle(snapshots(5))) == [1, 2, 3, 4, 5]
+
+
+def test_throttle_every_keeps_multiples_and_the_final_snapshot():
+    assert generations(throttle(snapshots(10), every=4)) == [4, 8, 10]
+    assert generations(throttle(snapshots(8), every=4)) == [4, 8]
+
+
+def test_throttle_interval_uses_the_time_since_the_last_pass(monkeypatch):
+    # one clock reading when the stream starts, then one per snapshot
+    clock = iter([0.0, 0.4, 1.0, 1.5, 2.1, 2.2, 2.3])
+    monkeypatch.setattr(engine.time, "monotonic", lambda: next(clock))
+
+    assert generations(throttle(snapshots(6), interval=1.0)) == [2, 4, 6]
+
+
+def test_throttle_combines_every_and_interval(monkeypatch):
+    clock = iter([0.0, 0.1, 0.2, 5.0, 5.1, 5.2])
+    monkeypatch.setattr(engine.time, "monotonic", lambda: next(clock))
+
+    assert generations(throttle(snapshots(5), every=2, interval=1.0)) == [
+        2,
+        3,
+        4,
+        5,
+    ]
@@ -0,0 +1,71 @@
+import random
+import numpy as np
+
+from ag import calculate_fitness, fitness_cache, generate_population
+from coins import calculate_portfolio_sharpe, get_statistics
+from fitness_cache import FitnessCache, wallet_signatures
+from population import Population
+
+
+def test_signatures_ignore_coin_order():
+    coin_ids = np.array([[3, 1, 2], [1, 2, 3], [1, 2, 4]])
+    weights = np.array([[0.5, 0.2, 0.3], [0.2, 0.3, 0.5], [0.2, 0.3, 0.5]])
+    sorted_ids, rounded, signatures = wallet_signatures(coin_ids, weights, 0.04)
+
+    np.testing.assert_array_equal(sorted_ids[0], [1, 2, 3])
+    np.testing.assert_allclose(rounded[0], [0.2, 0.3, 0.5])
+    assert signatures[0] == signatures[1]
+    assert signatures[1] != signatures[2]
+    assert wallet_signatures(coin_ids, weights, 0.05)[2][0] != signatures[0]
+
+
+def test_cache_evicts_least_recently_used():
+    cache = FitnessCache(maxsize=2)
+    cache.put_many([("a", 1.0), ("b", 2.0)])
+    assert cache.get_many(["a", "c"]) == [1.0, None]
+    cache.put("c", 3.0)
+    assert cache.get("b") is None
+    assert (cache.hits, cache.misses) == (1, 2)
+
+
+def test_cached_fitness_matches_direct_scoring():
+    statistics = get_statistics()
+    population = generate_population(4, 200, rng=random.Random(0))
+    # the same wallets again, with their coins in another order
+    population += [
+        {
+            "coins": wallet["coins"][::-1],
+            "weights": wallet["weights"][::-1],
+            "fitness": None,
+        }
+        for wallet in population[:50]
+    ]
+
+    fitness_cache.clear()
+    cached = calculate_fitness(population, 0.04, use_cache=True)
+    uncached = calculate_fitness(population, 0.04)
+    looped = calculate_fitness(population, 0.04, vectorized=False)
+
+    assert fitness_cache.hits == 0 and fitness_cache.misses == len(population)
+    for a, b, c, wallet in zip(cached, uncached, looped, population):
+        assert abs(a["fitness"] - b["fitness"]) < 1e-12
+        assert abs(b["fitness"] - c["fitness"]) < 1e-12
+        expected = calculate_portfolio_sharpe(
+            wallet,
+            statistics["mean"][[statistics["ids"][c] for c in wallet["coins"]]],
+            0.04,
+            statistics,
+        )
+        assert abs(b["fitness"] - expected) < 1e-12
+    for a, b in zip(cached[:50], cached[200:]):
+        assert a["fitness"] == b["fitness"]
+
+    again = calculate_fitness(population, 0.04, use_cache=True)
+    assert fitness_cache.hits == len(population)
+    assert [w["fitness"] for w in again] == [w["fitness"] for w in cached]
+
+    # a Population keeps float32 weights
+    scored = Population.from_wallets(population).evaluate(0.04)
+    np.testing.assert_allclose(
+        scored.fitness, [w["fitness"] for w in uncached], rtol=1e-6
+    )
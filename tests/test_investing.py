@@ -0,0 +1,40 @@
+import os
+
+import numpy as np
+import pandas as pd
+
+from investing import parse_dates, read_investing_csv
+
+fixture = os.path.join(os.path.dirname(__file__), "data", "investing.csv")
+
+
+def test_parse_dates_reads_day_month_year():
+    dates = parse_dates(pd.Series(["18.11.2024", "29.02.2020", "01.01.1970"]))
+    np.testing.assert_array_equal(
+        dates, np.array(["2024-11-18", "2020-02-29", "1970-01-01"], "datetime64[D]")
+    )
+
+
+def test_read_investing_csv_parses_every_column():
+    df = read_investing_csv(fixture)
+
+    assert list(df.columns) == [
+        "date",
+        "open",
+        "high",
+        "low",
+        "close",
+        "volume",
+        "change",
+    ]
+    # the export lists the newest day first; the frame is sorted by date
+    np.testing.assert_array_equal(
+        df["date"].to_numpy(dtype="datetime64[D]"),
+        np.array(["2020-02-29", "2024-01-01", "2024-01-02"], "datetime64[D]"),
+    )
+    np.testing.assert_allclose(df["open"], [0.48, 90000.0, 89700.1])
+    np.testing.assert_allclose(df["high"], [0.51, 90500.0, 91000.5])
+    np.testing.assert_allclose(df["low"], [0.47, 89100.0, 88000.25])
+    np.testing.assert_allclose(df["close"], [0.5, 89700.1, 90768.9])
+    np.testing.assert_allclose(df["volume"], [np.nan, 1.2e6, 148400.0])
+    np.testing.assert_allclose(df["change"], [np.nan, -0.0104, 0.0119])
@@ -0,0 +1,78 @@
+import io
+from contextlib import redirect_stdout
+
+from app import run_app
+from island import evolve_islands, island_seed, migrate
+
+params = {
+    "good_sharpe_ratio": 1.0,
+    "risk_free_rate": 0.04,
+    "population_size": 12,
+    "coins_qtd": 4,
+    "max_generations": 12,
+    "islands": 2,
+    "migration_interval": 4,
+    "seed": 7,
+}
+
+
+def history(snapshots):
+    return [
+        (s.generation, tuple(s.best_wallet["coins"]), s.best_wallet["fitness"])
+        for s in snapshots
+    ]
+
+
+def test_island_seeds_are_distinct_and_stable():
+    seeds = {
+        island_seed(123, island, epoch) for island in range(3) for epoch in range(3)
+    }
+    assert len(seeds) == 9
+    assert island_seed(123, 1, 2) == island_seed(123, 1, 2)
+
+
+def test_migrate_replaces_the_worst_wallets_of_the_next_island():
+    islands = [
+        [{"fitness": f} for f in (1.0, 5.0, 3.0)],
+        [{"fitness": f} for f in (2.0, 4.0, 0.0)],
+    ]
+    migrated = migrate(islands, 1)
+    assert [w["fitness"] for w in migrated[0]] == [5.0, 3.0, 4.0]
+    assert [w["fitness"] for w in migrated[1]] == [4.0, 2.0, 5.0]
+
+
+def test_seeded_island_runs_are_reproducible():
+    first = history(evolve_islands(**params))
+    assert first == history(evolve_islands(**params))
+    assert [generation for generation, _, _ in first] == [4, 8, 12]
+
+
+def test_resumed_island_run_matches_uninterrupted_run(tmp_path):
+    path = str(tmp_path / "islands.pkl")
+    full = history(evolve_islands(**params))
+
+    for snapshot in evolve_islands(**params, checkpoint_path=path):
+        if snapshot.generation == 8:
+            break
+    resumed = history(evolve_islands(**params, checkpoint_path=path, resume=True))
+    assert resumed == full[-len(resumed) :]
+
+
+def test_run_app_runs_islands_with_engine_features():
+    with redirect_stdout(io.StringIO()) as output:
+        best_wallet = run_app(
+            0.5,
+            0.04,
+            12,
+            4,
+            8,
+            debug=True,
+            seed=1,
+            batched=True,
+            islands=2,
+            migration_interval=4,
+            stall_generations=4,
+            adaptive=True,
+        )
+    assert len(best_wallet["coins"]) == 4
+    assert "Stop reason" in output.getvalue()
@@ -0,0 +1,42 @@
+import io
+from contextlib import redirect_stdout
+import numpy as np
+import pytest
+
+from app import run_app
+from coins import calculate_portfolio_sharpe, get_coin_ids, get_statistics
+from local_search import local_search
+
+
+def test_local_search_improves_and_scores_the_wallet():
+    statistics = get_statistics()
+    wallet = {"coins": statistics["coins"][:4], "weights": [0.1, 0.2, 0.3, 0.4]}
+
+    def sharpe(wallet):
+        mean_returns = statistics["mean"][get_coin_ids(wallet["coins"], statistics)]
+        return calculate_portfolio_sharpe(wallet, mean_returns, 0.04, statistics)
+
+    start = sharpe(wallet)
+
+    improved = local_search(wallet, 0.04, statistics, max_steps=20)
+    assert isinstance(improved["fitness"], np.float64)
+    assert improved["fitness"] >= start
+    np.testing.assert_allclose(improved["fitness"], sharpe(improved))
+
+
+@pytest.mark.parametrize("batched", [False, True])
+def test_run_app_prints_progress_with_local_search(batched):
+    with redirect_stdout(io.StringIO()) as output:
+        best_wallet = run_app(
+            0.5,
+            0.04,
+            20,
+            5,
+            3,
+            debug=True,
+            local_search_steps=5,
+            seed=1,
+            batched=batched,
+        )
+    assert len(best_wallet["coins"]) == 5
+    assert "Best wallet fitness" in output.getvalue()
@@ -0,0 +1,79 @@
+import random
+
+import numpy as np
+import pytest
+
+from ag import (
+    allowed_weights,
+    crossover_batch,
+    duplicate_mask,
+    enumerate_weight_compositions,
+    generate_exact_weights,
+    generate_population_arrays,
+    mutate_batch,
+    project_weights,
+)
+from coins import get_statistics
+
+
+def is_on_grid(weights):
+    compositions = enumerate_weight_compositions(allowed_weights, weights.shape[1])
+    return (
+        np.isclose(weights[:, None, :], compositions[None, :, :])
+        .all(axis=2)
+        .any(axis=1)
+    )
+
+
+class NoDraws(random.Random):
+    def randrange(self, *args, **kwargs):
+        raise AssertionError("no weights should be drawn")
+
+
+def test_generate_exact_weights_fails_without_drawing():
+    # eleven weights of at least 0.10 cannot sum to 1.0
+    with pytest.raises(ValueError, match="No combination"):
+        generate_exact_weights(allowed_weights, 11, rng=NoDraws())
+
+
+def test_project_weights_returns_the_nearest_composition():
+    compositions = enumerate_weight_compositions(allowed_weights, 4)
+    np.testing.assert_allclose(
+        project_weights(compositions, allowed_weights), compositions
+    )
+
+    rng = np.random.default_rng(0)
+    weights = rng.random((200, 4)) + 0.01
+    projected = project_weights(weights, allowed_weights)
+    assert is_on_grid(projected).all()
+    normalized = weights / weights.sum(axis=1, keepdims=True)
+    distances = ((normalized[:, None, :] - compositions[None]) ** 2).sum(axis=2)
+    np.testing.assert_allclose(
+        ((normalized - projected) ** 2).sum(axis=1), distances.min(axis=1)
+    )
+
+
+def test_batched_children_are_valid_wallets():
+    rng = np.random.default_rng(0)
+    population = generate_population_arrays(4, 200, get_statistics(), rng)
+    parents1 = rng.integers(len(population), size=500)
+    parents2 = rng.integers(len(population), size=500)
+
+    children = crossover_batch(population, parents1, parents2, rng)
+    assert not duplicate_mask(children.coins).any()
+    assert is_on_grid(children.weights).all()
+    # every coin of a child comes from one of its parents
+    from_parents = (
+        children.coins[:, :, None]
+        == np.concatenate(
+            [population.coins[parents1], population.coins[parents2]], axis=1
+        )[:, None, :]
+    ).any(axis=2)
+    assert from_parents.all()
+
+    mutated = mutate_batch(children, rng)
+    np.testing.assert_array_equal(mutated.coins, children.coins)
+    assert is_on_grid(mutated.weights).all()
+    np.testing.assert_allclose(
+        np.sort(mutated.weights, axis=1), np.sort(children.weights, axis=1)
+    )
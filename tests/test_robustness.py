@@ -0,0 +1,59 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from ag import calculate_fitness
+from coins import (
+    calculate_portfolio_sharpe,
+    get_coin_ids,
+    get_statistics,
+    invalidate_statistics,
+    set_returns_panel,
+)
+from robustness import evaluate_robustness
+
+wallets = [
+    {"coins": ["C0", "C1", "C2"], "weights": [0.5, 0.3, 0.2]},
+    {"coins": ["C3", "C1", "C4"], "weights": [0.2, 0.4, 0.4]},
+    {"coins": ["C5", "C0", "C2"], "weights": [0.4, 0.4, 0.2]},
+]
+
+
+@pytest.fixture(params=[False, True], ids=["overlapping", "gaps"])
+def panel(request):
+    rng = np.random.default_rng(0)
+    values = rng.normal(0.002, 0.03, size=(300, 6))
+    if request.param:
+        # coins with shorter histories and missing days
+        values[:120, 0] = np.nan
+        values[rng.random(values.shape) < 0.1] = np.nan
+    set_returns_panel(
+        pd.DataFrame(
+            values,
+            index=pd.date_range("2022-01-01", periods=300, name="Data"),
+            columns=[f"C{i}" for i in range(6)],
+        )
+    )
+    yield request.param
+    invalidate_statistics()
+
+
+def test_sample_sharpe_is_the_ga_fitness(panel):
+    statistics = get_statistics()
+    results = evaluate_robustness(wallets, num_resamples=200, seed=0)
+
+    for wallet, result in zip(wallets, results):
+        mean_returns = statistics["mean"][get_coin_ids(wallet["coins"], statistics)]
+        expected = calculate_portfolio_sharpe(wallet, mean_returns, 0.04, statistics)
+        assert result["sharpe"] == pytest.approx(expected, rel=1e-10)
+        assert result["ci_low"] <= result["mean_sharpe"] <= result["ci_high"]
+
+    fitness = [w["fitness"] for w in calculate_fitness(wallets, 0.04)]
+    np.testing.assert_allclose([r["sharpe"] for r in results], fitness, rtol=1e-10)
+
+
+def test_results_do_not_depend_on_the_workers(panel):
+    kwargs = {"num_resamples": 120, "chunk_size": 50, "seed": 1}
+    single = evaluate_robustness(wallets, workers=1, **kwargs)
+    parallel = evaluate_robustness(wallets, workers=2, **kwargs)
+    assert single == parallel
@@ -0,0 +1,98 @@
+import asyncio
+import json
+import os
+import pytest
+
+from service import JobService, max_body_size, parse_params
+
+params = {
+    "good_sharpe_ratio": 10.0,
+    "risk_free_rate": 0.04,
+    "population_size": 10,
+    "coins_qtd": 4,
+    "max_generations": 3,
+}
+
+
+def test_coins_qtd_is_bounded_by_the_universe():
+    assert parse_params({**params, "coins_qtd": 5}, num_coins=5)["coins_qtd"] == 5
+    with pytest.raises(ValueError, match="at most 5"):
+        parse_params({**params, "coins_qtd": 6}, num_coins=5)
+    # 0.1 is the smallest allowed weight, so 11 coins cannot sum to 1.0
+    with pytest.raises(ValueError, match="No combination"):
+        parse_params({**params, "coins_qtd": 11})
+
+
+async def request(port, head, body=b""):
+    reader, writer = await asyncio.open_connection("127.0.0.1", port)
+    writer.write(head.encode() + b"\r\n\r\n" + body)
+    await writer.drain()
+    raw = await reader.read()
+    writer.close()
+    status, _, payload = raw.partition(b"\r\n\r\n")
+    return int(status.split()[1]), json.loads(payload)
+
+
+def post(payload):
+    body = json.dumps(payload).encode()
+    return f"POST /jobs HTTP/1.1\r\nContent-Length: {len(body)}", body
+
+
+def run_service(scenario, **kwargs):
+    async def main():
+        service = JobService(workers=1, progress_interval=0.01, **kwargs)
+        await service.start()
+        server = await asyncio.start_server(service.handle, "127.0.0.1", 0)
+        try:
+            await scenario(service, server.sockets[0].getsockname()[1])
+        finally:
+            server.close()
+
+    asyncio.run(main())
+
+
+def test_bad_requests_get_400():
+    async def scenario(service, port):
+        for name, value in (
+            ("coins_qtd", 100),
+            ("population_size", 2),
+            ("population_size", 10_001),
+            ("max_generations", 100_001),
+            ("islands", (os.cpu_count() or 1) + 1),
+        ):
+            status, body = await request(port, *post({**params, name: value}))
+            assert status == 400 and name in body["error"]
+
+        body = json.dumps(params).encode()
+        for head in (
+            "POST /jobs HTTP/1.1",
+            "POST /jobs HTTP/1.1\r\nContent-Length: ten",
+            "POST /jobs HTTP/1.1\r\nContent-Length: -5",
+            f"POST /jobs HTTP/1.1\r\nContent-Length: {max_body_size + 1}",
+        ):
+            status, response = await request(port, head, body)
+            assert status == 400
+            assert "Content-Length" in response["error"] or "body" in response["error"]
+        assert service.jobs == {}
+
+    run_service(scenario)
+
+
+def test_least_recently_used_finished_jobs_are_evicted():
+    async def scenario(service, port):
+        ids = []
+        for seed in range(3):
+            _, job = await request(port, *post({**params, "seed": seed}))
+            ids.append(job["id"])
+            while service.jobs[job["id"]].status != "finished":
+                await asyncio.sleep(0.01)
+            if seed == 1:
+                # reading the first job makes the second the least recent
+                status, _ = await request(port, f"GET /jobs/{ids[0]} HTTP/1.1")
+                assert status == 200
+
+        assert list(service.jobs) == [ids[0], ids[2]]
+        status, _ = await request(port, f"GET /jobs/{ids[1]} HTTP/1.1")
+        assert status == 404
+
+    run_service(scenario, max_finished=2)
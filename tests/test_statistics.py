@@ -0,0 +1,65 @@
+import numpy as np
+import pandas as pd
+
+import coins
+from coins import build_statistics, downdate_statistics, update_statistics
+
+
+def returns_panel(days=300, num_coins=12, seed=0):
+    rng = np.random.default_rng(seed)
+    values = rng.normal(0.001, 0.03, size=(days, num_coins))
+    values[rng.random(values.shape) < 0.2] = np.nan
+    return pd.DataFrame(values, columns=[f"C{i}" for i in range(num_coins)])
+
+
+def assert_same_statistics(actual, expected, rtol=1e-9):
+    np.testing.assert_array_equal(actual["count"], expected["count"])
+    for name in ("mean", "cov", "pair_mean", "comoment"):
+        np.testing.assert_allclose(
+            actual[name], expected[name], rtol=rtol, atol=1e-15, equal_nan=True
+        )
+
+
+def test_count_is_integer_and_large_universes_use_float32(monkeypatch):
+    panel = returns_panel()
+    statistics = build_statistics(panel)
+    assert statistics["count"].dtype == np.int32
+    assert statistics["cov"].dtype == np.float64
+
+    monkeypatch.setattr(coins, "large_universe", 10)
+    statistics = build_statistics(panel)
+    for name in ("pair_mean", "comoment", "cov"):
+        assert statistics[name].dtype == np.float32
+    assert_same_statistics(statistics, build_statistics(panel, np.float64), 1e-4)
+
+
+def test_updates_in_place_match_a_rebuild():
+    values = returns_panel().to_numpy()
+    names = [f"C{i}" for i in range(values.shape[1])]
+    statistics = build_statistics(pd.DataFrame(values[:200], columns=names))
+    count = statistics["count"]
+
+    # blocks smaller than the universe exercise the blocked updates
+    updated = update_statistics(statistics, values[200:], block_size=5)
+    assert updated is statistics and updated["count"] is count
+    assert_same_statistics(
+        updated, build_statistics(pd.DataFrame(values, columns=names))
+    )
+
+    downdate_statistics(statistics, values[:150], block_size=5)
+    assert_same_statistics(
+        statistics, build_statistics(pd.DataFrame(values[150:], columns=names))
+    )
+
+
+def test_known_returns_are_not_counted_twice():
+    values = returns_panel().to_numpy()
+    names = [f"C{i}" for i in range(values.shape[1])]
+    partial = values.copy()
+    partial[-20:, :4] = np.nan
+    statistics = build_statistics(pd.DataFrame(partial, columns=names))
+
+    update_statistics(statistics, values[-20:], known=~np.isnan(partial[-20:]))
+    assert_same_statistics(
+        statistics, build_statistics(pd.DataFrame(values, columns=names))
+    )
@@ -0,0 +1,33 @@
+import numpy as np
+
+from coins import get_statistics
+from grid_search import grid_search
+from tangency import tangency_search, tangency_weights
+
+
+def test_tangency_weights_maximize_the_unconstrained_sharpe():
+    statistics = get_statistics()
+    # both subsets have an interior long-only solution on the bundled data
+    subsets = np.array([[0, 1, 3], [0, 1, 4]])
+    weights, valid = tangency_weights(subsets, 0.04, statistics)
+    assert valid.all() and (weights > 0).all()
+
+    risk_free_rate_daily = 1.04 ** (1 / 252) - 1
+    for subset, w in zip(subsets, weights):
+        # the weights are proportional to S^-1 (mu - rf)
+        cov = statistics["cov"][np.ix_(subset, subset)]
+        raw = np.linalg.solve(cov, statistics["mean"][subset] - risk_free_rate_daily)
+        np.testing.assert_allclose(w, raw / raw.sum())
+
+
+def test_tangency_search_finds_the_grid_optimum():
+    grid = grid_search(4, 0.04, top_k=3)
+    tangency = tangency_search(4, 0.04, top_k=3)
+
+    assert [w["fitness"] for w in tangency] == sorted(
+        (w["fitness"] for w in tangency), reverse=True
+    )
+    # snapped tangency weights are grid points, so they cannot beat the grid
+    assert tangency[0]["fitness"] <= grid[0]["fitness"] + 1e-12
+    assert tangency[0]["coins"] == grid[0]["coins"]
+    assert tangency[0]["weights"] == grid[0]["weights"]